@@ -2,13 +2,11 @@
 import sys
 import time
 import threading
-import os
 from rich.console import Console
 from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn
 import math
-import time
-import sys
 import itertools
+from frames import FrameRenderer, TermSize, cells, wave_table
 
 # Initialize a Rich console for use in animation functions
 console = Console()
@@ -28,7 +26,11 @@ RESET = "\033[0m"
 ORANGE = "\033[38;5;208m"
 
 # Boot animation using Rich 
-def boot_sequence(duration, user):
+def boot_sequence(steps, user, linger=0.4):
+    """
+    steps: list of (label, fn) doing the actual startup work; the bar advances
+    as each one returns instead of running on a timer.
+    """
     console.clear()
     console.rule("[bold cyan]BOOTING ZEET")
     with Progress(
@@ -38,24 +40,22 @@ def boot_sequence(duration, user):
         transient=True,
         console=console,
     ) as prog:
-        task = prog.add_task("[green]Initializing modules...", total=100)
-        t0 = time.time()
-        while not prog.finished:
-            prog.advance(task, 6)
-            time.sleep(0.06)
-            if time.time() - t0 > duration:
-                prog.update(task, completed=100)
-                break
+        task = prog.add_task("[green]Initializing modules...", total=max(1, len(steps)))
+        for label, fn in steps:
+            prog.update(task, description=f"[green]{label}...")
+            fn()
+            prog.advance(task, 1)
     console.print(f"[bold green]ZEET acessed. Welcome, {user}. ")
-    time.sleep(1)
+    time.sleep(linger)
     console.clear()
 
 def splash_screen(type_text,
                   wave_amplitude=3, wave_speed=3, wave_delay=0.05,
-                  type_delay=0.04, spinner_delay=0.08):
+                  type_delay=0.04, spinner_delay=0.08, show_fps=False):
     """
     Runs an animated splash: wave_ascii above, typewriter+spinner below,
     and a 'Press [ENTER] to start' prompt. Stops when Enter is pressed.
+    Frames go through FrameRenderer, so only changed cells hit the terminal.
     """
     # Shared state
     state = {
@@ -67,6 +67,10 @@ def splash_screen(type_text,
     stop_event = threading.Event()
 
     ascii_lines = zeetASCII.strip("\n").splitlines()
+    # wave offsets for one full sin period, looked up by phase instead of recomputed per frame
+    wave = wave_table(ascii_lines, wave_amplitude)
+    # built here (main thread) so it can hook SIGWINCH
+    renderer = FrameRenderer(size=TermSize(), fps=1.0 / max(wave_delay, 1e-3))
 
     # Typewriter thread: gradually append chars to state['typed']
     def typewriter_thread_fn():
@@ -92,73 +96,45 @@ def splash_screen(type_text,
         with lock:
             state["spinner"] = " "
 
-    # Render thread: draw full frame (wave + typed line + prompt)
+    # Render thread: build the frame (wave + typed line + prompt), renderer sends the diff
     def render_thread_fn():
         # initial full clear
         sys.stdout.write("\033[2J")  # clear entire screen
         sys.stdout.flush()
         t0 = time.perf_counter()
-        frame = 0
-        last_fps_t = t0
-        frame_count = 0
-        show_fps = False  # flip to True to debug framerate
+        steps = len(wave)
 
         while not stop_event.is_set():
-            # home cursor
-            sys.stdout.write("\033[H")
             now = time.perf_counter() - t0
+            cols = renderer.size.get()[0]
+            rows = []
 
-            # draw wave ascii
-            cols = 80
-            try:
-                cols = os.get_terminal_size().columns
-            except Exception:
-                pass
-
-            # We'll compute a float-phase and convert to an integer column offset.
-            # Using sin(...) * amplitude gives -amplitude..+amplitude, so we add a baseline.
+            # draw wave ascii: phase -> table row, clipped to terminal width
+            offsets = wave[int(wave_speed * now / (2 * math.pi) * steps) % steps]
             for i, line in enumerate(ascii_lines):
-                phase = wave_speed * now + i * 0.6
-                # continuous offset (can be negative); then shift so we don't go left of column 0
-                float_offset = math.sin(phase) * wave_amplitude
-                offset = int(round(float_offset + wave_amplitude))  # map to 0..(2*amplitude)
-                # clip to terminal width (avoid overflow)
-                max_offset = max(0, cols - len(line) - 1)
-                offset = max(0, min(offset, max_offset))
-                sys.stdout.write(CYAN + " " * offset + line + RESET + "\n")
+                offset = max(0, min(offsets[i], cols - len(line) - 1))
+                rows.append(cells(" " * offset + line, CYAN))
 
             # spacer
-            sys.stdout.write("\n")
+            rows.append([])
 
             # typed line + spinner (read under lock)
             with lock:
                 current = "".join(state["typed"])
                 spinner_ch = state["spinner"]
-
-            line_to_print = f"{ORANGE}{current}{RESET} {CYAN}{spinner_ch}{RESET}"
-            padding = max(0, cols - len(current) - 3)
-            sys.stdout.write(line_to_print + " " * padding + "\n")
+            rows.append(cells(current, ORANGE) + cells(" ") + cells(spinner_ch, CYAN))
 
             # prompt line
-            prompt = "[ENTER] to start"
-            sys.stdout.write(f"\n{prompt}\n")
+            rows.append([])
+            rows.append(cells("[ENTER] to start"))
 
-            # optional tiny FPS debug
-            frame_count += 1
+            # optional FPS / link stats
             if show_fps:
-                now_t = time.perf_counter()
-                if now_t - last_fps_t >= 0.5:
-                    fps = frame_count / (now_t - last_fps_t)
-                    sys.stdout.write(f"FPS: {fps:.1f}\n")
-                    last_fps_t = now_t
-                    frame_count = 0
-                else:
-                    sys.stdout.write("\n")
-
-            sys.stdout.flush()
-            # Respect the desired frame delay (sleep)
-            time.sleep(max(0, wave_delay))
-            frame += 1
+                rows.append(cells(f"FPS: {renderer.fps:.1f}  pace: {renderer.cur_fps:.0f}/s  out: {renderer.throughput / 1024:.0f} KiB/s"))
+
+            renderer.draw(rows)
+            # frame delay adapts to how fast the terminal is absorbing output
+            time.sleep(renderer.frame_delay)
 
     # start threads
     t_type = threading.Thread(target=typewriter_thread_fn, daemon=True)
@@ -179,6 +155,7 @@ def splash_screen(type_text,
     t_type.join(timeout=0.5)
     t_spin.join(timeout=0.5)
     t_render.join(timeout=0.5)
+    renderer.size.close() # hand SIGWINCH back (prompt_toolkit installs its own next)
 
     # final clear of splash (optional)
     sys.stdout.write("\033[2J\033[H")
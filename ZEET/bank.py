@@ -0,0 +1,259 @@
+# bank.py — sqlite question bank; sessions are sampled from it with indexed queries
+import json
+import random
+import sqlite3
+import threading
+from pathlib import Path
+
+from structures import QuestionState, Session
+
+ROOT = Path.cwd()
+BANK_PATH = ROOT / "bank.db"
+PAGE_SIZE = 32 # questions pulled per lazy page in the carousel
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    subject TEXT NOT NULL DEFAULT '',
+    type TEXT NOT NULL,
+    difficulty INTEGER NOT NULL DEFAULT 0,
+    points REAL NOT NULL DEFAULT 1.0,
+    source_slide TEXT,
+    stem TEXT NOT NULL,
+    options TEXT NOT NULL DEFAULT '[]',
+    answer TEXT
+);
+-- every index ends in id so the random probes in sample() stay index-only seeks
+CREATE INDEX IF NOT EXISTS ix_subject ON questions(subject, id);
+CREATE INDEX IF NOT EXISTS ix_subject_type ON questions(subject, type, id);
+CREATE INDEX IF NOT EXISTS ix_type ON questions(type, id);
+CREATE INDEX IF NOT EXISTS ix_difficulty ON questions(difficulty, id);
+CREATE INDEX IF NOT EXISTS ix_points ON questions(points, id);
+CREATE INDEX IF NOT EXISTS ix_source ON questions(source_slide, id);
+"""
+
+INSERT = ("INSERT INTO questions (subject, type, difficulty, points, source_slide, stem, options, answer) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+
+def row_params(r):
+    # a question dict (or QuestionState plus extras) -> INSERT parameters
+    if not isinstance(r, dict):
+        r = dict(r.__dict__)
+    return (
+        r.get("subject", ""), r["type"], int(r.get("difficulty", 0)), float(r.get("points", 1.0)),
+        r.get("source_slide"), r["stem"], json.dumps(r.get("options") or [], ensure_ascii=False),
+        None if r.get("answer") is None else str(r["answer"]),
+    )
+
+class QuestionBank:
+    def __init__(self, path: Path = BANK_PATH):
+        self.path = Path(path)
+        # the session autosave thread may page questions in, hence the shared connection + lock
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.executescript(SCHEMA)
+        self._deduper = None
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    # ---- writing ----
+    def add_many(self, rows, dedup=None):
+        # rows: dicts with QuestionState fields plus optional subject/difficulty/source_slide
+        # dedup: None, "reject" or "merge" near-duplicates of questions already in the bank (see dedup.py)
+        if dedup:
+            return self.deduper().add_many(rows, mode=dedup)
+        with self.lock, self.db:
+            cur = self.db.executemany(INSERT, map(row_params, rows))
+            return cur.rowcount
+
+    def add(self, q, dedup=None, **extra):
+        row = dict(q.__dict__) if not isinstance(q, dict) else dict(q)
+        row.update(extra)
+        return self.add_many([row], dedup=dedup)
+
+    def deduper(self):
+        # the fingerprint index, created on first use (plain banks never pay for it)
+        if self._deduper is None:
+            from dedup import Deduper
+            self._deduper = Deduper(self)
+        return self._deduper
+
+    # ---- reading ----
+    @staticmethod
+    def _where(subject=None, qtype=None, difficulty=None):
+        clauses, args = [], []
+        if subject is not None:
+            clauses.append("subject = ?")
+            args.append(subject)
+        if qtype is not None:
+            clauses.append("type = ?")
+            args.append(qtype)
+        if difficulty is not None:
+            lo, hi = difficulty if isinstance(difficulty, (tuple, list)) else (difficulty, difficulty)
+            clauses.append("difficulty BETWEEN ? AND ?")
+            args += [lo, hi]
+        return clauses, args
+
+    def has(self, subject=None, qtype=None):
+        clauses, args = self._where(subject, qtype)
+        sql = "SELECT 1 FROM questions" + (" WHERE " + " AND ".join(clauses) if clauses else "") + " LIMIT 1"
+        with self.lock:
+            return self.db.execute(sql, args).fetchone() is not None
+
+    def _sample_one_filter(self, n, rng, subject, qtype, difficulty):
+        clauses, args = self._where(subject, qtype, difficulty)
+        where = " AND ".join(clauses) if clauses else "1"
+        # separate first/last seeks: sqlite won't use the index for MIN and MAX in one query
+        with self.lock:
+            lo = self.db.execute(f"SELECT id FROM questions WHERE {where} ORDER BY id LIMIT 1", args).fetchone()
+            hi = self.db.execute(f"SELECT id FROM questions WHERE {where} ORDER BY id DESC LIMIT 1", args).fetchone()
+        if lo is None:
+            return []
+        lo, hi = lo[0], hi[0]
+        probe = f"SELECT id FROM questions WHERE {where} AND id >= ? ORDER BY id LIMIT 1"
+        picked = {}
+        attempts = 0
+        # random seeks into the id index: O(n log N), never touches the other rows.
+        # ids after a gap are slightly favoured, which is fine for exam assembly
+        while len(picked) < n and attempts < n * 8:
+            attempts += 1
+            with self.lock:
+                row = self.db.execute(probe, args + [rng.randint(lo, hi)]).fetchone()
+            if row is not None:
+                picked[row[0]] = None
+        if len(picked) < n:
+            # small pool (or heavy collisions): just take the whole match set (index-only) and shuffle it
+            with self.lock:
+                pool = [r[0] for r in self.db.execute(f"SELECT id FROM questions WHERE {where}", args)]
+            rng.shuffle(pool)
+            for i in pool:
+                if len(picked) >= n:
+                    break
+                picked[i] = None
+        return list(picked)
+
+    def sample(self, n, subject=None, types=None, difficulty=None, seed=None):
+        # -> list of bank ids; `types` spreads n across the listed question types
+        rng = random.Random(seed)
+        if not types:
+            return self._sample_one_filter(n, rng, subject, None, difficulty)
+        ids = []
+        for k, t in enumerate(types):
+            quota = n // len(types) + (1 if k < n % len(types) else 0)
+            ids += self._sample_one_filter(quota, rng, subject, t, difficulty)
+        rng.shuffle(ids)
+        return ids
+
+    def fetch(self, ids):
+        # -> {bank id: row dict} for one page of ids
+        if not ids:
+            return {}
+        marks = ",".join("?" * len(ids))
+        with self.lock:
+            cur = self.db.execute(
+                f"SELECT id, type, stem, options, answer, points FROM questions WHERE id IN ({marks})", list(ids))
+            return {r[0]: {"type": r[1], "stem": r[2], "options": json.loads(r[3]), "answer": r[4], "points": r[5]}
+                    for r in cur}
+
+    def iter_answers(self, types=("short", "essay"), batch=4096):
+        # streams answer keys (for fitting grading idf) without loading the bank; keyset pages like iter_questions
+        marks = ",".join("?" * len(types))
+        sql = (f"SELECT id, answer FROM questions WHERE type IN ({marks}) AND answer IS NOT NULL AND id > ? "
+               f"ORDER BY id LIMIT ?")
+        last = 0
+        while True:
+            with self.lock:
+                rows = self.db.execute(sql, list(types) + [last, batch]).fetchall()
+            if not rows:
+                return
+            for _, a in rows:
+                yield a
+            last = rows[-1][0]
+
+    def iter_questions(self, subject=None, qtype=None, difficulty=None, batch=1024):
+        # streams full rows in id order; keyset pages, so memory stays flat and no cursor is held open
+        clauses, args = self._where(subject, qtype, difficulty)
+        where = " AND ".join(clauses + ["id > ?"])
+        sql = (f"SELECT id, subject, type, difficulty, points, source_slide, stem, options, answer "
+               f"FROM questions WHERE {where} ORDER BY id LIMIT ?")
+        last = 0
+        while True:
+            with self.lock:
+                rows = self.db.execute(sql, args + [last, batch]).fetchall()
+            if not rows:
+                return
+            for r in rows:
+                yield {"id": r[0], "subject": r[1], "type": r[2], "difficulty": r[3], "points": r[4],
+                       "source_slide": r[5], "stem": r[6], "options": json.loads(r[7]), "answer": r[8]}
+            last = rows[-1][0]
+
+    def build_session(self, title, n=50, subject=None, types=None, difficulty=None, seed=None):
+        ids = self.sample(n, subject=subject, types=types, difficulty=difficulty, seed=seed)
+        meta = {"bank": str(self.path), "subject": subject, "bank_ids": ids}
+        return Session(title=title, questions=BankQuestions(self, ids, metadata=meta), metadata=meta)
+
+class BankQuestions:
+    """
+    List-like view over bank ids for a Session. Stems are fetched PAGE_SIZE at a
+    time the first time the carousel (or a save) touches them, then kept, so
+    answers set on them stick. Ids deleted from the bank in the meantime (e.g.
+    by dedup.py --prune) become zero-point placeholders and are listed under
+    metadata["missing_bank_ids"].
+    """
+    def __init__(self, bank: QuestionBank, ids, page_size=PAGE_SIZE, metadata=None):
+        self.bank = bank
+        self.ids = list(ids)
+        self.page_size = page_size
+        self.metadata = metadata if metadata is not None else {}
+        self._pages = {}
+
+    def _read(self, p):
+        chunk = self.ids[p * self.page_size:(p + 1) * self.page_size]
+        rows = self.bank.fetch(chunk)
+        base = p * self.page_size
+        # question numbers are positions in the exam, the bank id lives in metadata
+        out = []
+        for k, bid in enumerate(chunk):
+            row = rows.get(bid)
+            if row is None:
+                missing = self.metadata.setdefault("missing_bank_ids", [])
+                if bid not in missing:
+                    missing.append(bid)
+                row = {"type": "short", "stem": f"[bank question {bid} no longer exists]", "points": 0}
+            out.append(QuestionState(id=base + k + 1, **row))
+        return out
+
+    def _page(self, p):
+        page = self._pages.get(p)
+        if page is None:
+            page = self._pages[p] = self._read(p)
+        return page
+
+    def snapshot(self):
+        # -> every question for a snapshot; loaded pages as they are (with answers), the rest read
+        #    from the bank without being kept, so saving doesn't page the whole exam in
+        out = []
+        for p in range((len(self.ids) + self.page_size - 1) // self.page_size):
+            out += self._pages.get(p) or self._read(p)
+        return out
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self.ids)
+        if not 0 <= i < len(self.ids):
+            raise IndexError("question index out of range")
+        return self._page(i // self.page_size)[i % self.page_size]
+
+    def __iter__(self):
+        for i in range(len(self.ids)):
+            yield self[i]
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+ZEET benchmark suite — extraction, grading, persistence and rendering
+
+Every case builds its own synthetic input (multi-hundred-page PDF/PPTX/DOCX,
+sessions of 10k-100k questions, large response sets), runs at least five
+timed repeats (and at least two seconds' worth) and one extra traced run
+for peak memory; throughput is taken from the median repeat. Results go to a JSON
+baseline; later runs are compared against it and regressions fail the run.
+
+Usage:
+  python bench.py --save                  # record bench_baseline.json
+  python bench.py                         # compare against it
+  python bench.py --quick --only grade,session
+  python bench.py --tolerance 0.25 --baseline other.json
+"""
+
+import gc
+import sys
+import json
+import time
+import statistics
+import random
+import platform
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path.cwd()
+BASELINE = ROOT / "bench_baseline.json"
+TOLERANCE = 0.15 # throughput may drop / p95 may rise this much before it counts as a regression
+MEM_TOLERANCE = 0.25
+MIN_SECONDS = 2.0 # short cases repeat until they've run this long (the median evens out timer and scheduler noise)
+MAX_REPEATS = 100
+P95_FLOOR_MS = 0.05 # p95 below this is timer jitter, not worth comparing
+
+WORDS = ("packet frame segment router switch vlan subnet gateway handshake latency throughput "
+         "bandwidth protocol layer cable signal address port socket session transport network").split()
+
+SIZES = {
+    # name: (full, quick)
+    "pdf_pages": (300, 40),
+    "pptx_slides": (300, 40),
+    "docx_pages": (300, 40),
+    "session_small": (10_000, 2_000),
+    "session_large": (100_000, 10_000),
+    "responses": (100_000, 10_000),
+    "ops": (5_000, 1_000), # per-call latency cases
+}
+
+def _sentence(rng, n=12):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+# ---- synthetic documents ----
+def write_pdf(path: Path, pages, lines=40, seed=0):
+    # minimal text-only PDF by hand (Helvetica, one content stream per page); no generator library needed
+    rng = random.Random(seed)
+    objs = {1: b"<< /Type /Catalog /Pages 2 0 R >>", 3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids = []
+    for p in range(pages):
+        page_id, content_id = 4 + 2 * p, 5 + 2 * p
+        kids.append(f"{page_id} 0 R")
+        text = "".join(f"({_sentence(rng)}) Tj T*\n" for _ in range(lines))
+        stream = f"BT /F1 10 Tf 12 TL 40 800 Td\n(Page {p + 1}) Tj T*\n{text}ET".encode("latin-1")
+        objs[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                         f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>").encode()
+        objs[content_id] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+    objs[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>".encode()
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for i in sorted(objs):
+        offsets[i] = len(out)
+        out += b"%d 0 obj\n" % i + objs[i] + b"\nendobj\n"
+    xref = len(out)
+    n = max(objs) + 1
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % n
+    out += b"".join(b"%010d 00000 n \n" % offsets[i] for i in range(1, n))
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (n, xref)
+    path.write_bytes(bytes(out))
+    return path
+
+def write_pptx(path: Path, slides, seed=0):
+    from pptx import Presentation
+    from pptx.util import Inches
+    rng = random.Random(seed)
+    prs = Presentation()
+    layout = prs.slide_layouts[1]
+    for i in range(slides):
+        s = prs.slides.add_slide(layout)
+        s.shapes.title.text = f"Slide {i + 1}: {rng.choice(WORDS)}"
+        s.placeholders[1].text = "\n".join(_sentence(rng) for _ in range(6))
+        s.shapes.add_textbox(Inches(1), Inches(6), Inches(6), Inches(1)).text = _sentence(rng, 6)
+    prs.save(str(path))
+    return path
+
+def write_docx(path: Path, pages, paras_per_page=10, seed=0):
+    import docx
+    rng = random.Random(seed)
+    d = docx.Document()
+    for p in range(pages):
+        d.add_heading(f"Section {p + 1}", level=2)
+        for _ in range(paras_per_page):
+            d.add_paragraph(" ".join(_sentence(rng) for _ in range(3)))
+    d.save(str(path))
+    return path
+
+# ---- synthetic questions ----
+def make_questions(n, seed=0, answered=0.7):
+    from structures import QuestionState
+    rng = random.Random(seed)
+    keys = [" ".join(rng.choice(WORDS) for _ in range(8)) for _ in range(50)]
+    qs = []
+    for i in range(n):
+        t = ("mcq", "short", "essay")[i % 3]
+        if t == "mcq":
+            q = QuestionState(i + 1, t, _sentence(rng), [_sentence(rng, 3) for _ in range(4)], answer=str(rng.randrange(4)), points=1)
+            q.user_response = str(rng.randrange(4)) if rng.random() < answered else None
+        else:
+            key = rng.choice(keys)
+            q = QuestionState(i + 1, t, _sentence(rng), [], answer=key, points=4 if t == "short" else 10)
+            if rng.random() < answered:
+                q.user_response = " ".join(rng.choice(WORDS) for _ in range(20 if t == "short" else 150))
+        qs.append(q)
+    return qs
+
+# ---- cases ----
+CASES = []
+
+class Case:
+    # setup(tmp, quick) -> state; run(state, lat) -> items handled, appending per-op seconds to lat if it times ops itself
+    def __init__(self, name, group, setup, run, repeats=5):
+        self.name, self.group, self.setup, self.run, self.repeats = name, group, setup, run, repeats
+
+def case(name, group, repeats=5):
+    def deco(fn):
+        setup, run = fn()
+        CASES.append(Case(name, group, setup, run, repeats))
+        return fn
+    return deco
+
+def _size(key, quick):
+    full, small = SIZES[key]
+    return small if quick else full
+
+@case("extract_pdf", "extract")
+def _():
+    def setup(tmp, quick):
+        return write_pdf(tmp / "bench.pdf", _size("pdf_pages", quick))
+    def run(path, lat):
+        from extractor import extract_pdf
+        return len(extract_pdf(path))
+    return setup, run
+
+@case("extract_pdf_parallel", "extract")
+def _():
+    def setup(tmp, quick):
+        return write_pdf(tmp / "bench_par.pdf", _size("pdf_pages", quick))
+    def run(path, lat):
+        from extractor import extract_pdf
+        return len(extract_pdf(path, workers=4))
+    return setup, run
+
+@case("extract_pptx", "extract")
+def _():
+    def setup(tmp, quick):
+        return write_pptx(tmp / "bench.pptx", _size("pptx_slides", quick))
+    def run(path, lat):
+        from extractor import extract_pptx
+        return len(extract_pptx(path))
+    return setup, run
+
+@case("extract_docx", "extract")
+def _():
+    def setup(tmp, quick):
+        return write_docx(tmp / "bench.docx", _size("docx_pages", quick))
+    def run(path, lat):
+        from extractor import extract_docx
+        return len(extract_docx(path))
+    return setup, run
+
+@case("auto_grade", "grade")
+def _():
+    def setup(tmp, quick):
+        return make_questions(_size("ops", quick), seed=1)
+    def run(qs, lat):
+        from grading import auto_grade
+        clock = time.perf_counter
+        for q in qs:
+            t0 = clock()
+            auto_grade(q)
+            lat.append(clock() - t0)
+        return len(qs)
+    return setup, run
+
+@case("grade_many", "grade")
+def _():
+    def setup(tmp, quick):
+        return make_questions(_size("responses", quick), seed=2, answered=1.0)
+    def run(qs, lat):
+        from grading import grade_many
+        return len(grade_many(qs))
+    return setup, run
+
+def _session_cases(size_key, label):
+    @case(f"session_save_{label}", "session")
+    def _():
+        def setup(tmp, quick):
+            from structures import Session
+            return tmp, Session(f"bench save {label}", make_questions(_size(size_key, quick), seed=3))
+        def run(state, lat):
+            tmp, sess = state
+            sess.save(tmp)
+            return len(sess.questions)
+        return setup, run
+
+    @case(f"session_load_{label}", "session")
+    def _():
+        def setup(tmp, quick):
+            from structures import Session
+            sess = Session(f"bench load {label}", make_questions(_size(size_key, quick), seed=4))
+            return sess.save(tmp)
+        def run(path, lat):
+            from structures import Session
+            return len(Session.load(path).questions)
+        return setup, run
+
+_session_cases("session_small", "10k")
+_session_cases("session_large", "100k")
+
+@case("session_record", "session")
+def _():
+    def setup(tmp, quick):
+        from structures import Session
+        sess = Session("bench record", make_questions(_size("session_small", quick), seed=5))
+        sess.attach(tmp, delay=3600) # no compaction during the timed loop
+        return sess
+    def run(sess, lat):
+        clock = time.perf_counter
+        n = min(500, len(sess.questions))
+        for i in range(n):
+            t0 = clock()
+            sess.record(i, user_response="1")
+            lat.append(clock() - t0)
+        return n
+    return setup, run
+
+@case("render_question_text", "render")
+def _():
+    def setup(tmp, quick):
+        return make_questions(_size("ops", quick), seed=6)
+    def run(qs, lat):
+        from render import render_question_text
+        clock = time.perf_counter
+        for q in qs:
+            t0 = clock()
+            render_question_text(q)
+            lat.append(clock() - t0)
+        return len(qs)
+    return setup, run
+
+# ---- harness ----
+def _pct(samples, p):
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(p * len(s)))] if s else 0.0
+
+def measure(c, tmp, quick):
+    state = c.setup(tmp, quick)
+    times, lat, items = [], [], 0
+    while len(times) < c.repeats or (sum(times) < MIN_SECONDS and len(times) < MAX_REPEATS):
+        gc.collect()
+        op_lat = []
+        t0 = time.perf_counter()
+        items = c.run(state, op_lat)
+        times.append(time.perf_counter() - t0)
+        lat += op_lat
+    samples = lat or [t / max(items, 1) for t in times] # per-item latency either way
+    gc.collect()
+    tracemalloc.start()
+    c.run(state, [])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    mid = statistics.median(times)
+    return {"group": c.group, "items": items, "seconds": round(mid, 6),
+            "throughput": round(items / mid, 2) if mid > 0 else 0.0,
+            "p50_ms": round(_pct(samples, 0.50) * 1000, 4), "p95_ms": round(_pct(samples, 0.95) * 1000, 4),
+            "p99_ms": round(_pct(samples, 0.99) * 1000, 4), "peak_kb": peak // 1024}
+
+def compare(new, old, tol=TOLERANCE, mem_tol=MEM_TOLERANCE):
+    # -> list of (case, what, old, new) that got worse than the tolerances allow
+    worse = []
+    for name, r in new.items():
+        b = old.get(name)
+        if not b or "error" in r or "error" in b or b.get("items") != r.get("items"):
+            continue # new case, skipped case, or a different input size (--quick vs full)
+        if b["throughput"] and r["throughput"] < b["throughput"] * (1 - tol):
+            worse.append((name, "throughput/s", b["throughput"], r["throughput"]))
+        if b["p95_ms"] >= P95_FLOOR_MS and r["p95_ms"] > b["p95_ms"] * (1 + tol):
+            worse.append((name, "p95 ms", b["p95_ms"], r["p95_ms"]))
+        if b["peak_kb"] and r["peak_kb"] > b["peak_kb"] * (1 + mem_tol):
+            worse.append((name, "peak KB", b["peak_kb"], r["peak_kb"]))
+    return worse
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run the ZEET benchmark suite.")
+    ap.add_argument("--quick", action="store_true", help="smaller inputs (~10x), for a fast local check")
+    ap.add_argument("--only", default="", help="comma-separated case names or groups (extract, grade, session, render)")
+    ap.add_argument("--baseline", default=str(BASELINE))
+    ap.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    ap.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = ap.parse_args(argv)
+
+    only = {s.strip() for s in args.only.split(",") if s.strip()}
+    cases = [c for c in CASES if not only or c.name in only or c.group in only]
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="zeet-bench-") as tmp:
+        for c in cases:
+            sub = Path(tmp) / c.name
+            sub.mkdir()
+            try:
+                r = measure(c, sub, args.quick)
+            except ImportError as e:
+                results[c.name] = {"group": c.group, "error": f"skipped ({e.name or e} not installed)"}
+                print(f"{c.name:24} skipped: {e.name or e} not installed")
+                continue
+            results[c.name] = r
+            print(f"{c.name:24} {r['items']:>8} items  {r['throughput']:>12,.1f}/s  "
+                  f"p50 {r['p50_ms']:.3f}ms  p95 {r['p95_ms']:.3f}ms  p99 {r['p99_ms']:.3f}ms  peak {r['peak_kb']:,} KB")
+
+    baseline = Path(args.baseline)
+    if args.save:
+        doc = {"meta": {"python": platform.python_version(), "platform": platform.platform(),
+                        "quick": args.quick, "date": time.strftime("%Y-%m-%d %H:%M:%S")}, "cases": results}
+        if baseline.exists():
+            # --only runs update their cases and keep the rest
+            old = json.loads(baseline.read_text(encoding="utf-8"))
+            doc["cases"] = dict(old.get("cases", {}), **results)
+        baseline.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+        print(f"baseline written: {baseline}")
+        return 0
+    if not baseline.exists():
+        print(f"no baseline at {baseline}; run with --save to record one")
+        return 0
+    old = json.loads(baseline.read_text(encoding="utf-8")).get("cases", {})
+    worse = compare(results, old, tol=args.tolerance)
+    for name, what, b, r in worse:
+        print(f"REGRESSION {name}: {what} {b} -> {r}")
+    if worse:
+        return 1
+    print(f"OK: no regressions beyond {args.tolerance:.0%} against {baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
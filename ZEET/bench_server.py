@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Exam hall load test — hundreds of scripted candidates against server.py
+
+Starts server.py on a synthetic bank in a temp dir, then connects --clients
+telnet clients spread over --ramp-s seconds. Each signs in, answers every question (::<n>, then
+the answer) and quits, timing command -> first repaint byte.
+Afterwards every candidate's saved session is checked for all its answers.
+
+Usage:
+  python bench_server.py                        # 200 clients x 3 questions, ~15s between commands
+  python bench_server.py --clients 500 --questions 20 --think-ms 2000 --ramp-s 30
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+from bank import QuestionBank
+from bench import make_questions
+
+HERE = Path(__file__).resolve().parent
+TITLE = "loadtest"
+
+IAC, SB, SE = 255, 250, 240
+TTYPE, NAWS = 24, 31
+# answer the server's terminal-type request up front (the session starts once it has one) and send a size
+HELLO = bytes([IAC, SB, TTYPE, 0]) + b"xterm" + bytes([IAC, SE, IAC, SB, NAWS, 0, 80, 0, 24, IAC, SE])
+
+class Client:
+    def __init__(self, n, port, questions, think, timeout, delay=0.0):
+        self.name = f"cand{n:04d}"
+        self.delay = delay
+        self.port = port
+        self.questions = questions
+        self.think = think
+        self.timeout = timeout
+        self.latencies = []
+        self.received = 0
+        self._data = asyncio.Event()
+        self._seen = bytearray()
+        self.error = None
+
+    async def _read(self, reader):
+        while True:
+            chunk = await reader.read(65536)
+            if not chunk:
+                self._data.set()
+                return
+            self.received += len(chunk)
+            if len(self._seen) < 16384: # only the sign-in screen is searched
+                self._seen += chunk
+            self._data.set()
+
+    async def _wait_for(self, needle):
+        while needle not in self._seen:
+            self._data.clear()
+            await asyncio.wait_for(self._data.wait(), self.timeout)
+
+    async def send(self, writer, text):
+        # -> seconds until the server starts repainting
+        self._data.clear()
+        t0 = time.perf_counter()
+        writer.write(text.encode())
+        await writer.drain()
+        await asyncio.wait_for(self._data.wait(), self.timeout)
+        self.latencies.append(time.perf_counter() - t0)
+        if self.think:
+            await asyncio.sleep(random.uniform(0, 2 * self.think))
+
+    async def run(self):
+        await asyncio.sleep(self.delay)
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        except OSError as e:
+            self.error = f"connect: {e}"
+            return self
+        pump = asyncio.create_task(self._read(reader))
+        try:
+            writer.write(HELLO)
+            await self._wait_for(b"Candidate")
+            await self.send(writer, self.name + "\r")
+            await self.send(writer, "\r") # focus the command box
+            for i in range(1, self.questions + 1):
+                await self.send(writer, f"::{i}\r")
+                await self.send(writer, f"answer {i} from {self.name}\r")
+            writer.write(b"::quit\r")
+            await writer.drain()
+            await asyncio.wait_for(pump, self.timeout) # server closes the connection once it has saved
+        except (asyncio.TimeoutError, OSError) as e:
+            self.error = f"{type(e).__name__} after {len(self.latencies)} commands"
+        finally:
+            pump.cancel()
+            writer.close()
+        return self
+
+def _pct(s, p):
+    return s[min(len(s) - 1, int(p * len(s)))] * 1000 if s else 0.0
+
+def _cpu_seconds(pid):
+    # user + system time of the server process
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _peak_rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def verify(sessions_dir: Path, clients, questions):
+    # every finished candidate's snapshot must hold all of their answers
+    from structures import Session
+    bad = 0
+    for c in clients:
+        if c.error:
+            continue
+        try:
+            sess = Session.load(sessions_dir / f"{TITLE}_{c.name}.json")
+            ok = sum(1 for q in sess.questions if q.user_response == f"answer {q.id} from {c.name}") == questions
+        except Exception:
+            ok = False
+        bad += not ok
+    return bad
+
+async def _run_clients(args, port):
+    clients = [Client(n, port, args.questions, args.think_ms / 1000, args.timeout, delay=args.ramp_s * n / args.clients)
+               for n in range(args.clients)]
+    return await asyncio.gather(*(c.run() for c in clients))
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Load-test the exam hall server with scripted telnet clients.")
+    ap.add_argument("--clients", type=int, default=200)
+    ap.add_argument("--questions", type=int, default=3, help="questions per candidate (all get answered)")
+    ap.add_argument("--bank-size", type=int, default=5000)
+    ap.add_argument("--think-ms", type=float, default=15000.0, help="mean pause between commands (an exam pace, not a typing race)")
+    ap.add_argument("--ramp-s", type=float, default=30.0, help="spread the sign-ins over this many seconds")
+    ap.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for any one response")
+    ap.add_argument("--port", type=int, default=0, help="default: a free port")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="zeet-hall-") as tmp:
+        tmp = Path(tmp)
+        bank = QuestionBank(tmp / "bank.db")
+        bank.add_many(dict(q.__dict__, subject=TITLE) for q in make_questions(args.bank_size, answered=0))
+        bank.close()
+
+        port = args.port
+        if not port:
+            import socket
+            with socket.socket() as s:
+                s.bind(("127.0.0.1", 0))
+                port = s.getsockname()[1]
+        server = subprocess.Popen([sys.executable, str(HERE / "server.py"), "--bank", str(tmp / "bank.db"),
+                                   "--subject", TITLE, "--questions", str(args.questions),
+                                   "--sessions", str(tmp / "sessions"), "--port", str(port)],
+                                  cwd=tmp, stderr=subprocess.PIPE, text=True)
+        try:
+            line = server.stderr.readline() # "exam hall ...: telnet host:port" once it's listening
+            if "telnet" not in line:
+                print(f"server failed to start: {line}{server.stderr.read()}", file=sys.stderr)
+                return 2
+            t0 = time.perf_counter()
+            clients = asyncio.run(_run_clients(args, port))
+            wall = time.perf_counter() - t0
+            peak = _peak_rss_mb(server.pid)
+            cpu = _cpu_seconds(server.pid)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+        failed = [c for c in clients if c.error]
+        lat = sorted(x for c in clients for x in c.latencies)
+        bad = verify(tmp / "sessions", clients, args.questions)
+
+    print(f"{len(clients) - len(failed)}/{len(clients)} candidates finished in {wall:.1f}s, "
+          f"{len(lat) / wall:.1f} commands/s")
+    print(f"command -> repaint  p50 {_pct(lat, 0.50):.1f}ms  p95 {_pct(lat, 0.95):.1f}ms  "
+          f"p99 {_pct(lat, 0.99):.1f}ms  max {_pct(lat, 1.0):.1f}ms")
+    if peak is not None:
+        print(f"server peak RSS {peak:.0f}MB ({peak / max(1, len(clients)):.2f}MB per candidate)")
+    if cpu is not None and lat:
+        print(f"server CPU {cpu:.1f}s ({100 * cpu / wall:.0f}% of one core, {1000 * cpu / len(lat):.1f}ms per command)")
+    for c in failed[:5]:
+        print(f"  {c.name}: {c.error}")
+    print(f"sessions verified: {len(clients) - len(failed) - bad} ok, {bad} missing answers")
+    return 1 if failed or bad else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
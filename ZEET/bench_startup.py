@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark — fails if ZEET's cold start goes over budget
+
+Runs `zeet.py --headless` (all init work, no UI) several times in fresh
+interpreters. The first run is the cold start; the rest give a warm median.
+
+Usage:
+  python bench_startup.py                 # default budget
+  python bench_startup.py --budget-ms 600 --runs 7
+"""
+
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_BUDGET_MS = 800.0 # cold start, wall clock, including interpreter startup
+
+def run_once():
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, "zeet.py", "--headless"], cwd=HERE,
+                         capture_output=True, text=True, check=True).stdout
+    wall = (time.perf_counter() - t0) * 1000
+    internal = None
+    for line in out.splitlines():
+        if line.startswith("startup_ms="):
+            internal = float(line.split("=", 1)[1])
+    return wall, internal
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Check ZEET cold start against a time budget.")
+    ap.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    ap.add_argument("--runs", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    results = [run_once() for _ in range(max(1, args.runs))]
+    cold_wall, cold_internal = results[0]
+    warm = [w for w, _ in results[1:]] or [cold_wall]
+    print(f"cold start: {cold_wall:.0f} ms wall ({cold_internal or 0:.0f} ms after interpreter start)")
+    print(f"warm median: {statistics.median(warm):.0f} ms  max: {max(warm):.0f} ms  (runs={len(results)})")
+    if cold_wall > args.budget_ms:
+        print(f"FAIL: cold start {cold_wall:.0f} ms > budget {args.budget_ms:.0f} ms")
+        return 1
+    print(f"OK: within {args.budget_ms:.0f} ms budget")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
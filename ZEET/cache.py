@@ -0,0 +1,176 @@
+# cache.py — content-addressed on-disk cache for extractor block lists
+import os
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+
+# directories (same cwd convention as sessions/ in zeet.py)
+ROOT = Path.cwd()
+CACHE_DIR = ROOT / "cache" / "extract"
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024 # 512MB of cached blocks before eviction kicks in
+HASH_CHUNK = 1 << 20
+
+def _atomic_write(path: Path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class ExtractionCache:
+    """
+    Block lists keyed by sha256(file content) + extractor version + extractor name.
+    A small stat index (path, size, mtime) -> content hash means unchanged files
+    aren't re-read just to find their key. Entries are evicted least-recently-used
+    once the cache passes max_bytes.
+    """
+    def __init__(self, root: Path = CACHE_DIR, version: str = "0", max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.version = str(version)
+        self.max_bytes = max_bytes
+        self.index_path = self.root / "index.json"
+        self._index = None
+        self._index_dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    # ---- stat index (path -> content digest) ----
+    def _load_index(self):
+        if self._index is None:
+            try:
+                self._index = json.loads(self.index_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _flush_index(self):
+        if self._index_dirty:
+            _atomic_write(self.index_path, json.dumps(self._index))
+            self._index_dirty = False
+
+    def digest(self, path: Path) -> str:
+        path = Path(path)
+        st = path.stat()
+        idx = self._load_index()
+        rec = idx.get(str(path.resolve()))
+        if rec and rec[0] == st.st_size and rec[1] == st.st_mtime_ns:
+            return rec[2]
+        # file is new or changed since we last hashed it — stale memo, rehash
+        d = file_digest(path)
+        idx[str(path.resolve())] = [st.st_size, st.st_mtime_ns, d]
+        self._index_dirty = True
+        return d
+
+    # ---- entries ----
+    def key(self, path: Path, kind: str) -> str:
+        h = hashlib.sha256(f"{self.digest(path)}:{kind}:{self.version}".encode())
+        return h.hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, path: Path, kind: str):
+        fn = self._entry(self.key(path, kind))
+        try:
+            data = json.loads(fn.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if data.get("version") != self.version:
+            # written by an older extractor; never valid again
+            fn.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        os.utime(fn) # bump mtime so LRU eviction sees the hit
+        self.hits += 1
+        return data["blocks"]
+
+    def put(self, path: Path, kind: str, blocks):
+        fn = self._entry(self.key(path, kind))
+        data = {"version": self.version, "kind": kind, "source": str(path), "blocks": blocks}
+        _atomic_write(fn, json.dumps(data, ensure_ascii=False))
+        self._flush_index()
+        self.evict()
+
+    def get_or_extract(self, path: Path, kind: str, fn):
+        blocks = self.get(path, kind)
+        if blocks is None:
+            blocks = fn(path)
+            self.put(path, kind, blocks)
+        else:
+            self._flush_index()
+        return blocks
+
+    # ---- housekeeping ----
+    def _entries(self):
+        if not self.root.exists():
+            return []
+        out = []
+        for sub in self.root.iterdir():
+            if not sub.is_dir():
+                continue
+            for e in os.scandir(sub):
+                if e.name.endswith(".json"):
+                    st = e.stat()
+                    out.append((st.st_mtime, st.st_size, Path(e.path)))
+        return out
+
+    def size(self) -> int:
+        return sum(sz for _, sz, _ in self._entries())
+
+    def evict(self, max_bytes=None):
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self._entries()
+        total = sum(sz for _, sz, _ in entries)
+        if total <= limit:
+            return 0
+        removed = 0
+        for _, sz, fn in sorted(entries): # oldest mtime first
+            if total <= limit:
+                break
+            fn.unlink(missing_ok=True)
+            total -= sz
+            removed += 1
+        return removed
+
+    def prune_stale(self):
+        # drop entries from other extractor versions and memo rows for files that are gone
+        removed = 0
+        for _, _, fn in self._entries():
+            try:
+                with open(fn, encoding="utf-8") as f:
+                    version = json.load(f).get("version")
+            except (OSError, ValueError):
+                version = None
+            if version != self.version:
+                fn.unlink(missing_ok=True)
+                removed += 1
+        idx = self._load_index()
+        for p in [p for p in idx if not os.path.exists(p)]:
+            del idx[p]
+            self._index_dirty = True
+        self._flush_index()
+        return removed
+
+    def clear(self):
+        for _, _, fn in self._entries():
+            fn.unlink(missing_ok=True)
+        self.index_path.unlink(missing_ok=True)
+        self._index = {}
+        self._index_dirty = False
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+ZEET bank dedup — near-duplicate questions, at insert time and over the whole bank
+
+Generated banks repeat themselves: the same stem reworded slightly, the same
+four options shuffled. Every question's stem is MinHashed (group.py's
+hasher over normalised words) and its options reduced to a set of option
+hashes. LSH band keys go into an indexed table in bank.db, so looking up
+a new question is a handful of index seeks whatever the size of the bank.
+
+Two questions are duplicates when they share subject and type, their stems
+agree on at least STEM_THRESHOLD of the minhashes and, if both have options,
+at least OPTION_THRESHOLD of the option sets overlap. The lower id is kept.
+
+Usage:
+  python dedup.py                          # report duplicate groups in bank.db
+  python dedup.py bank.db --prune          # delete duplicates, keep the first of each group
+  python dedup.py bank.db --merge          # ... after copying answers/sources the kept one lacks
+  python gen.py chunks/*.json --bank bank.db --dedup reject
+"""
+
+import sys
+import json
+import time
+import zlib
+import hashlib
+import argparse
+from array import array
+from functools import lru_cache
+from itertools import groupby, repeat
+from pathlib import Path
+from collections import Counter
+
+import perf
+from bank import INSERT, QuestionBank, row_params
+from group import DisjointSet, MinHasher, np, similarity
+from grading import normalize
+
+ROOT = Path.cwd()
+BANK_PATH = ROOT / "bank.db"
+
+BANDS = 16
+ROWS = 4 # candidates from jaccard ~ (1/BANDS) ** (1/ROWS) ≈ 0.5; a 0.8 pair is missed by all bands 1 in 5000
+STEM_THRESHOLD = 0.8 # one word swapped in a ten word stem; "OSPF" vs "EIGRP" in the same sentence is ~0.6
+OPTION_THRESHOLD = 0.5 # three of four options shared
+MAX_CANDIDATES = 256 # per band at insert time; a generic stem ("Which of the following...") has huge buckets
+MIN_BANDS = 2 # bands a candidate must share to be verified at insert time; a 0.8 pair shares ~6.5, 1 in 400 shares < 2
+MAX_BUCKET = 64 # members compared at once in the full pass (overlapping windows beyond that)
+SEED = 7 # changing SEED / BANDS / ROWS means rebuilding the fingerprints (--rebuild)
+INDEX_BATCH = 32768 # questions fingerprinted per transaction; big batches touch each band b-tree page fewer times
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    id INTEGER PRIMARY KEY, -- questions.id
+    scope INTEGER NOT NULL, -- hash of (subject, type): only questions in the same scope can be duplicates
+    stem BLOB NOT NULL, -- BANDS * ROWS uint32 minhashes; empty for a stem with no words (indexed, never matched)
+    options BLOB NOT NULL -- sorted uint32 hashes of the normalised options
+);
+CREATE TABLE IF NOT EXISTS fingerprint_bands (
+    band INTEGER NOT NULL,
+    key INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    PRIMARY KEY (band, key, id)
+) WITHOUT ROWID;
+-- a question deleted any other way than prune() takes its fingerprint with it; its band rows
+-- are left behind, and lookups skip ids without a fingerprint
+CREATE TRIGGER IF NOT EXISTS fingerprints_gc AFTER DELETE ON questions BEGIN
+    DELETE FROM fingerprints WHERE id = old.id;
+END;
+"""
+
+_MASK64 = (1 << 64) - 1
+_FNV = 0x100000001B3
+_MIX = 0xD6E8FEB86659FD93
+
+@lru_cache(maxsize=1024)
+def scope(subject, qtype) -> int:
+    # signed 64-bit, so it fits an sqlite INTEGER
+    digest = hashlib.blake2b(f"{subject or ''}\0{qtype}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+def option_set(options) -> array:
+    # one hash per option, order-free; an option that is all stopwords ("All of the above") hashes as written
+    out = set()
+    for o in options or ():
+        words = normalize(o)
+        text = " ".join(words) if words else str(o).strip().lower()
+        if text:
+            out.add(zlib.crc32(text.encode("utf-8")))
+    return array("I", sorted(out))
+
+def option_similarity(a, b) -> float:
+    # exact jaccard; a question without options doesn't constrain the match
+    if not a or not b:
+        return 1.0
+    sa, sb = set(a), set(b)
+    return len(sa & sb) / len(sa | sb)
+
+def band_keys(scope_id, sig: bytes, rows=ROWS):
+    # -> one signed 64-bit key per band: the band's minhashes FNV-folded onto the scope, so
+    #    other subjects/types never share a bucket. band_keys_many is the same sum for a whole batch
+    v = array("I")
+    v.frombytes(sig)
+    keys = []
+    for b in range(0, len(v), rows):
+        h = scope_id & _MASK64
+        for x in v[b:b + rows]:
+            h = ((h ^ x) * _FNV) & _MASK64
+        h ^= h >> 32
+        h = (h * _MIX) & _MASK64
+        h ^= h >> 32
+        keys.append(h - (1 << 64) if h >> 63 else h)
+    return keys
+
+def band_keys_many(scopes, sigs, rows=ROWS):
+    # scopes: int64 (n,), sigs: uint32 (n, BANDS * ROWS) -> int64 (n, BANDS)
+    v = sigs.reshape(len(sigs), -1, rows).astype(np.uint64)
+    h = np.repeat(scopes.view(np.uint64)[:, None], v.shape[1], axis=1)
+    with np.errstate(over="ignore"): # wraparound is the mod 2**64
+        for r in range(rows):
+            h = (h ^ v[:, :, r]) * np.uint64(_FNV)
+        h ^= h >> np.uint64(32)
+        h *= np.uint64(_MIX)
+        h ^= h >> np.uint64(32)
+    return h.view(np.int64)
+
+class Fingerprint:
+    __slots__ = ("scope", "stem", "options")
+
+    def __init__(self, scope_id, stem: bytes, options: bytes):
+        self.scope = scope_id
+        self.stem = stem
+        self.options = options
+
+    def matches(self, other, stem_threshold=STEM_THRESHOLD, option_threshold=OPTION_THRESHOLD):
+        if self.scope != other.scope:
+            return False # a band key collision across scopes
+        if similarity(array("I", self.stem), array("I", other.stem)) < stem_threshold:
+            return False
+        return option_similarity(array("I", self.options), array("I", other.options)) >= option_threshold
+
+def _pack(sig) -> bytes:
+    return sig.tobytes() if hasattr(sig, "tobytes") else array("I", sig).tobytes()
+
+_EMPTY = _pack([0xFFFFFFFF] * (BANDS * ROWS)) # MinHasher's signature for a stem with no words
+
+class Deduper:
+    """
+    Fingerprint index living next to the questions in bank.db. Questions added
+    without it (plain add_many, older banks) are fingerprinted on first use.
+    """
+    def __init__(self, bank: QuestionBank, stem_threshold=STEM_THRESHOLD, option_threshold=OPTION_THRESHOLD):
+        self.bank = bank
+        self.db = bank.db
+        self.hasher = MinHasher(BANDS * ROWS, seed=SEED)
+        self.stem_threshold = stem_threshold
+        self.option_threshold = option_threshold
+        self.stats = Counter() # added / rejected / merged
+        with bank.lock:
+            self.db.executescript(SCHEMA)
+        self.index_missing(tail_only=True)
+
+    # ---- fingerprints ----
+    def fingerprints(self, rows):
+        # -> [Fingerprint or None], stems hashed in one batch; an empty stem is never a duplicate
+        sigs = self.hasher.signatures([r["stem"] for r in rows])
+        out = []
+        for r, sig in zip(rows, sigs):
+            stem = _pack(sig)
+            if stem == _EMPTY:
+                out.append(None)
+                continue
+            out.append(Fingerprint(scope(r.get("subject", ""), r["type"]), stem, option_set(r.get("options")).tobytes()))
+        return out
+
+    def _store(self, items):
+        # items: [(question id, Fingerprint or None)]; band rows go in key order, which keeps the b-tree inserts local.
+        # None (empty stem) stores a marker row without bands, so index_missing doesn't pick the question up again
+        self.db.executemany("INSERT OR REPLACE INTO fingerprints (id, scope, stem, options) VALUES (?, 0, x'', x'')",
+                            [(qid,) for qid, fp in items if fp is None])
+        items = [(qid, fp) for qid, fp in items if fp is not None]
+        self.db.executemany("INSERT OR REPLACE INTO fingerprints (id, scope, stem, options) VALUES (?, ?, ?, ?)",
+                            [(qid, fp.scope, fp.stem, fp.options) for qid, fp in items])
+        sql = "INSERT OR IGNORE INTO fingerprint_bands (band, key, id) VALUES (?, ?, ?)"
+        if np is None or len(items) < 64:
+            self.db.executemany(sql, sorted((b, k, qid) for qid, fp in items
+                                            for b, k in enumerate(band_keys(fp.scope, fp.stem))))
+            return
+        n = len(items)
+        ids = np.fromiter((qid for qid, _ in items), dtype=np.int64, count=n)
+        scopes = np.fromiter((fp.scope for _, fp in items), dtype=np.int64, count=n)
+        sigs = np.frombuffer(b"".join(fp.stem for _, fp in items), dtype=np.uint32).reshape(n, -1)
+        keys = band_keys_many(scopes, sigs)
+        for b in range(keys.shape[1]):
+            order = np.argsort(keys[:, b], kind="stable")
+            self.db.executemany(sql, zip(repeat(b), keys[order, b].tolist(), ids[order].tolist()))
+
+    def _forget(self, ids):
+        # drop fingerprints (and their band rows, found again from the stored signature) for deleted questions
+        for s in range(0, len(ids), 500):
+            part = ids[s:s + 500]
+            marks = ",".join("?" * len(part))
+            rows = self.db.execute(f"SELECT id, scope, stem FROM fingerprints WHERE id IN ({marks})", part).fetchall()
+            self.db.executemany("DELETE FROM fingerprint_bands WHERE band = ? AND key = ? AND id = ?",
+                                [(b, k, qid) for qid, sc, stem in rows for b, k in enumerate(band_keys(sc, stem))])
+            self.db.execute(f"DELETE FROM fingerprints WHERE id IN ({marks})", part)
+
+    def _load(self, ids):
+        # -> {id: Fingerprint}
+        out = {}
+        for s in range(0, len(ids), 500):
+            part = ids[s:s + 500]
+            marks = ",".join("?" * len(part))
+            for qid, sc, stem, opts in self.db.execute(
+                    f"SELECT f.id, f.scope, f.stem, f.options FROM fingerprints f JOIN questions q ON q.id = f.id "
+                    f"WHERE f.id IN ({marks}) AND length(f.stem) > 0", part):
+                out[qid] = Fingerprint(sc, stem, opts)
+        return out
+
+    def index_missing(self, tail_only=False):
+        """
+        Fingerprint questions that have none yet, INDEX_BATCH at a time.
+        tail_only looks past the highest fingerprinted id only (cheap, done on
+        every open); the full pass checks the whole table. -> questions indexed
+        """
+        with self.bank.lock:
+            last = self.db.execute("SELECT COALESCE(MAX(id), 0) FROM fingerprints").fetchone()[0] if tail_only else 0
+        sql = ("SELECT q.id, q.subject, q.type, q.stem, q.options FROM questions q WHERE q.id > ? "
+               "AND NOT EXISTS (SELECT 1 FROM fingerprints f WHERE f.id = q.id) ORDER BY q.id LIMIT ?")
+        n = 0
+        while True:
+            with self.bank.lock:
+                got = self.db.execute(sql, (last, INDEX_BATCH)).fetchall()
+            if not got:
+                return n
+            rows = [{"subject": r[1], "type": r[2], "stem": r[3], "options": json.loads(r[4])} for r in got]
+            fps = self.fingerprints(rows)
+            with self.bank.lock, self.db:
+                self._store([(r[0], fp) for r, fp in zip(got, fps)])
+            n += len(got)
+            last = got[-1][0]
+
+    # ---- insert time ----
+    def find(self, fp):
+        # -> id of the earliest question fp duplicates, or None (caller holds the bank lock)
+        if fp is None:
+            return None
+        hits = Counter()
+        for b, k in enumerate(band_keys(fp.scope, fp.stem)):
+            hits.update(qid for (qid,) in self.db.execute(
+                "SELECT id FROM fingerprint_bands WHERE band = ? AND key = ? ORDER BY id DESC LIMIT ?",
+                (b, k, MAX_CANDIDATES)))
+        found = self._load([qid for qid, n in hits.items() if n >= MIN_BANDS])
+        for qid in sorted(found):
+            if fp.matches(found[qid], self.stem_threshold, self.option_threshold):
+                return qid
+        return None
+
+    @perf.timed("dedup.add_many")
+    def add_many(self, rows, mode="reject"):
+        """
+        Insert the rows that aren't near-duplicates of the bank (or of an
+        earlier row in the same batch). mode "reject" drops a duplicate,
+        "merge" lets the question already in the bank take the answer /
+        source_slide it is missing from it. -> questions added
+        """
+        if mode not in ("reject", "merge"):
+            raise ValueError(f"dedup mode must be 'reject' or 'merge', not {mode!r}")
+        self.index_missing(tail_only=True) # anything added since without dedup
+        rows = [r if isinstance(r, dict) else dict(r.__dict__) for r in rows]
+        fps = self.fingerprints(rows)
+        added = 0
+        with self.bank.lock, self.db:
+            for r, fp in zip(rows, fps):
+                dup = self.find(fp)
+                if dup is None:
+                    qid = self.db.execute(INSERT, row_params(r)).lastrowid
+                    self._store([(qid, fp)])
+                    added += 1
+                    continue
+                if mode == "merge":
+                    self.db.execute("UPDATE questions SET answer = COALESCE(answer, ?), "
+                                    "source_slide = COALESCE(source_slide, ?) WHERE id = ?",
+                                    (row_params(r)[7], r.get("source_slide"), dup))
+                self.stats["merged" if mode == "merge" else "rejected"] += 1
+        self.stats["added"] += added
+        perf.count("dedup.duplicates", len(rows) - added)
+        return added
+
+    # ---- full pass ----
+    def _buckets(self, band):
+        # -> id lists (len > 1) sharing this band's key, streamed off the (band, key, id) primary key
+        cur = self.db.execute("SELECT key, id FROM fingerprint_bands WHERE band = ? ORDER BY key, id", (band,))
+        for _, group in groupby(cur, key=lambda r: r[0]):
+            members = [qid for _, qid in group]
+            if len(members) > 1:
+                yield members
+
+    def _verify(self, win):
+        # -> duplicate (i, j) pairs among one bucket window; stems compared all at once when numpy is around
+        fps = self._load(win)
+        win = [i for i in win if i in fps]
+        if np is not None and len(win) > 2:
+            sigs = np.frombuffer(b"".join(fps[i].stem for i in win), dtype=np.uint32).reshape(len(win), -1)
+            sims = (sigs[:, None, :] == sigs[None, :, :]).mean(axis=2)
+            ii, jj = np.nonzero(np.triu(sims >= self.stem_threshold, 1))
+            pairs = [(win[a], win[b]) for a, b in zip(ii.tolist(), jj.tolist())]
+        else:
+            pairs = [(win[a], win[b]) for a in range(len(win)) for b in range(a + 1, len(win))]
+        return [(i, j) for i, j in pairs if fps[i].matches(fps[j], self.stem_threshold, self.option_threshold)]
+
+    def scan(self, max_bucket=MAX_BUCKET):
+        """
+        Every duplicate group in the bank, one band at a time straight off the
+        index: memory is one bucket plus a parent slot per question id.
+        -> {kept id: [duplicate ids]}
+        """
+        self.index_missing()
+        with self.bank.lock:
+            top = self.db.execute("SELECT COALESCE(MAX(id), 0) FROM fingerprints").fetchone()[0]
+            dups = DisjointSet(top + 1)
+            step = max(1, max_bucket // 2)
+            for band in range(BANDS):
+                for members in self._buckets(band):
+                    for s in range(0, max(1, len(members) - step), step):
+                        win = members[s:s + max_bucket]
+                        if len({dups.find(i) for i in win}) == 1:
+                            continue # other bands already joined them
+                        for i, j in self._verify(win):
+                            dups.union(i, j)
+        groups = {}
+        parent = dups.parent
+        for i in range(top + 1):
+            if parent[i] != i:
+                groups.setdefault(dups.find(i), []).append(i)
+        return groups
+
+    def prune(self, groups, merge=False):
+        # delete every duplicate, keeping each group's first question; merge fills its answer/source_slide first
+        dead = [i for members in groups.values() for i in members]
+        with self.bank.lock, self.db:
+            if merge:
+                for keep, members in groups.items():
+                    marks = ",".join("?" * len(members))
+                    self.db.execute(
+                        "UPDATE questions SET "
+                        f"answer = COALESCE(answer, (SELECT answer FROM questions WHERE id IN ({marks}) "
+                        "AND answer IS NOT NULL ORDER BY id LIMIT 1)), "
+                        f"source_slide = COALESCE(source_slide, (SELECT source_slide FROM questions WHERE id IN ({marks}) "
+                        "AND source_slide IS NOT NULL ORDER BY id LIMIT 1)) WHERE id = ?",
+                        members + members + [keep])
+            self._forget(dead) # first: the band keys are recomputed from the fingerprints the trigger would drop
+            for s in range(0, len(dead), 500):
+                part = dead[s:s + 500]
+                self.db.execute(f"DELETE FROM questions WHERE id IN ({','.join('?' * len(part))})", part)
+        return len(dead)
+
+    def rebuild(self):
+        with self.bank.lock, self.db:
+            self.db.execute("DELETE FROM fingerprint_bands")
+            self.db.execute("DELETE FROM fingerprints")
+        return self.index_missing()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Find (and prune) near-duplicate questions in a bank.")
+    ap.add_argument("bank", nargs="?", default=str(BANK_PATH))
+    act = ap.add_mutually_exclusive_group()
+    act.add_argument("--prune", action="store_true", help="delete duplicates, keeping the first of each group")
+    act.add_argument("--merge", action="store_true", help="like --prune, but the kept question takes a missing answer/source first")
+    ap.add_argument("--threshold", type=float, default=STEM_THRESHOLD, help="stem similarity (estimated jaccard)")
+    ap.add_argument("--options", type=float, default=OPTION_THRESHOLD, help="option set overlap for mcq")
+    ap.add_argument("--rebuild", action="store_true", help="recompute every fingerprint first")
+    ap.add_argument("--show", type=int, default=5, help="duplicate groups to print")
+    args = ap.parse_args(argv)
+
+    if not Path(args.bank).exists():
+        print(f"No such bank: {args.bank}", file=sys.stderr)
+        return 2
+    bank = QuestionBank(Path(args.bank))
+    try:
+        t0 = time.perf_counter()
+        dd = Deduper(bank, stem_threshold=args.threshold, option_threshold=args.options)
+        if args.rebuild:
+            dd.rebuild()
+        groups = dd.scan()
+        dt = time.perf_counter() - t0
+        with bank.lock:
+            total = bank.db.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+        n = sum(len(m) for m in groups.values())
+        print(f"{total} questions scanned in {dt:.1f}s — {n} duplicates in {len(groups)} groups")
+        for keep in sorted(groups, key=lambda k: -len(groups[k]))[:args.show]:
+            stem = bank.fetch([keep])[keep]["stem"]
+            print(f"  #{keep} (+{len(groups[keep])}: {', '.join(map(str, groups[keep][:8]))}"
+                  f"{' ...' if len(groups[keep]) > 8 else ''})  {stem[:70]}")
+        if groups and (args.prune or args.merge):
+            print(f"{'merged and ' if args.merge else ''}deleted {dd.prune(groups, merge=args.merge)} questions")
+    finally:
+        bank.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+ZEET export — stream sessions or the bank out as JSON Lines, CSV or Moodle XML
+
+Questions are written one at a time as they are read: sessions one file
+at a time, the bank in keyset pages, so memory stays flat however big
+the bank gets.
+
+Usage:
+  python export.py sessions/ --out results.csv
+  python export.py --bank bank.db --subject CCNA --out ccna.xml     # Moodle XML
+  python export.py sessions/ --format jsonl --out -                 # stdout
+"""
+
+import os
+import sys
+import csv
+import json
+import argparse
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from structures import Session, question_dict
+
+ROOT = Path.cwd()
+SESSIONS_DIR = ROOT / "sessions"
+
+FIELDS = ["source", "id", "type", "stem", "options", "answer", "points", "user_response", "score"]
+
+# ---- sources: each yields flat question rows ----
+def iter_session_rows(directory: Path):
+    with os.scandir(directory) as it:
+        paths = sorted(e.path for e in it if e.is_file() and e.name.endswith(".json"))
+    for path in paths:
+        try:
+            sess = Session.load(Path(path)) # replays a pending journal, so exports see the latest answers
+        except Exception as e:
+            print(f"skipping {Path(path).name}: {type(e).__name__}: {e}", file=sys.stderr)
+            continue
+        for q in sess.questions:
+            yield dict(question_dict(q), source=sess.title)
+
+def iter_bank_rows(bank_path: Path, subject=None, qtype=None):
+    from bank import QuestionBank
+    bank = QuestionBank(bank_path)
+    try:
+        for r in bank.iter_questions(subject=subject, qtype=qtype):
+            yield dict(r, source=r["subject"] or "bank", user_response=None, score=None)
+    finally:
+        bank.close()
+
+# ---- writers ----
+class Writer:
+    def __init__(self, out):
+        self.out = out
+        self.count = 0
+
+    def write(self, row):
+        raise NotImplementedError
+
+    def close(self):
+        self.out.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class JSONLWriter(Writer):
+    def write(self, row):
+        self.out.write(json.dumps({k: row.get(k) for k in FIELDS}, ensure_ascii=False) + "\n")
+        self.count += 1
+
+class CSVWriter(Writer):
+    def __init__(self, out):
+        super().__init__(out)
+        self.csv = csv.DictWriter(out, fieldnames=FIELDS, extrasaction="ignore")
+        self.csv.writeheader()
+
+    def write(self, row):
+        row = dict(row, options=json.dumps(row.get("options") or [], ensure_ascii=False))
+        self.csv.writerow(row)
+        self.count += 1
+
+class MoodleXMLWriter(Writer):
+    """
+    Moodle XML quiz format: mcq -> multichoice, short -> shortanswer,
+    essay -> essay (answer key as grader info). A short question without an
+    answer key goes out as an essay: Moodle rejects a shortanswer with no
+    <answer>. A category question is written whenever the source (session
+    title / bank subject) changes.
+    """
+    TYPES = {"mcq": "multichoice", "short": "shortanswer", "essay": "essay"}
+
+    def __init__(self, out, category="ZEET"):
+        super().__init__(out)
+        self.category = category
+        self._source = None
+        out.write('<?xml version="1.0" encoding="UTF-8"?>\n<quiz>\n')
+
+    @staticmethod
+    def _text(tag, value, fmt=None):
+        attr = f' format="{fmt}"' if fmt else ""
+        return f"<{tag}{attr}><text>{escape(str(value))}</text></{tag}>"
+
+    def write(self, row):
+        qtype = self.TYPES.get(row.get("type"))
+        if qtype is None:
+            return
+        answer = row.get("answer")
+        if qtype == "shortanswer" and not answer:
+            qtype = "essay"
+        out = self.out
+        if row.get("source") != self._source:
+            self._source = row.get("source")
+            out.write(f'  <question type="category"><category><text>$course$/{escape(self.category)}/{escape(str(self._source))}</text></category></question>\n')
+        out.write(f'  <question type="{qtype}">\n')
+        name = f"Q{row.get('id')}"
+        out.write(f"    {self._text('name', name)}\n")
+        out.write(f"    {self._text('questiontext', row.get('stem', ''), 'html')}\n")
+        out.write(f"    <defaultgrade>{float(row.get('points') or 1.0):g}</defaultgrade>\n")
+        if qtype == "multichoice":
+            out.write("    <single>true</single>\n    <shuffleanswers>true</shuffleanswers>\n")
+            for i, opt in enumerate(row.get("options") or []):
+                frac = 100 if answer is not None and str(answer) == str(i) else 0
+                out.write(f'    <answer fraction="{frac}"><text>{escape(str(opt))}</text></answer>\n')
+        elif qtype == "shortanswer":
+            out.write(f'    <answer fraction="100"><text>{escape(str(answer))}</text></answer>\n')
+        elif answer:
+            out.write(f"    {self._text('graderinfo', answer, 'html')}\n")
+        out.write("  </question>\n")
+        self.count += 1
+
+    def close(self):
+        self.out.write("</quiz>\n")
+        super().close()
+
+WRITERS = {"jsonl": JSONLWriter, "csv": CSVWriter, "moodle": MoodleXMLWriter}
+SUFFIX_FORMATS = {".jsonl": "jsonl", ".csv": "csv", ".xml": "moodle"}
+
+def export(rows, out, fmt="jsonl"):
+    # rows: any iterable of question rows; returns how many were written
+    with WRITERS[fmt](out) as w:
+        for row in rows:
+            w.write(row)
+        return w.count
+
+def _open_out(path):
+    if path == "-":
+        # reconfigure rather than wrap sys.stdout.buffer: a wrapper would close it when collected
+        sys.stdout.reconfigure(encoding="utf-8", newline="")
+        return sys.stdout, False
+    tmp = f"{path}.tmp"
+    return open(tmp, "w", encoding="utf-8", newline=""), True
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Export sessions or the question bank.")
+    ap.add_argument("directory", nargs="?", default=None, help="sessions directory (default: ./sessions)")
+    ap.add_argument("--bank", default=None, help="export this bank.db instead of sessions")
+    ap.add_argument("--subject", default=None)
+    ap.add_argument("--type", dest="qtype", default=None)
+    ap.add_argument("--format", choices=sorted(WRITERS), default=None, help="default: from --out suffix, else jsonl")
+    ap.add_argument("--out", default="-", help="output file, - for stdout")
+    args = ap.parse_args(argv)
+
+    fmt = args.format or SUFFIX_FORMATS.get(Path(args.out).suffix.lower(), "jsonl")
+    if args.bank:
+        rows = iter_bank_rows(Path(args.bank), subject=args.subject, qtype=args.qtype)
+    else:
+        directory = Path(args.directory or SESSIONS_DIR)
+        if not directory.is_dir():
+            print(f"No such directory: {directory}", file=sys.stderr)
+            return 2
+        rows = iter_session_rows(directory)
+
+    out, is_file = _open_out(args.out)
+    try:
+        n = export(rows, out, fmt)
+    except BaseException:
+        if is_file:
+            out.close()
+            os.unlink(out.name) # never leave half an export behind under the real name
+        raise
+    if is_file:
+        out.close()
+        os.replace(out.name, args.out)
+    print(f"exported {n} questions as {fmt}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
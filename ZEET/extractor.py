@@ -1,12 +1,84 @@
 # extractor.py (sketch)
+import gc
+import os
+import sys
+import json
+import time
 from pathlib import Path
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import pdfplumber
 import docx
 from pptx import Presentation
-from PIL import Image
-import pytesseract
-from pdf2image import convert_from_path
 
+import perf
+from cache import ExtractionCache
+from ocr import get_engine
+
+# bump whenever block output changes shape/content so cached results are invalidated
+EXTRACTOR_VERSION = "2"
+
+PAGE_WINDOW = 16 # pages per worker task in parallel mode / per OCR batch in serial mode
+
+# bounded-memory mode (extract_bounded): soft RSS ceiling for the parent process.
+# Past it the OCR backlog is flushed and the pdf handle reopened, which drops
+# pdfminer's resolved-object cache (the part that grows with the document).
+MEMORY_CEILING_MB = 768
+BOUNDED_OCR_IMAGES = 2 # rasterized pages alive at once in bounded mode
+
+# ---- memory accounting ----
+try: # optional: RSS on platforms without /proc
+    import psutil
+except ImportError:
+    psutil = None
+
+def rss_mb():
+    # current resident set size of this process in MB, None if we can't tell
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 2**20
+    return None
+
+class MemoryWatch:
+    """
+    Peak RSS over one document. On Linux the kernel high-water mark (VmHWM)
+    is reset at start(), so the peak is exact even between samples; elsewhere
+    it's the max of the samples taken at page boundaries.
+    """
+    def __init__(self):
+        self.peak = 0.0
+        self.start()
+
+    def start(self):
+        try:
+            with open("/proc/self/clear_refs", "w") as f:
+                f.write("5") # resets VmHWM to the current RSS
+        except OSError:
+            pass
+        self.peak = 0.0
+        self.sample()
+
+    def sample(self):
+        now = rss_mb()
+        if now is not None and now > self.peak:
+            self.peak = now
+        return now
+
+    def peak_mb(self):
+        try:
+            with open("/proc/self/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return max(self.peak, int(line.split()[1]) / 1024)
+        except (OSError, ValueError):
+            pass
+        return self.peak
+
+@perf.timed("extract.docx")
 def extract_docx(path):
     doc = docx.Document(path)
     blocks = []
@@ -17,6 +89,7 @@ def extract_docx(path):
             blocks.append({"type":"paragraph", "text": text})
     return blocks
 
+@perf.timed("extract.pptx")
 def extract_pptx(path):
     prs = Presentation(path)
     blocks = []
@@ -29,21 +102,199 @@ def extract_pptx(path):
             blocks.append({"type":"slide", "index": i, "text": "\n".join(slide_text)})
     return blocks
 
-def extract_pdf(path):
+def _ocr_window(path, pages, max_images=None):
+    # pages: [(pageno, text)] in order; text-less ones get OCR'd together in one batch
+    missing = [n for n, text in pages if not text.strip()]
+    ocr_text = {}
+    if missing:
+        perf.count("extract.ocr_pages", len(missing))
+        with perf.span("extract.ocr_fallback"):
+            ocr_text = get_engine().ocr_pdf_pages(path, missing, max_images)
     blocks = []
-    with pdfplumber.open(path) as pdf:
-        for pageno, page in enumerate(pdf.pages):
-            text = page.extract_text() or ""
-            if text.strip():
-                blocks.append({"type":"page", "pageno": pageno, "text": text})
-            else:
-                # fallback to OCR for this page
-                images = convert_from_path(path, first_page=pageno+1, last_page=pageno+1)
-                # usually one image
-                text = pytesseract.image_to_string(images[0])
-                if text.strip():
-                    blocks.append({"type":"page_ocr", "pageno": pageno, "text": text})
+    for pageno, text in pages:
+        if text.strip():
+            blocks.append({"type":"page", "pageno": pageno, "text": text})
+        elif ocr_text.get(pageno, "").strip():
+            blocks.append({"type":"page_ocr", "pageno": pageno, "text": ocr_text[pageno]})
     return blocks
 
+def _page_text(page):
+    # extract, then drop the page's parsed objects/layout; we never come back to a page
+    try:
+        return page.extract_text() or ""
+    finally:
+        release = getattr(page, "close", None) or getattr(page, "flush_cache", None)
+        if release is not None:
+            release()
+
+def _extract_page_range(path, start, stop):
+    # runs inside pool workers, so it opens its own handle on the pdf.
+    # text layer only — OCR stays in the parent on the shared engine
+    with pdfplumber.open(path) as pdf:
+        return [(pageno, _page_text(pdf.pages[pageno])) for pageno in range(start, stop)]
+
+def iter_pdf(path, workers=None, window=PAGE_WINDOW, ceiling_mb=None, watch=None, max_images=None):
+    """
+    Yields page blocks in page order as soon as each page is done.
+    With workers > 1 the document is split into `window`-page ranges that run
+    on a process pool; only a few ranges are in flight so memory stays flat.
+    ceiling_mb (serial mode) keeps the parent under a soft RSS ceiling, see
+    MEMORY_CEILING_MB; watch (a MemoryWatch) is sampled once per page.
+    max_images caps the rasterized OCR pages alive at once for this call.
+    """
+    if not workers or workers <= 1:
+        buf = [] # pages held back behind a text-less page until its OCR batch is done
+        pdf = pdfplumber.open(path)
+        opened_at = 0 # reopening rebuilds the page list, so at most once per window
+        try:
+            total = len(pdf.pages)
+            for pageno in range(total):
+                text = _page_text(pdf.pages[pageno])
+                if not buf and text.strip():
+                    yield {"type":"page", "pageno": pageno, "text": text}
+                else:
+                    buf.append((pageno, text))
+                    if len(buf) >= window:
+                        yield from _ocr_window(path, buf, max_images)
+                        buf = []
+                now = watch.sample() if watch is not None else (rss_mb() if ceiling_mb else None)
+                if (ceiling_mb and now is not None and now > ceiling_mb
+                        and pageno + 1 < total and pageno - opened_at >= window):
+                    if buf:
+                        yield from _ocr_window(path, buf, max_images)
+                        buf = []
+                    pdf.close()
+                    pdf = None
+                    gc.collect()
+                    perf.count("extract.reopen")
+                    pdf = pdfplumber.open(path)
+                    opened_at = pageno
+        finally:
+            if pdf is not None:
+                pdf.close()
+        if buf:
+            yield from _ocr_window(path, buf, max_images)
+        return
+
+    with pdfplumber.open(path) as pdf:
+        total = len(pdf.pages)
+    ranges = deque((s, min(s + window, total)) for s in range(0, total, window))
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        while ranges or pending:
+            # keep the pool busy but don't queue the whole book at once
+            while ranges and len(pending) < workers * 2:
+                start, stop = ranges.popleft()
+                pending.append(pool.submit(_extract_page_range, str(path), start, stop))
+            yield from _ocr_window(path, pending.popleft().result(), max_images)
+    finally:
+        # consumer may stop early (generator closed), drop whatever is queued
+        pool.shutdown(wait=True, cancel_futures=True)
+
+@perf.timed("extract.pdf")
+def extract_pdf(path, workers=None):
+    return list(iter_pdf(path, workers=workers))
+
+@perf.timed("extract.image")
 def extract_image(path):
-    return [{"type":"image", "text": pytesseract.image_to_string(Image.open(path))}]
+    return [{"type":"image", "text": get_engine().ocr_image(path)}]
+
+EXTRACTORS = {
+    ".pdf": extract_pdf,
+    ".pptx": extract_pptx,
+    ".docx": extract_docx,
+    ".png": extract_image,
+    ".jpg": extract_image,
+    ".jpeg": extract_image,
+    ".tif": extract_image,
+    ".tiff": extract_image,
+    ".bmp": extract_image,
+}
+
+def iter_blocks(path, workers=None, ceiling_mb=None, watch=None, max_images=None):
+    # streaming entry point for the pipeline: pdfs stream page by page,
+    # the other formats are cheap enough to hand back in one go
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".pdf":
+        yield from iter_pdf(path, workers=workers, ceiling_mb=ceiling_mb, watch=watch, max_images=max_images)
+        return
+    fn = EXTRACTORS.get(suffix)
+    if fn is None:
+        raise ValueError(f"unsupported document type: {path.name}")
+    yield from fn(path)
+
+_cache = None
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = ExtractionCache(version=EXTRACTOR_VERSION)
+    return _cache
+
+def extract_file(path, use_cache=True):
+    # cached entry point used for documents/ — decks we've seen come straight off disk
+    path = Path(path)
+    fn = EXTRACTORS.get(path.suffix.lower())
+    if fn is None:
+        raise ValueError(f"unsupported document type: {path.name}")
+    if not use_cache:
+        return fn(path)
+    cache = get_cache()
+    hits = cache.hits
+    blocks = cache.get_or_extract(path, fn.__name__, fn)
+    perf.count("extract.cache_hit" if cache.hits > hits else "extract.cache_miss")
+    return blocks
+
+# ---- bounded-memory mode ----
+def spill(blocks, path):
+    # write blocks to a .jsonl file as they arrive; -> how many were written
+    n = 0
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for b in blocks:
+            f.write(json.dumps(b, ensure_ascii=False) + "\n")
+            n += 1
+    os.replace(tmp, path)
+    return n
+
+def read_spill(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def extract_bounded(path, out, ceiling_mb=MEMORY_CEILING_MB, max_images=BOUNDED_OCR_IMAGES):
+    """
+    Bounded-memory extraction: blocks go straight to `out` (.jsonl, read
+    back with read_spill) instead of a list. For pdfs memory stays flat:
+    pages are released as soon as their text is out, OCR keeps at most
+    `max_images` rasterized pages around, and the parent stays under
+    `ceiling_mb`. pptx/docx are still parsed whole by python-pptx /
+    python-docx, so only the block list is saved there, not the document.
+    -> {"source", "out", "blocks", "seconds", "peak_rss_mb"}
+    """
+    path = Path(path)
+    watch = MemoryWatch()
+    t0 = time.perf_counter()
+    with perf.span("extract.bounded"):
+        n = spill(iter_blocks(path, ceiling_mb=ceiling_mb, watch=watch, max_images=max_images), out)
+    peak = watch.peak_mb()
+    return {"source": str(path), "out": str(out), "blocks": n,
+            "seconds": time.perf_counter() - t0, "peak_rss_mb": round(peak, 1)}
+
+if __name__ == "__main__":
+    # python extractor.py book.pdf [more ...] [--max-memory MB] [--out DIR]
+    import argparse
+    ap = argparse.ArgumentParser(description="Bounded-memory extraction to .jsonl, with peak RSS per document.")
+    ap.add_argument("paths", nargs="+")
+    ap.add_argument("--max-memory", type=int, default=MEMORY_CEILING_MB, help="soft RSS ceiling in MB")
+    ap.add_argument("--ocr-images", type=int, default=BOUNDED_OCR_IMAGES, help="rasterized OCR pages alive at once")
+    ap.add_argument("--out", default=".", help="directory for <name>.jsonl")
+    args = ap.parse_args()
+    os.makedirs(args.out, exist_ok=True)
+    for p in args.paths:
+        r = extract_bounded(p, Path(args.out) / f"{Path(p).stem}.jsonl", args.max_memory, args.ocr_images)
+        print(f"{Path(p).name}: {r['blocks']} blocks in {r['seconds']:.1f}s, peak RSS {r['peak_rss_mb']:.0f}MB -> {r['out']}",
+              file=sys.stderr)
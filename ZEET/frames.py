@@ -0,0 +1,173 @@
+# frames.py — differential terminal frame renderer for the splash/boot animations
+import os
+import sys
+import math
+import time
+import signal
+import threading
+
+RESET = "\033[0m"
+
+def cells(text, style=""):
+    # one row of (char, style) cells; style is a raw ANSI prefix like CYAN
+    return [(ch, style) for ch in text]
+
+class TermSize:
+    """
+    Terminal size cached between frames. Refreshed by SIGWINCH where the OS has
+    it (must be constructed on the main thread for that), otherwise re-polled
+    at most every `poll` seconds. close() (main thread too) puts the previous
+    SIGWINCH handler back.
+    """
+    def __init__(self, default=(80, 24), poll=0.5):
+        self.default = default
+        self.poll = poll
+        self.cols, self.rows = default
+        self.changed = True
+        self._stale = True
+        self._checked = 0.0
+        self._sigwinch = False
+        self._prev = None
+        if hasattr(signal, "SIGWINCH") and threading.current_thread() is threading.main_thread():
+            prev = self._prev = signal.getsignal(signal.SIGWINCH)
+            def _on_winch(signum, frame):
+                self._stale = True
+                if callable(prev):
+                    prev(signum, frame)
+            try:
+                signal.signal(signal.SIGWINCH, _on_winch)
+                self._sigwinch = True
+            except (ValueError, OSError):
+                pass
+
+    def close(self):
+        if self._sigwinch:
+            try:
+                signal.signal(signal.SIGWINCH, self._prev if self._prev is not None else signal.SIG_DFL)
+            except (ValueError, OSError):
+                pass
+            self._sigwinch = False
+
+    def get(self):
+        now = time.monotonic()
+        if self._stale or (not self._sigwinch and now - self._checked >= self.poll):
+            self._stale = False
+            self._checked = now
+            try:
+                size = os.get_terminal_size()
+                size = (size.columns, size.lines)
+            except OSError:
+                size = self.default
+            if size != (self.cols, self.rows):
+                self.cols, self.rows = size
+                self.changed = True
+        return self.cols, self.rows
+
+class FrameRenderer:
+    """
+    Keeps the last frame and writes only the cells that changed, as cursor-
+    addressed runs, in a single write per frame. Frame pacing backs off when
+    writes start eating the frame budget (slow SSH links) and creeps back up
+    when the output keeps up.
+    """
+    def __init__(self, out=None, size=None, fps=20.0, min_fps=4.0, merge_gap=4):
+        self.out = out or sys.stdout
+        self.size = size or TermSize()
+        self.target_fps = fps
+        self.min_fps = min_fps
+        self.cur_fps = fps # pacing rate, adapted
+        self.merge_gap = merge_gap # unchanged cells cheaper to rewrite than to jump over
+        self.prev = []
+        self.frames = 0
+        self.bytes_out = 0
+        self.throughput = 0.0 # bytes/sec the terminal actually absorbed (ema)
+        self.fps = 0.0 # measured frames/sec, for show_fps
+        self._fps_t = time.perf_counter()
+        self._fps_n = 0
+
+    @property
+    def frame_delay(self):
+        return 1.0 / self.cur_fps
+
+    def _emit_run(self, buf, r, start, row, end):
+        buf.append(f"\033[{r + 1};{start + 1}H")
+        style = None
+        for c in range(start, end):
+            ch, st = row[c] if c < len(row) else (" ", "")
+            if st != style:
+                buf.append(RESET + st)
+                style = st
+            buf.append(ch)
+        buf.append(RESET)
+
+    def diff(self, rows):
+        cols, nrows = self.size.get()
+        buf = []
+        if self.size.changed:
+            # resize: nothing on screen can be trusted any more
+            buf.append("\033[2J")
+            self.prev = []
+            self.size.changed = False
+        rows = [row[:cols] for row in rows[:nrows]]
+        blank = (" ", "")
+        for r in range(max(len(rows), len(self.prev))):
+            new = rows[r] if r < len(rows) else []
+            old = self.prev[r] if r < len(self.prev) else []
+            n = max(len(new), len(old))
+            c = 0
+            while c < n:
+                if (new[c] if c < len(new) else blank) == (old[c] if c < len(old) else blank):
+                    c += 1
+                    continue
+                start = c
+                last = c
+                while c < n and c - last <= self.merge_gap:
+                    if (new[c] if c < len(new) else blank) != (old[c] if c < len(old) else blank):
+                        last = c
+                    c += 1
+                self._emit_run(buf, r, start, new, last + 1)
+                c = last + 1
+        # park the cursor under the frame so typed input (Enter) lands there
+        buf.append(f"\033[{len(rows) + 1};1H")
+        self.prev = rows
+        return "".join(buf)
+
+    def draw(self, rows):
+        data = self.diff(rows)
+        t0 = time.perf_counter()
+        self.out.write(data)
+        self.out.flush()
+        dt = time.perf_counter() - t0
+        self.bytes_out += len(data)
+        self.frames += 1
+        self._adapt(len(data), dt)
+        self._count_fps()
+
+    def _adapt(self, nbytes, dt):
+        if dt > 0:
+            self.throughput = 0.8 * self.throughput + 0.2 * (nbytes / dt) if self.throughput else nbytes / dt
+        budget = self.frame_delay
+        if dt > 0.5 * budget:
+            self.cur_fps = max(self.min_fps, self.cur_fps * 0.8) # output is the bottleneck
+        elif dt < 0.1 * budget and self.cur_fps < self.target_fps:
+            self.cur_fps = min(self.target_fps, self.cur_fps * 1.05)
+
+    def _count_fps(self):
+        self._fps_n += 1
+        now = time.perf_counter()
+        if now - self._fps_t >= 0.5:
+            self.fps = self._fps_n / (now - self._fps_t)
+            self._fps_t = now
+            self._fps_n = 0
+
+    def reset(self):
+        self.prev = []
+        self.size.changed = True
+
+def wave_table(lines, amplitude, steps=64, line_phase=0.6):
+    # offsets[k][i]: column offset of line i at phase step k of one sin period
+    table = []
+    for k in range(steps):
+        base = 2 * math.pi * k / steps
+        table.append([int(round(math.sin(base + i * line_phase) * amplitude + amplitude)) for i in range(len(lines))])
+    return table
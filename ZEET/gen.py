@@ -1,7 +1,405 @@
+#!/usr/bin/env python3
+"""
+ZEET question generation — chunks in, validated QuestionState records out
 
+Chunks (group.py output) are fanned out over asyncio: at most `concurrency`
+requests in flight, a token bucket per minute for requests (and prompt
+tokens, if configured), retries with jittered exponential backoff on
+429/5xx/network errors, and a content-hash response cache so re-running
+the same chunks costs nothing. Questions are yielded as responses arrive.
+
+The endpoint is OpenAI-style chat completions, configured in config.json
+under "model" (base_url, api_key, model, concurrency, requests_per_minute,
+tokens_per_minute, max_retries, timeout).
+
+Usage:
+  python gen.py chunks/*.json                        # -> questions.jsonl
+  python gen.py chunks/*.json --bank bank.db --subject CCNA
+  python gen.py chunks/*.json --stub                 # local stub server, no API key needed
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+import threading
+import http.client
+import urllib.error
+import urllib.request
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+
+from structures import QuestionState
+from cache import _atomic_write
+
+ROOT = Path.cwd()
+GEN_CACHE_DIR = ROOT / "cache" / "gen"
+
+DEFAULTS = {
+    "base_url": "https://api.openai.com/v1",
+    "api_key": "",
+    "model": "gpt-4",
+    "temperature": 0.2,
+    "concurrency": 4,
+    "requests_per_minute": 60,
+    "tokens_per_minute": 0, # 0 = no token limit
+    "max_retries": 5,
+    "timeout": 60.0,
+}
+QTYPES = ("mcq", "short", "essay")
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+CHARS_PER_TOKEN = 4 # rough prompt token estimate for the token bucket
+
+class GenerationError(Exception):
+    pass
 
 # pre-processing
 
+SYSTEM_PROMPT = (
+    "You write exam questions from course material. Reply with JSON only: "
+    '{"questions": [{"type": "mcq"|"short"|"essay", "stem": str, "options": [str], '
+    '"answer": str, "points": number}]}. For mcq, answer is the 0-based index of the '
+    "correct option as a string; short/essay answers are the key points expected."
+)
+
+def build_messages(chunk, per_chunk=3):
+    topics = ", ".join(chunk.get("topics") or [])
+    per_chunk = chunk.get("questions", per_chunk) # packed payloads (pack.py) size this to their material
+    user = (f"Topics: {topics}\n" if topics else "") + \
+           f"Write {per_chunk} questions (mix of types) about this material:\n\n{chunk.get('text', '')}"
+    return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": user}]
+
+def load_chunks(paths):
+    for p in paths:
+        with open(p, encoding="utf-8") as f:
+            yield json.load(f)
+
+def _strip_fences(text):
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return text
+
+def parse_questions(content):
+    """
+    Model reply -> list of question dicts that pass validation; malformed
+    items are dropped, an unparseable reply raises GenerationError.
+    """
+    try:
+        data = json.loads(_strip_fences(content))
+    except ValueError as e:
+        raise GenerationError(f"reply is not JSON: {e}")
+    items = data.get("questions", []) if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise GenerationError("reply has no question list")
+    out = []
+    for it in items:
+        if not isinstance(it, dict):
+            continue
+        qtype = str(it.get("type", "")).lower()
+        stem = str(it.get("stem") or "").strip()
+        if qtype not in QTYPES or not stem:
+            continue
+        options = [str(o) for o in it.get("options") or []] if qtype == "mcq" else []
+        answer = it.get("answer")
+        answer = None if answer is None else str(answer).strip()
+        if qtype == "mcq":
+            if len(options) < 2 or answer is None:
+                continue
+            if not answer.isdigit() and answer in options:
+                answer = str(options.index(answer)) # model answered with the option text
+            if not answer.isdigit() or int(answer) >= len(options):
+                continue
+        try:
+            points = float(it.get("points", 1.0))
+        except (TypeError, ValueError):
+            points = 1.0
+        out.append({"type": qtype, "stem": stem, "options": options, "answer": answer, "points": max(points, 0.0)})
+    return out
+
+# processing
+
+class TokenBucket:
+    # `rate` tokens per second up to `capacity`; acquire waits until enough have accrued
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.t = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, n=1.0):
+        n = min(float(n), self.capacity) # a request bigger than the bucket waits for a full one
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.t) * self.rate)
+                self.t = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                await asyncio.sleep((n - self.tokens) / self.rate)
+
+class ResponseCache:
+    # reply text keyed by sha256 of the exact request body
+    def __init__(self, root: Path = GEN_CACHE_DIR, enabled=True):
+        self.root = Path(root)
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(body) -> str:
+        return hashlib.sha256(json.dumps(body, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def _entry(self, key):
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        try:
+            content = json.loads(self._entry(key).read_text(encoding="utf-8"))["content"]
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return content
+
+    def put(self, key, content):
+        if not self.enabled:
+            return
+        _atomic_write(self._entry(key), json.dumps({"content": content}, ensure_ascii=False))
+
+class Generator:
+    def __init__(self, settings=None, cache=None, per_chunk=3):
+        self.cfg = dict(DEFAULTS, **(settings or {}))
+        self.cache = cache if cache is not None else ResponseCache()
+        self.per_chunk = per_chunk
+        self.stats = {"requests": 0, "retries": 0, "cached": 0, "failed": 0, "questions": 0, "dropped": 0}
+        self._pool = None
+
+    def _post(self, body):
+        # blocking HTTP call, runs on the executor
+        url = self.cfg["base_url"].rstrip("/") + "/chat/completions"
+        req = urllib.request.Request(url, data=json.dumps(body).encode("utf-8"), method="POST",
+                                     headers={"Content-Type": "application/json",
+                                              "Authorization": f"Bearer {self.cfg['api_key']}"})
+        with urllib.request.urlopen(req, timeout=self.cfg["timeout"]) as resp:
+            data = json.loads(resp.read().decode("utf-8"))
+        return data["choices"][0]["message"]["content"]
+
+    async def _request(self, body):
+        loop = asyncio.get_running_loop()
+        est = sum(len(m["content"]) for m in body["messages"]) / CHARS_PER_TOKEN
+        for attempt in range(self.cfg["max_retries"] + 1):
+            await self._rpm.acquire()
+            if self._tpm is not None:
+                await self._tpm.acquire(est)
+            self.stats["requests"] += 1
+            try:
+                return await loop.run_in_executor(self._pool, self._post, body)
+            except urllib.error.HTTPError as e:
+                if e.code != 429 and e.code < 500:
+                    raise GenerationError(f"HTTP {e.code}: {e.reason}")
+                retry_after = e.headers.get("Retry-After") if e.headers else None
+                err = f"HTTP {e.code}"
+            except (urllib.error.URLError, http.client.HTTPException, TimeoutError, ConnectionError,
+                    ValueError, KeyError, IndexError, TypeError) as e:
+                # network trouble, a truncated body, or a reply without choices[0].message.content
+                retry_after, err = None, f"{type(e).__name__}: {e}"
+            if attempt == self.cfg["max_retries"]:
+                raise GenerationError(f"gave up after {attempt + 1} attempts ({err})")
+            self.stats["retries"] += 1
+            try:
+                delay = float(retry_after)
+            except (TypeError, ValueError):
+                # full jitter keeps a burst of 429s from retrying in lockstep
+                delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+            await asyncio.sleep(delay)
+
+    async def generate_chunk(self, chunk):
+        body = {"model": self.cfg["model"], "temperature": self.cfg["temperature"],
+                "messages": build_messages(chunk, self.per_chunk)}
+        key = self.cache.key(body)
+        content = self.cache.get(key)
+        if content is not None:
+            self.stats["cached"] += 1
+            return chunk, parse_questions(content)
+        content = await self._request(body)
+        questions = parse_questions(content) # only cache replies we could use
+        self.cache.put(key, content)
+        return chunk, questions
+
+    async def generate(self, chunks):
+        """
+        Async generator of (chunk_id, QuestionState) in arrival order. Only
+        concurrency * 2 chunks are pending at a time, so a whole course can
+        be streamed in from disk. A chunk that keeps failing is counted and
+        skipped rather than ending the run.
+        """
+        conc = max(1, int(self.cfg["concurrency"]))
+        self._rpm = TokenBucket(self.cfg["requests_per_minute"] / 60.0, capacity=conc)
+        tpm = self.cfg["tokens_per_minute"]
+        self._tpm = TokenBucket(tpm / 60.0, capacity=tpm / 6.0) if tpm else None
+        self._pool = ThreadPoolExecutor(max_workers=conc, thread_name_prefix="zeet-gen")
+        chunks = iter(chunks)
+        pending = set()
+        next_id = 1
+        try:
+            while True:
+                while len(pending) < conc * 2:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    pending.add(asyncio.ensure_future(self.generate_chunk(chunk)))
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for fut in done:
+                    try:
+                        chunk, questions = fut.result()
+                    except Exception: # GenerationError, or anything else one bad chunk raised
+                        self.stats["failed"] += 1
+                        continue
+                    if not questions:
+                        self.stats["dropped"] += 1
+                    for q in questions:
+                        self.stats["questions"] += 1
+                        yield chunk.get("chunk_id"), QuestionState(id=next_id, **q)
+                        next_id += 1
+        finally:
+            for fut in pending:
+                fut.cancel()
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+# ---- local stub endpoint, for tests and offline runs ----
+class _StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        srv = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        time.sleep(srv.latency)
+        if random.random() < srv.fail_rate:
+            code = random.choice((429, 500, 503))
+            self.send_response(code)
+            if code == 429:
+                self.send_header("Retry-After", "0.05")
+            self.end_headers()
+            return
+        srv.served += 1
+        text = body["messages"][-1]["content"].split("\n\n", 1)[-1]
+        words = [w for w in text.split() if w.isalpha()] or ["material"]
+        reply = {"questions": [
+            {"type": "mcq", "stem": f"Which term appears in: {' '.join(words[:8])}?",
+             "options": [words[0], "none", "all", "neither"], "answer": "0", "points": 1},
+            {"type": "short", "stem": f"Explain {words[min(1, len(words) - 1)]}.", "answer": " ".join(words[:12]), "points": 3},
+        ]}
+        data = json.dumps({"choices": [{"message": {"role": "assistant", "content": json.dumps(reply)}}]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+class StubServer:
+    """
+    Chat-completions look-alike on 127.0.0.1 that writes two questions per
+    request from the prompt text. latency/fail_rate exercise the limiter and
+    the retry path. Use as a context manager; .base_url goes into settings.
+    """
+    def __init__(self, latency=0.05, fail_rate=0.0, port=0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.fail_rate = fail_rate
+        self.httpd.served = 0
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="zeet-gen-stub", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def load_settings(path="config.json"):
+    try:
+        with open(path, "r") as f:
+            return json.load(f).get("model", {})
+    except (OSError, ValueError):
+        return {}
+
+async def _run(gen, chunks, out, bank, subject, dedup=None):
+    batch = []
+    async for chunk_id, q in gen.generate(chunks):
+        row = dict(q.__dict__, chunk=chunk_id)
+        out.write(json.dumps(row, ensure_ascii=False) + "\n")
+        if bank is not None:
+            batch.append(dict(q.__dict__, subject=subject, source_slide=chunk_id))
+            if len(batch) >= 256:
+                bank.add_many(batch, dedup=dedup)
+                batch = []
+    if bank is not None and batch:
+        bank.add_many(batch, dedup=dedup)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generate questions from chunk files.")
+    ap.add_argument("chunks", nargs="+", help="chunk_*.json files from group.py")
+    ap.add_argument("--out", default="questions.jsonl")
+    ap.add_argument("--bank", default=None, help="also add the questions to this bank.db")
+    ap.add_argument("--subject", default="")
+    ap.add_argument("--dedup", choices=("reject", "merge"), default=None,
+                    help="skip (or merge into the existing question) near-duplicates of what the bank already has")
+    ap.add_argument("--per-chunk", type=int, default=3)
+    ap.add_argument("--concurrency", type=int, default=None)
+    ap.add_argument("--rpm", type=float, default=None, help="requests per minute")
+    ap.add_argument("--no-cache", action="store_true")
+    ap.add_argument("--stub", action="store_true", help="serve a local stub endpoint and generate against it")
+    ap.add_argument("--stub-fail-rate", type=float, default=0.0)
+    args = ap.parse_args(argv)
+
+    settings = load_settings()
+    if args.concurrency:
+        settings["concurrency"] = args.concurrency
+    if args.rpm:
+        settings["requests_per_minute"] = args.rpm
+
+    bank = None
+    if args.bank:
+        from bank import QuestionBank
+        bank = QuestionBank(Path(args.bank))
 
+    gen = Generator(settings, cache=ResponseCache(enabled=not args.no_cache), per_chunk=args.per_chunk)
+    stub = StubServer(fail_rate=args.stub_fail_rate) if args.stub else None
+    if stub is not None:
+        stub.__enter__()
+        gen.cfg["base_url"] = stub.base_url
+    t0 = time.perf_counter()
+    try:
+        with open(args.out, "w", encoding="utf-8") as out:
+            asyncio.run(_run(gen, load_chunks(args.chunks), out, bank, args.subject, args.dedup))
+    finally:
+        if stub is not None:
+            stub.__exit__(None, None, None)
+    dt = time.perf_counter() - t0
+    s = gen.stats
+    print(f"{s['questions']} questions from {len(args.chunks)} chunks in {dt:.2f}s — "
+          f"{s['requests']} requests, {s['cached']} cached, {s['retries']} retries, {s['failed']} failed")
+    if bank is not None and args.dedup:
+        d = bank.deduper().stats
+        print(f"bank: {d['added']} added, {d['rejected']} near-duplicates rejected, {d['merged']} merged")
+    return 1 if s["failed"] else 0
 
-# processing
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
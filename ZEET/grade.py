@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+ZEET batch grader — auto-grade every saved session without the UI
+
+Usage:
+  python grade.py                 # grades ./sessions
+  python grade.py path/to/sessions --workers 8
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from rich.console import Console
+from rich.table import Table
+
+from structures import Session
+from bank import QuestionBank
+import grading
+
+ROOT = Path.cwd()
+SESSIONS_DIR = ROOT / "sessions"
+
+def iter_session_files(directory: Path):
+    # scandir streams entries instead of building/sorting the whole listing first
+    with os.scandir(directory) as it:
+        for e in it:
+            if e.is_file() and e.name.endswith(".json"):
+                yield e.path
+
+def _init_worker(df, n_docs):
+    # ship the bank's idf table to each worker once
+    if n_docs:
+        grading.INDEX.df.update(df)
+        grading.INDEX.n_docs = n_docs
+
+def grade_files(paths):
+    # runs in a worker on a batch of files: load them all (replaying journals), then score every
+    # question in one grade_many call so responses to the same answer key are graded together
+    loaded, rows = [], []
+    for path in paths:
+        try:
+            sess = Session.load(Path(path))
+            sess.attach() # so close() compacts and drops the journal, otherwise stale scores would replay
+            loaded.append((path, sess))
+        except Exception as e:
+            rows.append({"path": path, "title": Path(path).stem, "error": f"{type(e).__name__}: {e}"})
+    questions = [q for _, sess in loaded for q in sess.questions]
+    scores = grading.grade_many(questions)
+    pos = 0
+    for path, sess in loaded:
+        mine = scores[pos:pos + len(sess.questions)] # sliced up front: a file failing half way can't shift the next one
+        pos += len(mine)
+        try:
+            got = total = 0.0
+            answered = 0
+            for q, score in zip(sess.questions, mine):
+                q.score = score
+                got += q.score
+                total += float(q.points)
+                if q.user_response:
+                    answered += 1
+            sess.close()
+            rows.append({"path": path, "title": sess.title, "questions": len(sess.questions),
+                         "answered": answered, "score": round(got, 2), "points": total, "error": None})
+        except Exception as e:
+            rows.append({"path": path, "title": sess.title, "error": f"{type(e).__name__}: {e}"})
+    return rows
+
+def _batches(it, n):
+    batch = []
+    for x in it:
+        batch.append(x)
+        if len(batch) >= n:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def grade_all(directory: Path, workers=None, batch=16, bank_path=None):
+    df, n_docs = {}, 0
+    if bank_path is not None:
+        index = grading.KeyIndex().fit(QuestionBank(bank_path).iter_answers())
+        df, n_docs = dict(index.df), index.n_docs
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(df, n_docs)) as pool:
+        for rows in pool.map(grade_files, _batches(iter_session_files(directory), batch)):
+            yield from rows
+
+def summary_table(rows):
+    table = Table(title="ZEET batch grading")
+    table.add_column("Session")
+    table.add_column("Answered", justify="right")
+    table.add_column("Score", justify="right")
+    table.add_column("%", justify="right")
+    for r in sorted(rows, key=lambda r: r["title"]):
+        if r["error"]:
+            table.add_row(r["title"], "-", f"[red]{r['error']}[/red]", "-")
+            continue
+        pct = (100 * r["score"] / r["points"]) if r["points"] else 0.0
+        table.add_row(r["title"], f"{r['answered']}/{r['questions']}", f"{r['score']}/{r['points']:g}", f"{pct:.0f}")
+    return table
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Grade every session file in a directory.")
+    ap.add_argument("directory", nargs="?", default=str(SESSIONS_DIR))
+    ap.add_argument("--workers", type=int, default=None, help="process pool size (default: cpu count)")
+    ap.add_argument("--bank", default=None, help="bank.db to take idf weights for short/essay grading from")
+    ap.add_argument("--quiet", action="store_true", help="only print the totals line")
+    args = ap.parse_args(argv)
+
+    console = Console()
+    directory = Path(args.directory)
+    if not directory.is_dir():
+        console.print(f"[red]No such directory: {directory}")
+        return 2
+
+    t0 = time.perf_counter()
+    rows = list(grade_all(directory, workers=args.workers, bank_path=args.bank))
+    dt = time.perf_counter() - t0
+
+    if not args.quiet:
+        console.print(summary_table(rows))
+    failed = sum(1 for r in rows if r["error"])
+    rate = len(rows) / dt if dt > 0 else 0.0
+    console.print(f"graded {len(rows) - failed} sessions ({failed} failed) in {dt:.2f}s — {rate:.1f} sessions/sec")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+# grading.py — answer scoring shared by the carousel and the batch grader
+import re
+import math
+from collections import Counter
+from functools import lru_cache
+
+import perf
+
+try: # numpy is only needed for the vectorised batch path
+    import numpy as np
+except ImportError:
+    np = None
+
+STOPWORDS = frozenset("""
+a an and are as at be been being but by can could did do does for from had has have how i if in into is it its
+of on or our so such than that the their them then there these they this those to was we were what when where
+which while who why will with would you your
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+
+# light suffix stripping, longest first; enough to match "handshakes"/"handshaking"/"handshake"
+_SUFFIXES = (("ational", "ate"), ("ization", "ize"), ("fulness", "ful"), ("iveness", "ive"),
+             ("ing", ""), ("edly", ""), ("ed", ""), ("ies", "y"), ("sses", "ss"), ("ly", ""), ("es", ""), ("s", ""))
+
+@lru_cache(maxsize=1 << 16)
+def stem(word: str) -> str:
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    for suf, rep in _SUFFIXES:
+        if word.endswith(suf) and len(word) - len(suf) >= 3:
+            if suf == "s" and word.endswith("ss"):
+                break
+            word = word[: -len(suf)] + rep
+            break
+    # drop a trailing e so "handshake" and "handshak(ing)" meet
+    if word.endswith("e") and len(word) > 3:
+        word = word[:-1]
+    return word
+
+def tokens(text) -> list:
+    # lowercase words, unstemmed, stopwords kept
+    return _TOKEN.findall(str(text).lower())
+
+def normalize(text) -> list:
+    # lowercase -> tokens -> drop stopwords -> stem
+    return [stem(t) for t in tokens(text) if t not in STOPWORDS]
+
+class AnswerKey:
+    # an answer normalised once: unique terms + their idf weights
+    __slots__ = ("terms", "col", "weights", "total")
+
+    def __init__(self, terms, weights):
+        self.terms = terms
+        self.col = {t: i for i, t in enumerate(terms)}
+        self.weights = weights
+        self.total = sum(weights)
+
+RESPONSE_LENGTH = 120 # normalised tokens of a typical essay answer; BM25's fixed "average document length"
+
+class KeyIndex:
+    """
+    Caches normalised answer keys and holds document frequencies over the bank.
+    Until fit() is called every term weighs 1.0, i.e. plain key coverage.
+    """
+    def __init__(self, k1=1.2, b=0.75, avg_len=RESPONSE_LENGTH):
+        self.k1 = k1
+        self.b = b
+        self.avg_len = avg_len
+        self.df = Counter()
+        self.n_docs = 0
+        self._keys = {}
+
+    def fit(self, answers):
+        # answers: iterable of answer-key strings (one "document" each)
+        self.df.clear()
+        self.n_docs = 0
+        for a in answers:
+            if a:
+                self.df.update(set(normalize(a)))
+                self.n_docs += 1
+        self._keys.clear()
+        return self
+
+    def idf(self, term) -> float:
+        if not self.n_docs:
+            return 1.0
+        df = self.df.get(term, 0)
+        return math.log(1.0 + (self.n_docs - df + 0.5) / (df + 0.5))
+
+    def key(self, answer) -> AnswerKey:
+        k = self._keys.get(answer)
+        if k is None:
+            terms = list(dict.fromkeys(normalize(answer)))
+            k = self._keys[answer] = AnswerKey(terms, [self.idf(t) for t in terms])
+        return k
+
+    def _tf_rows(self, key, responses):
+        rows, lengths = [], []
+        for r in responses:
+            toks = normalize(r) if r else []
+            lengths.append(len(toks))
+            row = [0] * len(key.terms)
+            for t in toks:
+                c = key.col.get(t)
+                if c is not None:
+                    row[c] += 1
+            rows.append(row)
+        return rows, lengths
+
+    def coverage(self, answer, responses, saturate=False, b=None):
+        """
+        Fraction (0..1) of the key's idf weight found in each response.
+        saturate=True applies BM25 term-frequency saturation with length
+        normalisation (strength b, default self.b) against the fixed avg_len,
+        so a response scores the same whether it is graded alone or alongside
+        others. b=0 turns the length penalty off.
+        """
+        key = self.key(answer)
+        if not key.terms or key.total <= 0:
+            return [0.0] * len(responses)
+        b = self.b if b is None else b
+        rows, lengths = self._tf_rows(key, responses)
+        avg = self.avg_len
+        if np is not None:
+            tf = np.asarray(rows, dtype=np.float64).reshape(len(rows), len(key.terms))
+            w = np.asarray(key.weights, dtype=np.float64)
+            if saturate:
+                norm = 1.0 - b + b * (np.asarray(lengths, dtype=np.float64) / avg if avg else 1.0)
+                hit = np.minimum(1.0, tf * (self.k1 + 1.0) / (tf + self.k1 * np.reshape(norm, (-1, 1))))
+            else:
+                hit = (tf > 0).astype(np.float64)
+            return (hit @ w / key.total).tolist()
+        out = []
+        for row, ln in zip(rows, lengths):
+            norm = (1.0 - b + b * (ln / avg)) if (saturate and avg) else 1.0
+            s = 0.0
+            for tf, w in zip(row, key.weights):
+                if tf:
+                    s += w * (min(1.0, tf * (self.k1 + 1.0) / (tf + self.k1 * norm)) if saturate else 1.0)
+            out.append(s / key.total)
+        return out
+
+INDEX = KeyIndex() # shared; call INDEX.fit(...) with the bank's answer keys for idf weighting
+
+# ---- per-type graders; register your own with register_grader ----
+class Grader:
+    def grade_batch(self, answer, points, responses):
+        raise NotImplementedError
+
+    def grade(self, q) -> float:
+        return self.grade_batch(q.answer, [q.points], [q.user_response])[0]
+
+class ExactGrader(Grader):
+    # mcq: option index has to match
+    def grade_batch(self, answer, points, responses):
+        return [float(p) if r is not None and str(r) == str(answer) else 0.0 for p, r in zip(points, responses)]
+
+class CoverageGrader(Grader):
+    def __init__(self, index=INDEX, saturate=False, b=None):
+        self.index = index
+        self.saturate = saturate
+        self.b = b
+
+    def grade_batch(self, answer, points, responses):
+        if not answer:
+            return [0.0] * len(responses)
+        cov = self.index.coverage(answer, responses, saturate=self.saturate, b=self.b)
+        return [round(float(p) * c, 2) if r else 0.0 for p, c, r in zip(points, cov, responses)]
+
+GRADERS = {
+    "mcq": ExactGrader(),
+    "short": CoverageGrader(),
+    "essay": CoverageGrader(saturate=True, b=0.0), # no length penalty: a long essay that covers the key gets full marks
+}
+
+def register_grader(qtype: str, grader: Grader):
+    GRADERS[qtype] = grader
+
+@perf.timed("grade.auto")
+def auto_grade(q) -> float:
+    g = GRADERS.get(q.type)
+    if g is None:
+        return 0.0
+    try:
+        return g.grade(q)
+    except Exception:
+        return 0.0
+
+@perf.timed("grade.batch")
+def grade_many(questions):
+    # scores a list of questions, batching everything that shares a type + answer key
+    groups = {}
+    for i, q in enumerate(questions):
+        groups.setdefault((q.type, q.answer), []).append(i)
+    scores = [0.0] * len(questions)
+    for (qtype, answer), idxs in groups.items():
+        g = GRADERS.get(qtype)
+        if g is None:
+            continue
+        try:
+            got = g.grade_batch(answer, [questions[i].points for i in idxs], [questions[i].user_response for i in idxs])
+        except Exception:
+            # one bad row (non-numeric points, ...) fails only itself, as in auto_grade
+            got = [auto_grade(questions[i]) for i in idxs]
+        for i, s in zip(idxs, got):
+            scores[i] = s
+    return scores
+
+if __name__ == "__main__":
+    # python grading.py — sanity checks for the graders
+    from structures import QuestionState
+    key = "TCP opens a connection with a three way handshake: SYN, SYN-ACK, ACK"
+    for filler in (0, 50, 500):
+        text = key + " and some unrelated discussion of routing tables" * filler
+        q = QuestionState(1, "essay", "Explain the handshake", answer=key, user_response=text, points=10)
+        assert auto_grade(q) == 10.0, (filler, auto_grade(q))
+        assert grade_many([q, q]) == [10.0, 10.0]
+    q = QuestionState(2, "essay", "Explain the handshake", answer=key, user_response="TCP uses SYN", points=10)
+    assert 0.0 < auto_grade(q) < 10.0, auto_grade(q)
+    print("ok")
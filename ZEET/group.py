@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+ZEET grouping stage — near-duplicate detection and topic chunks over extracted blocks
+
+Every block is shingled and MinHashed; LSH banding turns that into candidate
+pairs without comparing every block against every other one. Pairs above
+DUP_THRESHOLD collapse into one block (the same slide reused across modules),
+pairs above TOPIC_THRESHOLD end up in the same chunk.
+
+Usage:
+  python group.py documents/*                 # writes chunks/chunk_001.json ...
+  python group.py blocks/*.json --out chunks --max-blocks 4
+"""
+
+import sys
+import json
+import time
+import zlib
+import random
+import argparse
+from pathlib import Path
+from collections import Counter
+
+try: # numpy makes signatures/banding vectorised; the pure python path gives the same answers
+    import numpy as np
+except ImportError:
+    np = None
+
+from grading import STOPWORDS, normalize, tokens
+
+ROOT = Path.cwd()
+CHUNKS_DIR = ROOT / "chunks"
+
+SHINGLE = 1 # words per shingle; slides are short and reordered a lot, so word sets group topics best
+BANDS = 20
+ROWS = 3 # BANDS * ROWS minhashes per block; candidate threshold ~ (1/BANDS) ** (1/ROWS) ≈ 0.37
+DUP_THRESHOLD = 0.8 # estimated jaccard at which two blocks count as the same content
+TOPIC_THRESHOLD = 0.35 # ... and at which they belong in the same chunk
+MAX_BUCKET = 64 # members of one LSH bucket compared against each other; boilerplate buckets get a sliding window
+MAX_BLOCKS = 4 # blocks per chunk ("prefer small chunks": 2-4 slides)
+TOPIC_LABELS = 3
+SEED = 1
+SIG_BATCH = 2048 # blocks hashed per numpy pass
+
+_MASK64 = (1 << 64) - 1
+
+def shingles(text, k=SHINGLE):
+    # -> set of 32-bit shingle hashes over normalised words; short blocks fall back to single words
+    words = normalize(text)
+    if len(words) < k:
+        grams = words
+    else:
+        grams = [" ".join(words[i:i + k]) for i in range(len(words) - k + 1)]
+    return {zlib.crc32(g.encode("utf-8")) for g in grams}
+
+class MinHasher:
+    """
+    num_perm multiply-shift hashes h(x) = ((a*x + b) mod 2**64) >> 32 over
+    32-bit shingle hashes; a signature is the per-hash minimum (uint32).
+    Seeded, so signatures are comparable across runs and processes.
+    """
+    def __init__(self, num_perm=BANDS * ROWS, seed=SEED):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.a = [rng.getrandbits(64) | 1 for _ in range(num_perm)]
+        self.b = [rng.getrandbits(64) for _ in range(num_perm)]
+        if np is not None:
+            self._a = np.array(self.a, dtype=np.uint64)
+            self._b = np.array(self.b, dtype=np.uint64)
+
+    def signature(self, hashes):
+        # hashes: iterable of shingle hashes; an empty block gets the all-max signature
+        if not hashes:
+            return [0xFFFFFFFF] * self.num_perm
+        if np is not None:
+            x = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+            with np.errstate(over="ignore"): # wraparound is the mod 2**64
+                h = (np.outer(x, self._a) + self._b) >> np.uint64(32)
+            return h.min(axis=0).astype(np.uint32)
+        return [min(((a * x + b) & _MASK64) >> 32 for x in hashes) for a, b in zip(self.a, self.b)]
+
+    def signatures(self, texts, batch=SIG_BATCH):
+        if np is None:
+            return [self.signature(shingles(t)) for t in texts]
+        # one hash pass over a whole batch of blocks, minimum taken per block with reduceat
+        out = np.full((len(texts), self.num_perm), 0xFFFFFFFF, dtype=np.uint32)
+        for s in range(0, len(texts), batch):
+            sets = [shingles(t) for t in texts[s:s + batch]]
+            lens = np.fromiter((len(h) for h in sets), dtype=np.int64, count=len(sets))
+            if not lens.any():
+                continue
+            x = np.fromiter((v for h in sets for v in h), dtype=np.uint64, count=int(lens.sum()))
+            with np.errstate(over="ignore"):
+                h = (np.outer(x, self._a) + self._b) >> np.uint64(32)
+            nz = np.flatnonzero(lens)
+            starts = np.concatenate(([0], np.cumsum(lens)[:-1]))[nz]
+            out[s + nz] = np.minimum.reduceat(h, starts, axis=0).astype(np.uint32)
+        return out
+
+def similarity(sig_a, sig_b):
+    # fraction of agreeing minhashes = estimated jaccard of the shingle sets
+    n = len(sig_a)
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / n if n else 0.0
+
+class DisjointSet:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri == rj:
+            return False
+        # lower index wins so the representative is the earliest block
+        if rj < ri:
+            ri, rj = rj, ri
+        self.parent[rj] = ri
+        return True
+
+def _band_buckets(sigs, band, rows):
+    # -> lists of block indices (len > 1) whose signatures agree on this band
+    lo, hi = band * rows, (band + 1) * rows
+    if np is not None:
+        keys = np.ascontiguousarray(sigs[:, lo:hi]).view(np.dtype((np.void, 4 * rows))).ravel()
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        bounds = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1], [True])))
+        sizes = np.diff(bounds)
+        for k in np.flatnonzero(sizes > 1).tolist(): # singletons never leave numpy
+            yield order[bounds[k]:bounds[k + 1]].tolist()
+        return
+    buckets = {}
+    for i, sig in enumerate(sigs):
+        buckets.setdefault(tuple(sig[lo:hi]), []).append(i)
+    for members in buckets.values():
+        if len(members) > 1:
+            yield members
+
+def link(sigs, bands=BANDS, rows=ROWS, dup=DUP_THRESHOLD, topic=TOPIC_THRESHOLD, max_bucket=MAX_BUCKET):
+    """
+    LSH over the signatures, one band at a time (only one band's buckets are
+    ever in memory). Candidates are verified on the full signature.
+    Returns (dups, topics) disjoint sets over block indices.
+    """
+    n = len(sigs)
+    dups, topics = DisjointSet(n), DisjointSet(n)
+    step = max(1, max_bucket // 2)
+    for band in range(bands):
+        for members in _band_buckets(sigs, band, rows):
+            members.sort()
+            # oversized buckets (boilerplate footers etc.) are compared in overlapping windows
+            for s in range(0, max(1, len(members) - step), step):
+                win = members[s:s + max_bucket]
+                if len({dups.find(i) for i in win}) == 1:
+                    continue # already one piece of content; other bands found it
+                for bi, bj, sim in _verify(sigs, win, topic):
+                    if sim >= dup:
+                        dups.union(bi, bj)
+                    topics.union(bi, bj)
+    return dups, topics
+
+def _verify(sigs, win, topic):
+    # -> (i, j, similarity) for the pairs in win at or above the topic threshold
+    if np is not None:
+        w = sigs[win]
+        sims = (w[:, None, :] == w[None, :, :]).mean(axis=2)
+        ii, jj = np.nonzero(np.triu(sims >= topic, 1))
+        return [(win[a], win[b], float(sims[a, b])) for a, b in zip(ii.tolist(), jj.tolist())]
+    out = []
+    for a in range(len(win)):
+        for b in range(a + 1, len(win)):
+            sim = similarity(sigs[win[a]], sigs[win[b]])
+            if sim >= topic:
+                out.append((win[a], win[b], sim))
+    return out
+
+def _label_words(text):
+    # plain words for topic labels (stems read badly in a chunk title)
+    return [w for w in tokens(text)
+            if w not in STOPWORDS and len(w) > 2 and not w.isdigit()]
+
+def topic_labels(words, df, n_docs, k=TOPIC_LABELS):
+    # words: one label-word list per block in the group
+    tf = Counter()
+    for w in words:
+        tf.update(w)
+    def weight(w):
+        return tf[w] * (1.0 + (n_docs / (1 + df.get(w, 0))))
+    return sorted(tf, key=lambda w: (-weight(w), w))[:k]
+
+def group_blocks(blocks, max_blocks=MAX_BLOCKS, hasher=None, **lsh):
+    """
+    blocks: list of {"id", "text", ...} in document order.
+    -> list of chunk dicts {chunk_id, block_ids, duplicates, topics, sources, text}.
+    Duplicates are dropped from block_ids (listed under their representative)
+    so the generator never sees the same slide twice.
+    """
+    hasher = hasher or MinHasher(lsh.get("bands", BANDS) * lsh.get("rows", ROWS))
+    sigs = hasher.signatures([b.get("text", "") for b in blocks])
+    dups, topics = link(sigs, **lsh)
+
+    words = [_label_words(b.get("text", "")) for b in blocks]
+    df = Counter()
+    for w in words:
+        df.update(set(w))
+
+    groups = {} # topic root -> representative block indices, in document order
+    duplicates = {}
+    for i in range(len(blocks)):
+        rep = dups.find(i)
+        if rep != i:
+            duplicates.setdefault(rep, []).append(blocks[i]["id"])
+            continue
+        if not str(blocks[i].get("text", "")).strip():
+            continue
+        groups.setdefault(topics.find(i), []).append(i)
+
+    chunks = []
+    for root in sorted(groups):
+        members = groups[root]
+        labels = topic_labels([words[i] for i in members], df, len(blocks))
+        for s in range(0, len(members), max_blocks):
+            part = members[s:s + max_blocks]
+            chunks.append({
+                "chunk_id": f"chunk_{len(chunks) + 1:03d}",
+                "block_ids": [blocks[i]["id"] for i in part],
+                "duplicates": {blocks[i]["id"]: duplicates[i] for i in part if i in duplicates},
+                "topics": labels,
+                "sources": list(dict.fromkeys(blocks[i].get("source") for i in part if blocks[i].get("source"))),
+                "text": "\n\n".join(blocks[i]["text"] for i in part),
+            })
+    return chunks
+
+def load_blocks(paths, use_cache=True):
+    """
+    Blocks for grouping, each tagged with an id ("<file stem>:<n>") and source.
+    .json inputs are block lists already extracted (or cache entries), or
+    ingest.py block files, whose blocks keep the ids they already carry;
+    anything else goes through extractor.extract_file.
+    """
+    blocks = []
+    for path in map(Path, paths):
+        if path.suffix.lower() == ".json":
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            got = data["blocks"] if isinstance(data, dict) else data
+            source = data.get("source", path.name) if isinstance(data, dict) else path.name
+        else:
+            from extractor import extract_file # pulls in pdfplumber/docx/pptx, only when there are documents to read
+            got = extract_file(path, use_cache=use_cache)
+            source = path.name
+        for n, b in enumerate(got):
+            blocks.append({**b, "id": b.get("id") or f"{Path(source).stem}:{n}", "source": b.get("source") or source})
+    return blocks
+
+def write_chunks(chunks, out_dir: Path):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for old in out_dir.glob("chunk_*.json"):
+        old.unlink() # a smaller regrouping must not leave stale chunks behind
+    for c in chunks:
+        with open(out_dir / f"{c['chunk_id']}.json", "w", encoding="utf-8") as f:
+            json.dump(c, f, ensure_ascii=False, indent=2)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Group extracted blocks into de-duplicated topic chunks.")
+    ap.add_argument("inputs", nargs="+", help="documents, or block .json files")
+    ap.add_argument("--out", default=str(CHUNKS_DIR))
+    ap.add_argument("--max-blocks", type=int, default=MAX_BLOCKS)
+    ap.add_argument("--dup", type=float, default=DUP_THRESHOLD, help="near-duplicate threshold (estimated jaccard)")
+    ap.add_argument("--topic", type=float, default=TOPIC_THRESHOLD, help="same-chunk threshold")
+    ap.add_argument("--no-cache", action="store_true", help="re-extract documents instead of using the cache")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    blocks = load_blocks(args.inputs, use_cache=not args.no_cache)
+    t1 = time.perf_counter()
+    chunks = group_blocks(blocks, max_blocks=args.max_blocks, dup=args.dup, topic=args.topic)
+    t2 = time.perf_counter()
+    write_chunks(chunks, Path(args.out))
+    dropped = sum(len(v) for c in chunks for v in c["duplicates"].values())
+    print(f"{len(blocks)} blocks -> {len(chunks)} chunks ({dropped} near-duplicates folded) "
+          f"in {t2 - t1:.2f}s grouping, {t1 - t0:.2f}s loading")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""
+HIVE local index — full-text citations over extracted documents
+
+Documents go through the extractor, their blocks are cut into passages
+(document, page/slide, character offsets) and indexed. Postings live in
+append-only segment files that are mmap'd at query time, so a multi-GB
+corpus is searched without being read into RAM; the term dictionary,
+passages and document table sit in sqlite next to them.
+
+Re-adding a changed document tombstones its old passages and indexes the
+new content into a fresh segment; segments get merged (and tombstoned
+postings dropped) once there are more than MAX_SEGMENTS of them.
+
+Usage:
+  python hive.py add documents/*.pdf
+  python hive.py sync documents/          # add new/changed, drop deleted
+  python hive.py query "three way handshake" -k 5
+  python hive.py remove documents/old.pdf
+  python hive.py merge | stats
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import mmap
+import heapq
+import bisect
+import sqlite3
+import argparse
+import tempfile
+import threading
+from array import array
+from pathlib import Path
+from collections import Counter
+
+from grading import STOPWORDS, normalize
+from cache import file_digest
+
+ROOT = Path.cwd()
+HIVE_DIR = ROOT / "hive"
+
+PASSAGE_WORDS = 60 # words per passage; one passage = one citation
+SEGMENT_POSTINGS = 2_000_000 # postings buffered in memory before a segment is written
+MAX_SEGMENTS = 8 # more than this and add() merges them into one
+RARE_POSTINGS = 20_000 # longer lists only re-score candidates the rarer terms found (binary search, no full read)
+CANDIDATES = 200 # ...once at least this many candidates exist
+SNIPPET_CHARS = 240
+K1, B = 1.2, 0.75
+
+_WORD = re.compile(r"\S+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    first_pid INTEGER NOT NULL,
+    last_pid INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS passages (
+    pid INTEGER PRIMARY KEY,
+    doc INTEGER NOT NULL,
+    block INTEGER NOT NULL,
+    page INTEGER,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    len INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_passages_doc ON passages(doc);
+CREATE TABLE IF NOT EXISTS segments (id INTEGER PRIMARY KEY, file TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT NOT NULL,
+    seg INTEGER NOT NULL,
+    off INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (term, seg)
+) WITHOUT ROWID;
+-- pid ranges of removed/replaced documents, still present in segment postings until the next merge
+CREATE TABLE IF NOT EXISTS dead (first_pid INTEGER PRIMARY KEY, last_pid INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+"""
+
+def passages(text, words=PASSAGE_WORDS):
+    # -> [(start, end)] character ranges of ~`words` words each
+    spans = [m.span() for m in _WORD.finditer(text)]
+    return [(spans[i][0], spans[min(i + words, len(spans)) - 1][1]) for i in range(0, len(spans), words)]
+
+def _page(block):
+    # pdf pages carry pageno, slides carry index; docx paragraphs only have their position
+    for key in ("pageno", "index"):
+        if block.get(key) is not None:
+            return int(block[key])
+    return None
+
+def _source_id(path, block, page):
+    name = Path(path).name
+    if page is None:
+        return f"{name}#b{block + 1}"
+    return f"{name}#{'s' if Path(path).suffix.lower() == '.pptx' else 'p'}{page + 1}"
+
+def excerpt(text, query_words, width=SNIPPET_CHARS):
+    # window of `width` chars around the first query word found in the passage
+    low = text.lower()
+    hits = [i for i in (low.find(w) for w in query_words) if i >= 0]
+    at = min(hits) if hits else 0
+    start = max(0, at - width // 3)
+    end = min(len(text), start + width)
+    start = max(0, min(start, end - width))
+    snippet = " ".join(text[start:end].split())
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+def _saturate(tf):
+    return tf * (K1 + 1.0) / (tf + K1)
+
+class _Postings:
+    # term -> (pids, tfs) for the segment being built; pids arrive in ascending order
+    def __init__(self):
+        self.terms = {}
+        self.count = 0
+
+    def add(self, pid, tokens):
+        for term, tf in Counter(tokens).items():
+            lists = self.terms.get(term)
+            if lists is None:
+                lists = self.terms[term] = (array("I"), array("I"))
+            lists[0].append(pid)
+            lists[1].append(tf)
+            self.count += 1
+
+class HiveIndex:
+    def __init__(self, root: Path = HIVE_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.root / "hive.db"), check_same_thread=False)
+        self.lock = threading.RLock()
+        with self.lock:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.executescript(SCHEMA)
+        self._maps = {} # seg id -> (file, mmap) opened on first query
+        self._buf = _Postings()
+        self._pending = [] # passage rows waiting for their segment
+        self._pending_docs = []
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            self._close_maps()
+            self.db.close()
+
+    # ---- meta ----
+    def _meta(self, key, default=0):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def _set_meta(self, **kw):
+        self.db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", kw.items())
+
+    def stats(self):
+        with self.lock:
+            docs = self.db.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+            segs = self.db.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+            return {"documents": docs, "passages": self._meta("n_passages"), "segments": segs,
+                    "postings_bytes": sum((self.root / f).stat().st_size for f, in self.db.execute("SELECT file FROM segments"))}
+
+    # ---- writing ----
+    def is_current(self, path: Path):
+        path = Path(path)
+        row = self.db.execute("SELECT digest, size, mtime_ns FROM docs WHERE path = ?", (str(path.resolve()),)).fetchone()
+        if row is None:
+            return False
+        st = path.stat()
+        if (row[1], row[2]) == (st.st_size, st.st_mtime_ns):
+            return True
+        if row[0] == file_digest(path):
+            # touched but not changed: just remember the new stat
+            with self.db:
+                self.db.execute("UPDATE docs SET size = ?, mtime_ns = ? WHERE path = ?", (st.st_size, st.st_mtime_ns, str(path.resolve())))
+            return True
+        return False
+
+    def add(self, path: Path, blocks=None):
+        """
+        Index one document (re-index it if its content changed). blocks can be
+        handed in when the caller already extracted them; otherwise they are
+        streamed from extractor.iter_blocks. Returns False if it was current.
+        """
+        path = Path(path)
+        with self.lock:
+            if self.is_current(path):
+                return False
+            self._remove(path)
+            if blocks is None:
+                from extractor import iter_blocks # pdfplumber & co. only when something needs indexing
+                blocks = iter_blocks(path)
+            key = str(path.resolve())
+            st = path.stat()
+            pid = first = self._meta("next_pid", 1)
+            try:
+                for n, block in enumerate(blocks):
+                    text = str(block.get("text") or "")
+                    page = _page(block)
+                    for start, end in passages(text):
+                        tokens = normalize(text[start:end])
+                        if not tokens:
+                            continue
+                        self._buf.add(pid, tokens)
+                        self._pending.append((pid, key, n, page, start, end, len(tokens), text[start:end]))
+                        pid += 1
+                    if self._buf.count >= SEGMENT_POSTINGS:
+                        self._set_next_pid(pid)
+                        self.flush()
+            except Exception:
+                self._abandon(first, pid)
+                raise
+            self._pending_docs.append((key, file_digest(path), st.st_size, st.st_mtime_ns, first, pid - 1))
+            self._set_next_pid(pid)
+            return True
+
+    def _set_next_pid(self, pid):
+        with self.db:
+            self._set_meta(next_pid=pid)
+
+    def _abandon(self, first, pid):
+        # extraction failed partway: drop what this document buffered, delete
+        # the passages an early flush already wrote, tombstone its pids (their
+        # postings may be in a segment or the buffer) and never hand them out again
+        self._pending = [r for r in self._pending if r[0] < first]
+        with self.db:
+            if pid > first:
+                n, total = self.db.execute("SELECT COUNT(*), COALESCE(SUM(len), 0) FROM passages "
+                                           "WHERE doc = -1 AND pid BETWEEN ? AND ?", (first, pid - 1)).fetchone()
+                self.db.execute("DELETE FROM passages WHERE doc = -1 AND pid BETWEEN ? AND ?", (first, pid - 1))
+                self.db.execute("INSERT OR REPLACE INTO dead (first_pid, last_pid) VALUES (?, ?)", (first, pid - 1))
+                self._set_meta(n_passages=max(0, self._meta("n_passages") - n), total_len=max(0, self._meta("total_len") - total))
+            self._set_meta(next_pid=pid)
+
+    def add_many(self, paths):
+        # one unreadable document is reported and skipped, the rest still get indexed
+        added = 0
+        for p in paths:
+            try:
+                added += bool(self.add(p))
+            except Exception as e:
+                print(f"skipping {Path(p).name}: {type(e).__name__}: {e}", file=sys.stderr)
+        self.flush()
+        if self.db.execute("SELECT COUNT(*) FROM segments").fetchone()[0] > MAX_SEGMENTS:
+            self.merge()
+        return added
+
+    def _write_segment(self, terms):
+        # terms: iterable of (term, pids, tfs) sorted by term -> (file name, [(term, off, n)])
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        entries, off = [], 0
+        with os.fdopen(fd, "wb") as f:
+            for term, pids, tfs in terms:
+                f.write(pids.tobytes())
+                f.write(tfs.tobytes())
+                entries.append((term, off, len(pids)))
+                off += 8 * len(pids)
+            f.flush()
+            os.fsync(f.fileno())
+        return tmp, entries
+
+    def _commit_segment(self, tmp, entries):
+        seg = self._meta("next_seg", 1)
+        name = f"seg_{seg:06d}.post"
+        os.replace(tmp, self.root / name)
+        self.db.execute("INSERT INTO segments (id, file) VALUES (?, ?)", (seg, name))
+        self.db.executemany("INSERT INTO terms (term, seg, off, n) VALUES (?, ?, ?, ?)",
+                            ((t, seg, o, n) for t, o, n in entries))
+        self._set_meta(next_seg=seg + 1)
+
+    def flush(self):
+        # write the buffered segment and its passages/documents in one transaction
+        with self.lock:
+            if not self._pending and not self._pending_docs:
+                return
+            buf, rows, docs = self._buf, self._pending, self._pending_docs
+            self._buf, self._pending, self._pending_docs = _Postings(), [], []
+            tmp, entries = self._write_segment((t, *buf.terms[t]) for t in sorted(buf.terms))
+            with self.db:
+                if entries:
+                    self._commit_segment(tmp, entries)
+                else:
+                    os.unlink(tmp)
+                for d in docs:
+                    self.db.execute("INSERT OR REPLACE INTO docs (path, digest, size, mtime_ns, first_pid, last_pid) "
+                                    "VALUES (?, ?, ?, ?, ?, ?)", d)
+                ids = dict(self.db.execute("SELECT path, id FROM docs WHERE path IN (%s)" % ",".join("?" * len({r[1] for r in rows})),
+                                           list({r[1] for r in rows}))) if rows else {}
+                # passages of a document whose docs row isn't in yet (split over segments) wait for it by path
+                self.db.executemany("INSERT INTO passages (pid, doc, block, page, start, end, len, text) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                    ((r[0], ids.get(r[1], -1), *r[2:]) for r in rows))
+                for d in docs:
+                    self.db.execute("UPDATE passages SET doc = (SELECT id FROM docs WHERE path = ?) "
+                                    "WHERE doc = -1 AND pid BETWEEN ? AND ?", (d[0], d[4], d[5]))
+                self._set_meta(n_passages=self._meta("n_passages") + len(rows),
+                               total_len=self._meta("total_len") + sum(r[6] for r in rows))
+
+    def _remove(self, path: Path):
+        key = str(Path(path).resolve())
+        row = self.db.execute("SELECT id, first_pid, last_pid FROM docs WHERE path = ?", (key,)).fetchone()
+        if row is None:
+            return False
+        with self.db:
+            n, total = self.db.execute("SELECT COUNT(*), COALESCE(SUM(len), 0) FROM passages WHERE doc = ?", (row[0],)).fetchone()
+            self.db.execute("DELETE FROM passages WHERE doc = ?", (row[0],))
+            self.db.execute("DELETE FROM docs WHERE id = ?", (row[0],))
+            if row[2] >= row[1]:
+                self.db.execute("INSERT OR REPLACE INTO dead (first_pid, last_pid) VALUES (?, ?)", (row[1], row[2]))
+            self._set_meta(n_passages=max(0, self._meta("n_passages") - n), total_len=max(0, self._meta("total_len") - total))
+        return True
+
+    def remove(self, path: Path):
+        with self.lock:
+            return self._remove(path)
+
+    def sync(self, directory: Path, suffixes=None):
+        # directory "watch" on demand: index new/changed files, drop ones that are gone
+        if suffixes is None:
+            from extractor import EXTRACTORS
+            suffixes = set(EXTRACTORS)
+        directory = Path(directory).resolve()
+        present = [p for p in sorted(directory.rglob("*")) if p.is_file() and p.suffix.lower() in suffixes]
+        added = self.add_many(present)
+        keep = {str(p) for p in present}
+        removed = 0
+        with self.lock:
+            for (path,) in self.db.execute("SELECT path FROM docs").fetchall():
+                if path.startswith(str(directory) + os.sep) and path not in keep:
+                    removed += self._remove(Path(path))
+        return added, removed
+
+    def merge(self):
+        # fold every segment into one, dropping postings of dead pids
+        with self.lock:
+            self.flush()
+            segs = self.db.execute("SELECT id, file FROM segments ORDER BY id").fetchall()
+            if len(segs) <= 1 and not self.db.execute("SELECT 1 FROM dead LIMIT 1").fetchone():
+                return 0
+            dead = self.db.execute("SELECT first_pid, last_pid FROM dead ORDER BY first_pid").fetchall()
+            starts = [d[0] for d in dead]
+            def alive(pid):
+                i = bisect.bisect_right(starts, pid) - 1
+                return i < 0 or pid > dead[i][1]
+            def merged():
+                cur = self.db.execute("SELECT term, seg, off, n FROM terms ORDER BY term, seg")
+                term, pids, tfs = None, array("I"), array("I")
+                for t, seg, off, n in cur:
+                    if t != term:
+                        if term is not None and pids:
+                            yield term, pids, tfs
+                        term, pids, tfs = t, array("I"), array("I")
+                    p, f = self._postings(seg, off, n)
+                    for pid, tf in zip(p, f):
+                        if alive(pid):
+                            pids.append(pid)
+                            tfs.append(tf)
+                if term is not None and pids:
+                    yield term, pids, tfs
+            tmp, entries = self._write_segment(merged())
+            self._close_maps()
+            with self.db:
+                self.db.execute("DELETE FROM terms")
+                self.db.execute("DELETE FROM segments")
+                self.db.execute("DELETE FROM dead")
+                self.db.execute("DELETE FROM passages WHERE doc = -1") # orphans of an interrupted add
+                if entries:
+                    self._commit_segment(tmp, entries)
+                else:
+                    os.unlink(tmp)
+                # exact counts again (tombstones and orphans are gone now)
+                n, total = self.db.execute("SELECT COUNT(*), COALESCE(SUM(len), 0) FROM passages").fetchone()
+                self._set_meta(n_passages=n, total_len=total)
+            for _, f in segs:
+                (self.root / f).unlink(missing_ok=True)
+            return len(segs)
+
+    # ---- reading ----
+    def _close_maps(self):
+        for f, mm in self._maps.values():
+            mm.close()
+            f.close()
+        self._maps.clear()
+
+    def _postings(self, seg, off, n):
+        m = self._maps.get(seg)
+        if m is None:
+            (name,) = self.db.execute("SELECT file FROM segments WHERE id = ?", (seg,)).fetchone()
+            f = open(self.root / name, "rb")
+            m = self._maps[seg] = (f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        view = memoryview(m[1])
+        return view[off:off + 4 * n].cast("I"), view[off + 4 * n:off + 8 * n].cast("I")
+
+    def search(self, query, k=5):
+        """
+        BM25 over passages -> [{source_id, path, page, start, end, excerpt, score}].
+        Rare terms are scored in full; once there are enough candidates, long
+        posting lists are only probed for those candidates (binary search on
+        the mmap), so frequent words never page a whole list in.
+        """
+        qterms = list(dict.fromkeys(normalize(query)))
+        if not qterms:
+            return []
+        with self.lock:
+            n_docs = self._meta("n_passages")
+            if not n_docs:
+                return []
+            avg = self._meta("total_len") / n_docs
+            lists = {}
+            for t in qterms:
+                rows = self.db.execute("SELECT seg, off, n FROM terms WHERE term = ?", (t,)).fetchall()
+                if rows:
+                    lists[t] = rows
+            idf = {}
+            for t, rows in lists.items():
+                df = sum(r[2] for r in rows)
+                idf[t] = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            # first pass without length normalisation (lengths live in sqlite, not the postings)
+            scores = {}
+            for t in sorted(lists, key=lambda t: -idf[t]): # rarest first
+                w = idf[t]
+                probe = sum(r[2] for r in lists[t]) > RARE_POSTINGS and len(scores) >= CANDIDATES
+                for seg, off, n in lists[t]:
+                    pids, tfs = self._postings(seg, off, n)
+                    if probe:
+                        for pid in list(scores):
+                            i = bisect.bisect_left(pids, pid)
+                            if i < n and pids[i] == pid:
+                                scores[pid] += w * _saturate(tfs[i])
+                    else:
+                        for pid, tf in zip(pids, tfs):
+                            scores[pid] = scores.get(pid, 0.0) + w * _saturate(tf)
+            return self._rank(scores, idf, query, k, avg)
+
+    def _rank(self, raw, idf, query, k, avg):
+        # exact bm25 for a shortlist of the first-pass winners, then the top k
+        words = [w for w in re.findall(r"[a-z0-9]+", query.lower()) if w not in STOPWORDS and len(w) > 2]
+        out = []
+        shortlist = heapq.nlargest(max(k * 8, 32), raw.items(), key=lambda kv: kv[1])
+        for pid, _ in shortlist:
+            row = self.db.execute("SELECT d.path, p.block, p.page, p.start, p.end, p.len, p.text "
+                                  "FROM passages p JOIN docs d ON d.id = p.doc WHERE p.pid = ?", (pid,)).fetchone()
+            if row is None:
+                continue # tombstoned, still in a segment until the next merge
+            path, block, page, start, end, ln, text = row
+            counts = Counter(normalize(text))
+            norm = 1.0 - B + B * (ln / avg if avg else 1.0)
+            score = 0.0
+            for t, w in idf.items():
+                tf = counts.get(t, 0)
+                if tf:
+                    score += w * tf * (K1 + 1.0) / (tf + K1 * norm)
+            out.append({"source_id": _source_id(path, block, page), "path": path, "page": page,
+                        "start": start, "end": end, "excerpt": excerpt(text, words), "score": round(score, 4)})
+        out.sort(key=lambda c: -c["score"])
+        return out[:k]
+
+_index = None
+
+def get_index(root: Path = HIVE_DIR):
+    # shared read handle for the UI; None until something has been indexed
+    global _index
+    if _index is None:
+        if not (Path(root) / "hive.db").exists():
+            return None
+        _index = HiveIndex(root)
+    return _index
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="HIVE local citation index.")
+    ap.add_argument("--root", default=str(HIVE_DIR))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("add", help="index (or re-index changed) documents")
+    p.add_argument("paths", nargs="+")
+    p = sub.add_parser("remove")
+    p.add_argument("paths", nargs="+")
+    p = sub.add_parser("sync", help="index a directory, dropping documents that are gone")
+    p.add_argument("directory")
+    p = sub.add_parser("query")
+    p.add_argument("text")
+    p.add_argument("-k", type=int, default=5)
+    sub.add_parser("merge")
+    sub.add_parser("stats")
+    args = ap.parse_args(argv)
+
+    hive = HiveIndex(Path(args.root))
+    try:
+        if args.cmd == "add":
+            print(f"indexed {hive.add_many(args.paths)} document(s)")
+        elif args.cmd == "remove":
+            print(f"removed {sum(hive.remove(p) for p in args.paths)} document(s)")
+        elif args.cmd == "sync":
+            added, removed = hive.sync(Path(args.directory))
+            print(f"indexed {added}, removed {removed}")
+        elif args.cmd == "query":
+            print(json.dumps(hive.search(args.text, k=args.k), ensure_ascii=False, indent=2))
+        elif args.cmd == "merge":
+            print(f"merged {hive.merge()} segment(s)")
+        elif args.cmd == "stats":
+            print(json.dumps(hive.stats(), indent=2))
+    finally:
+        hive.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
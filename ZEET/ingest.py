@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+ZEET batch ingestion — extract a whole course folder in one go
+
+Every PDF / PPTX / DOCX / image under documents/ goes through the extractor
+on a process pool, largest file first so the long scanned textbook isn't
+the one left running at the end. Each document becomes one normalized
+block file in blocks/, which group.py / pack.py / hive.py read directly.
+A corrupt deck (or a worker that crashes outright) fails that file only.
+
+Usage:
+  python ingest.py                         # documents/ -> blocks/
+  python ingest.py course/ --out blocks --workers 4
+  python ingest.py --max-memory 1024       # bounded-memory pdf extraction per worker
+  python group.py blocks/*.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import unicodedata
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+ROOT = Path.cwd()
+DOCUMENTS_DIR = ROOT / "documents"
+BLOCKS_DIR = ROOT / "blocks"
+
+_SPACES = re.compile(r"[ \t\f\v]+")
+_BLANKS = re.compile(r"\n{3,}")
+
+def normalize_text(text) -> str:
+    # NFKC folds pdf ligatures (ﬁ -> fi) and full-width forms; whitespace runs collapse, paragraphs stay
+    text = unicodedata.normalize("NFKC", str(text)).replace("\r\n", "\n").replace("\r", "\n")
+    text = "\n".join(_SPACES.sub(" ", line).strip() for line in text.split("\n"))
+    return _BLANKS.sub("\n\n", text).strip()
+
+def normalize_blocks(blocks, source):
+    # -> blocks with clean text, their source and an id ("<source>:<n>"); source is the path relative to
+    #    the documents folder, so w1/intro.pdf, w2/intro.pdf and intro.pptx never share block ids
+    n = 0
+    for b in blocks:
+        text = normalize_text(b.get("text", ""))
+        if not text:
+            continue
+        yield {**b, "id": f"{source}:{n}", "source": source, "text": text}
+        n += 1
+
+def discover(directory: Path, suffixes=None):
+    # -> [(path, size)] largest first
+    if suffixes is None:
+        from extractor import EXTRACTORS
+        suffixes = set(EXTRACTORS)
+    found = []
+    for p in Path(directory).rglob("*"):
+        if p.is_file() and p.suffix.lower() in suffixes:
+            found.append((p, p.stat().st_size))
+    found.sort(key=lambda x: -x[1])
+    return found
+
+def output_path(path: Path, directory: Path, out_dir: Path) -> Path:
+    # week1/intro.pdf -> blocks/week1__intro.pdf.json (keeps intro.pdf and intro.pptx apart)
+    rel = Path(path).relative_to(directory)
+    return Path(out_dir) / ("__".join(rel.parts) + ".json")
+
+def is_current(path: Path, out: Path) -> bool:
+    try:
+        return out.stat().st_mtime_ns >= path.stat().st_mtime_ns
+    except OSError:
+        return False
+
+def write_document(blocks, source, kind, out: Path):
+    # streamed, so a bounded-memory extraction stays bounded; -> blocks written
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(out.name + ".tmp")
+    n = 0
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write('{"source": %s, "kind": %s, "blocks": [' % (json.dumps(source, ensure_ascii=False), json.dumps(kind)))
+            for b in normalize_blocks(blocks, source):
+                f.write(("\n  " if n == 0 else ",\n  ") + json.dumps(b, ensure_ascii=False))
+                n += 1
+            f.write("\n]}\n")
+        os.replace(tmp, out)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return n
+
+def _init_worker():
+    # each ingest worker OCRs in-process; a per-worker OCR pool would be pools within pools
+    try:
+        import ocr
+        ocr.configure(workers=0)
+    except ImportError:
+        pass # no OCR stack here; text-layer documents still go through
+
+def _row(source, out, **kw):
+    row = {"source": source, "out": str(out), "blocks": 0, "seconds": 0.0, "peak_rss_mb": 0.0, "error": None}
+    row.update(kw)
+    return row
+
+def ingest_file(path, out, source, ceiling_mb=None):
+    # runs in a worker: extract one document, write its block file, report back (never raises)
+    t0 = time.perf_counter()
+    path = Path(path)
+    try:
+        from extractor import MemoryWatch, extract_file, iter_blocks
+        watch = MemoryWatch()
+        if ceiling_mb:
+            blocks = iter_blocks(path, ceiling_mb=ceiling_mb, watch=watch) # streams, uncached
+        else:
+            blocks = extract_file(path) # goes through the extraction cache
+        n = write_document(blocks, source, path.suffix.lower().lstrip("."), Path(out))
+        peak = watch.peak_mb()
+    except Exception as e:
+        return _row(source, out, seconds=time.perf_counter() - t0, error=f"{type(e).__name__}: {e}")
+    return _row(source, out, blocks=n, seconds=time.perf_counter() - t0, peak_rss_mb=round(peak, 1))
+
+def ingest_all(jobs, workers=None, ceiling_mb=None):
+    """
+    jobs: [(path, out, source)], submitted in the given (largest-first) order.
+    Yields one row per job as it finishes. If a worker process dies outright
+    (native crash in a parser, OOM kill) every unfinished job fails with it;
+    those are re-run one per fresh process so only the culprit is lost.
+    """
+    crashed = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(ingest_file, str(p), str(o), s, ceiling_mb): (p, o, s) for p, o, s in jobs}
+        for fut in as_completed(futures):
+            p, o, s = futures[fut]
+            try:
+                yield fut.result()
+            except BrokenProcessPool:
+                crashed.append((p, o, s))
+            except Exception as e:
+                yield _row(s, o, error=f"{type(e).__name__}: {e}")
+    for p, o, s in crashed:
+        with ProcessPoolExecutor(max_workers=1, initializer=_init_worker) as solo:
+            try:
+                yield solo.submit(ingest_file, str(p), str(o), s, ceiling_mb).result()
+            except BrokenProcessPool:
+                yield _row(s, o, error="worker process crashed while extracting this file")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Extract every document in a folder into normalized block files.")
+    ap.add_argument("directory", nargs="?", default=str(DOCUMENTS_DIR))
+    ap.add_argument("--out", default=str(BLOCKS_DIR))
+    ap.add_argument("--workers", type=int, default=None, help="process pool size (default: cpu count)")
+    ap.add_argument("--max-memory", type=int, default=None, help="per-worker soft RSS ceiling in MB (bounded-memory pdf mode)")
+    ap.add_argument("--force", action="store_true", help="re-extract documents whose block file is up to date")
+    args = ap.parse_args(argv)
+
+    from rich.console import Console
+    from rich.progress import Progress, BarColumn, MofNCompleteColumn, TextColumn, TimeElapsedColumn
+
+    console = Console()
+    directory = Path(args.directory)
+    if not directory.is_dir():
+        console.print(f"[red]No such directory: {directory}")
+        return 2
+
+    jobs, skipped, total_bytes = [], 0, 0
+    for path, size in discover(directory):
+        out = output_path(path, directory, Path(args.out))
+        if not args.force and is_current(path, out):
+            skipped += 1
+            continue
+        jobs.append((path, out, path.relative_to(directory).as_posix()))
+        total_bytes += size
+    if not jobs:
+        console.print(f"nothing to ingest ({skipped} up to date)")
+        return 0
+    workers = args.workers or min(os.cpu_count() or 1, len(jobs))
+
+    t0 = time.perf_counter()
+    failed = blocks = 0
+    with Progress(TextColumn("[bold cyan]Ingesting"), BarColumn(), MofNCompleteColumn(), TimeElapsedColumn(),
+                  console=console) as progress:
+        task = progress.add_task("ingest", total=len(jobs))
+        for r in ingest_all(jobs, workers=workers, ceiling_mb=args.max_memory):
+            if r["error"]:
+                failed += 1
+                progress.console.print(f"[red]✗ {r['source']}[/red]  {r['error']}")
+            else:
+                blocks += r["blocks"]
+                progress.console.print(f"[green]✓[/green] {r['source']}  {r['blocks']} blocks  "
+                                       f"{r['seconds']:.1f}s  peak {r['peak_rss_mb']:.0f}MB")
+            progress.advance(task)
+    dt = time.perf_counter() - t0
+
+    console.print(f"ingested {len(jobs) - failed} documents ({failed} failed, {skipped} up to date) -> {blocks} blocks "
+                  f"in {dt:.1f}s — {total_bytes / 2**20 / dt:.1f} MB/s on {workers} workers")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# manifest.py — small index of saved sessions so Resume doesn't parse every file
+import os
+import json
+import tempfile
+from pathlib import Path
+
+MANIFEST_NAME = ".manifest.jsonl" # lives in sessions/, not picked up by *.json globs
+
+def session_summary(sess, questions=None):
+    answered = 0
+    score = 0.0
+    points = 0.0
+    for q in sess.questions if questions is None else questions:
+        if q.user_response:
+            answered += 1
+        if q.score is not None:
+            score += float(q.score)
+        points += float(q.points)
+    return {"title": sess.title, "questions": len(sess.questions), "answered": answered,
+            "score": round(score, 2), "points": points}
+
+class SessionManifest:
+    """
+    Append-only log of per-session records (last record per file wins).
+    Session.save appends one line; reading folds the log, stats the directory
+    and re-indexes only the files whose size/mtime no longer match, so edits
+    made outside ZEET still show up correctly.
+    """
+    def __init__(self, directory: Path):
+        self.dir = Path(directory)
+        self.path = self.dir / MANIFEST_NAME
+
+    def _append(self, records):
+        if not records:
+            return
+        lines = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        # one write per call keeps concurrent appends (batch grader workers) from interleaving
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    def _record(self, fn: Path, summary):
+        st = fn.stat()
+        return {"file": fn.name, **summary, "mtime": st.st_mtime, "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+    def update(self, fn: Path, sess, questions=None):
+        self._append([self._record(Path(fn), session_summary(sess, questions))])
+
+    def remove(self, fn: Path):
+        self._append([{"file": Path(fn).name, "deleted": True}])
+
+    def _fold(self):
+        entries, lines = {}, 0
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue # torn line
+                    lines += 1
+                    if rec.get("deleted"):
+                        entries.pop(rec["file"], None)
+                    else:
+                        entries[rec["file"]] = rec
+        except OSError:
+            pass
+        return entries, lines
+
+    def _index_file(self, fn: Path):
+        # the slow path: only for files written/changed outside ZEET
+        from structures import Session
+        try:
+            return self._record(fn, session_summary(Session.load(fn)))
+        except Exception:
+            return None
+
+    def entries(self):
+        entries, lines = self._fold()
+        changed = []
+        seen = set()
+        if self.dir.is_dir():
+            with os.scandir(self.dir) as it:
+                for e in it:
+                    if not (e.is_file() and e.name.endswith(".json")):
+                        continue
+                    seen.add(e.name)
+                    rec = entries.get(e.name)
+                    st = e.stat()
+                    # a pending journal means the snapshot is behind; still list it as is
+                    if rec is not None and rec.get("mtime_ns") == st.st_mtime_ns and rec.get("size") == st.st_size:
+                        continue
+                    rec = self._index_file(Path(e.path))
+                    if rec is not None:
+                        entries[e.name] = rec
+                        changed.append(rec)
+        gone = [name for name in entries if name not in seen]
+        for name in gone:
+            del entries[name]
+        if changed or gone:
+            if lines + len(changed) > 2 * len(entries) + 64:
+                self._rewrite(entries)
+            else:
+                self._append(changed + [{"file": n, "deleted": True} for n in gone])
+        elif lines > 2 * len(entries) + 64:
+            self._rewrite(entries)
+        return sorted(entries.values(), key=lambda r: r.get("mtime", 0), reverse=True)
+
+    def _rewrite(self, entries):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.dir, prefix=MANIFEST_NAME, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for rec in entries.values():
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
+
+    def page(self, query="", page=0, per_page=10):
+        # -> (rows on this page, total matches); newest first, query matches title or file name
+        rows = self.entries()
+        q = query.strip().lower()
+        if q:
+            rows = [r for r in rows if q in r["title"].lower() or q in r["file"].lower()]
+        start = page * per_page
+        return rows[start:start + per_page], len(rows)
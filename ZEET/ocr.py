@@ -0,0 +1,149 @@
+# ocr.py — shared OCR engine for scanned pdf pages and image files
+import os
+import atexit
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+import pytesseract
+from PIL import Image
+from pdf2image import convert_from_path
+
+LOW_DPI = 150 # first pass; plenty for clean scans
+HIGH_DPI = 300 # retry pass, only for pages tesseract wasn't sure about
+MIN_CONFIDENCE = 70.0 # mean word confidence (0-100) below which we retry
+RASTER_BATCH = 8 # max pages rasterized per convert_from_path call
+MAX_IMAGES = RASTER_BATCH # rasterized pages alive (on disk / in workers) at once
+MAX_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+def _runs(pagenos, limit):
+    # [3,4,5,9,10] -> [(3,5),(9,10)] with each run at most `limit` pages
+    runs = []
+    for n in sorted(set(pagenos)):
+        if runs and n == runs[-1][1] + 1 and n - runs[-1][0] < limit:
+            runs[-1][1] = n
+        else:
+            runs.append([n, n])
+    return [tuple(r) for r in runs]
+
+def _ocr_image(image):
+    # worker side: rebuild the text from image_to_data so we get confidences in the same pass.
+    # image may be a path to a rasterized page, so the pixels never pass through the parent
+    if isinstance(image, str):
+        with Image.open(image) as img:
+            img.load()
+            image = img.copy()
+    data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+    lines = {}
+    confs = []
+    for i, word in enumerate(data["text"]):
+        conf = float(data["conf"][i])
+        if conf < 0 or not word.strip():
+            continue
+        confs.append(conf)
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        lines.setdefault(key, []).append(word)
+    text = "\n".join(" ".join(ws) for _, ws in sorted(lines.items()))
+    conf = sum(confs) / len(confs) if confs else 0.0
+    return text, conf
+
+class _InlinePool:
+    # workers=0: OCR in the calling process (used inside ingest.py's pool, no pools within pools)
+    def submit(self, fn, *args):
+        fut = Future()
+        try:
+            fut.set_result(fn(*args))
+        except BaseException as e:
+            fut.set_exception(e)
+        return fut
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+class OCREngine:
+    """
+    Batches text-less pdf pages into contiguous raster runs, OCRs them on a
+    long-lived process pool at LOW_DPI and re-does only the low-confidence
+    pages at HIGH_DPI. Image files go through the same pool.
+    Pages are rasterized to a temp dir and handed to workers by path; at most
+    max_images of them exist at a time (a caller can lower that per call).
+    """
+    def __init__(self, workers=MAX_WORKERS, low_dpi=LOW_DPI, high_dpi=HIGH_DPI,
+                 min_confidence=MIN_CONFIDENCE, raster_batch=RASTER_BATCH, max_images=MAX_IMAGES):
+        self.workers = workers
+        self.low_dpi = low_dpi
+        self.high_dpi = high_dpi
+        self.min_confidence = min_confidence
+        self.raster_batch = raster_batch
+        self.max_images = max_images
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 0 else _InlinePool()
+            return self._pool
+
+    def _rasterize_and_ocr(self, path, pagenos, dpi, max_images=None):
+        out = {}
+        pool = self.pool()
+        limit = max(1, min(self.raster_batch, self.max_images, max_images or self.max_images))
+        for first, last in _runs(pagenos, limit):
+            # each run is finished (and its files deleted) before the next is rasterized
+            with tempfile.TemporaryDirectory(prefix="zeet-ocr-") as tmp:
+                images = convert_from_path(str(path), dpi=dpi, first_page=first + 1, last_page=last + 1,
+                                           grayscale=True, output_folder=tmp, paths_only=True)
+                futures = [(first + i, pool.submit(_ocr_image, img)) for i, img in enumerate(sorted(images))]
+                for n, fut in futures:
+                    out[n] = fut.result()
+        return out
+
+    def ocr_pdf_pages(self, path, pagenos, max_images=None):
+        # -> {pageno: text}; pagenos are 0-based like the extractor blocks
+        if not pagenos:
+            return {}
+        results = self._rasterize_and_ocr(path, pagenos, self.low_dpi, max_images)
+        retry = [n for n, (_, conf) in results.items() if conf < self.min_confidence]
+        if retry and self.high_dpi > self.low_dpi:
+            for n, (text, conf) in self._rasterize_and_ocr(path, retry, self.high_dpi, max_images).items():
+                if conf >= results[n][1]:
+                    results[n] = (text, conf)
+        return {n: text for n, (text, _) in results.items()}
+
+    def ocr_image(self, path):
+        img = Image.open(path)
+        img.load()
+        text, conf = self.pool().submit(_ocr_image, img).result()
+        if conf < self.min_confidence:
+            # image files have a fixed resolution, so the "higher dpi" retry is an upscale
+            scale = self.high_dpi / self.low_dpi
+            big = img.resize((int(img.width * scale), int(img.height * scale)), Image.LANCZOS)
+            text2, conf2 = self.pool().submit(_ocr_image, big).result()
+            if conf2 >= conf:
+                text = text2
+        return text
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+# single shared engine, started on first use
+_engine = None
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        _engine = OCREngine()
+        atexit.register(_engine.shutdown)
+    return _engine
+
+def configure(**kw):
+    # replace the shared engine with one built from OCREngine kwargs, e.g. configure(workers=0)
+    global _engine
+    if _engine is not None:
+        _engine.shutdown()
+    _engine = OCREngine(**kw)
+    atexit.register(_engine.shutdown)
+    return _engine
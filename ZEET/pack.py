@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+ZEET payload packer — fill each generation request up to a token budget
+
+Sits between group.py and gen.py. Chunks (or raw block lists) are costed
+in estimated tokens and packed into payloads of at most --budget tokens:
+first in order within a topic (so a payload reads like the slides did),
+then whole topic runs are best-fit into the payloads that still have room.
+Anything bigger than the budget is split at block, then word, boundaries.
+
+Usage:
+  python pack.py chunks/*.json                      # -> payloads/payload_001.json ...
+  python pack.py chunks/*.json --budget 6000 --out payloads
+  python gen.py payloads/*.json
+"""
+
+import sys
+import json
+import bisect
+import argparse
+from pathlib import Path
+
+from gen import CHARS_PER_TOKEN, SYSTEM_PROMPT
+
+ROOT = Path.cwd()
+PAYLOADS_DIR = ROOT / "payloads"
+
+DEFAULT_BUDGET = 3000 # tokens of material per request, prompt overhead included
+PROMPT_OVERHEAD = len(SYSTEM_PROMPT) // CHARS_PER_TOKEN + 48 # system prompt + instructions + reply headroom
+TOKENS_PER_QUESTION = 400 # one question asked for per this many tokens of material
+MAX_TOPICS = 6
+
+def estimate_tokens(text) -> int:
+    # chars/4 undercounts short-word text (slides full of acronyms), words*1.3 catches that
+    text = str(text)
+    return max(1, int(max(len(text) / CHARS_PER_TOKEN, len(text.split()) * 1.3)))
+
+class Unit:
+    # one packable piece: a chunk, a block, or a slice of an oversized one
+    __slots__ = ("order", "ids", "text", "topics", "sources", "tokens")
+
+    def __init__(self, order, ids, text, topics=(), sources=()):
+        self.order = order
+        self.ids = list(ids)
+        self.text = text
+        self.topics = list(topics)
+        self.sources = list(sources)
+        self.tokens = estimate_tokens(self.header()) + estimate_tokens(text)
+
+    def header(self):
+        # keeps the hierarchy visible to the model: where this came from and what it's about
+        where = self.ids[0] if len(self.ids) == 1 else f"{self.ids[0]} … {self.ids[-1]}"
+        about = f" — {', '.join(self.topics)}" if self.topics else ""
+        return f"## {where}{about}"
+
+def units_from_chunks(chunks):
+    for n, c in enumerate(chunks):
+        yield Unit(n, c.get("block_ids") or [c.get("chunk_id", str(n))], c.get("text", ""),
+                   c.get("topics") or (), c.get("sources") or ())
+
+def units_from_blocks(blocks, source=""):
+    # raw extractor output (no grouping step): one unit per block
+    stem = Path(source).stem if source else "block"
+    for n, b in enumerate(blocks):
+        if str(b.get("text", "")).strip():
+            yield Unit(n, [b.get("id", f"{stem}:{n}")], b["text"], (), (source,) if source else ())
+
+def _split(unit, cap):
+    # -> units of at most `cap` tokens, cut at paragraph (block) boundaries first, then at words
+    if unit.tokens <= cap:
+        return [unit]
+    parts, cur = [], []
+    pieces = unit.text.split("\n\n")
+    if len(pieces) == 1:
+        words = unit.text.split()
+        step = max(1, int(cap / 1.3) - 16)
+        pieces = [" ".join(words[i:i + step]) for i in range(0, len(words), step)]
+    for piece in pieces:
+        trial = "\n\n".join(cur + [piece])
+        if cur and Unit(unit.order, unit.ids, trial).tokens > cap:
+            parts.append("\n\n".join(cur))
+            cur = []
+        cur.append(piece)
+    if cur:
+        parts.append("\n\n".join(cur))
+    out = []
+    for i, text in enumerate(parts):
+        u = Unit(unit.order + i / len(parts), unit.ids, text, unit.topics, unit.sources)
+        out.extend(_split(u, cap) if u.tokens > cap and u.text != unit.text else [u])
+    return out
+
+class _Bin:
+    __slots__ = ("units", "tokens")
+
+    def __init__(self):
+        self.units = []
+        self.tokens = 0
+
+    def add(self, units, tokens):
+        self.units.extend(units)
+        self.tokens += tokens
+
+def pack(units, budget=DEFAULT_BUDGET, overhead=PROMPT_OVERHEAD):
+    """
+    -> list of payload bins (each a list of units, in document order).
+    Pass 1 is next-fit over consecutive units of the same topic, which keeps
+    related slides together and in order. Pass 2 is best-fit decreasing of
+    those runs into payloads, so small leftover runs fill gaps instead of
+    each costing a call.
+    """
+    cap = max(1, budget - overhead)
+    runs, open_run = [], {}
+    for u in sorted(units, key=lambda u: u.order):
+        for part in _split(u, cap):
+            key = tuple(part.topics)
+            run = open_run.get(key)
+            if run is None or run.tokens + part.tokens > cap:
+                run = open_run[key] = _Bin()
+                runs.append(run)
+            run.add([part], part.tokens)
+
+    bins = []
+    free = [] # sorted (room left, bin index) for best fit
+    for run in sorted(runs, key=lambda r: -r.tokens):
+        i = bisect.bisect_left(free, (run.tokens, -1))
+        if i < len(free):
+            room, b = free.pop(i)
+            bins[b].add(run.units, run.tokens)
+            bisect.insort(free, (room - run.tokens, b))
+        else:
+            b = len(bins)
+            bins.append(_Bin())
+            bins[b].add(run.units, run.tokens)
+            bisect.insort(free, (cap - run.tokens, b))
+    for b in bins:
+        b.units.sort(key=lambda u: u.order)
+    bins.sort(key=lambda b: b.units[0].order)
+    return bins
+
+def payload(n, b):
+    topics = list(dict.fromkeys(t for u in b.units for t in u.topics))[:MAX_TOPICS]
+    text = "\n\n".join(f"{u.header()}\n{u.text}" for u in b.units)
+    return {
+        "chunk_id": f"payload_{n:03d}",
+        "block_ids": list(dict.fromkeys(i for u in b.units for i in u.ids)),
+        "topics": topics,
+        "sources": list(dict.fromkeys(s for u in b.units for s in u.sources)),
+        "tokens": b.tokens,
+        "questions": max(1, round(b.tokens / TOKENS_PER_QUESTION)),
+        "text": text,
+    }
+
+def report(bins, budget=DEFAULT_BUDGET, overhead=PROMPT_OVERHEAD, blocks=None):
+    # blocks: calls a one-request-per-block run would make (defaults to the blocks packed)
+    cap = max(1, budget - overhead)
+    used = sum(b.tokens for b in bins)
+    if blocks is None:
+        blocks = len({i for b in bins for u in b.units for i in u.ids})
+    return {"blocks": blocks, "payloads": len(bins), "calls_saved": blocks - len(bins),
+            "efficiency": used / (cap * len(bins)) if bins else 0.0, "tokens": used}
+
+def load_units(paths):
+    """
+    chunk_*.json from group.py, or block lists / cache entries straight from
+    the extractor. -> (units, source blocks) where source blocks counts the
+    near-duplicates group.py folded away too, i.e. the naive call count.
+    """
+    units, offset, blocks = [], 0, 0
+    for p in map(Path, paths):
+        with open(p, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict) and "chunk_id" in data:
+            got = list(units_from_chunks([data]))
+            blocks += len(data.get("block_ids") or [None]) + sum(len(v) for v in (data.get("duplicates") or {}).values())
+        else:
+            raw = data["blocks"] if isinstance(data, dict) else data
+            got = list(units_from_blocks(raw, data.get("source", p.name) if isinstance(data, dict) else p.name))
+            blocks += len(got)
+        # keep file order across inputs; orders can skip (empty blocks), so step past this file's largest
+        span = max((u.order for u in got), default=-1) + 1
+        for u in got:
+            u.order += offset
+        offset += span + 1
+        units.extend(got)
+    return units, blocks
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Pack chunks/blocks into token-budgeted generation payloads.")
+    ap.add_argument("inputs", nargs="+", help="chunk_*.json (group.py) or block .json files")
+    ap.add_argument("--budget", type=int, default=DEFAULT_BUDGET, help="tokens per request")
+    ap.add_argument("--out", default=str(PAYLOADS_DIR))
+    args = ap.parse_args(argv)
+
+    units, blocks = load_units(args.inputs)
+    bins = pack(units, budget=args.budget)
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    for old in out.glob("payload_*.json"):
+        old.unlink()
+    for n, b in enumerate(bins, 1):
+        with open(out / f"payload_{n:03d}.json", "w", encoding="utf-8") as f:
+            json.dump(payload(n, b), f, ensure_ascii=False, indent=2)
+    r = report(bins, budget=args.budget, blocks=blocks)
+    print(f"{r['blocks']} blocks -> {r['payloads']} payloads ({r['calls_saved']} calls saved vs one per block), "
+          f"packing efficiency {100 * r['efficiency']:.1f}% of a {args.budget}-token budget")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
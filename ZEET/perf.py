@@ -0,0 +1,167 @@
+# perf.py — opt-in timers/counters for the hot paths, with a Chrome trace dump
+#
+# Off by default: every hook is a single module-global check, so instrumented
+# code pays next to nothing. Turn on with `zeet.py --perf` / ZEET_PERF=1 or
+# `::perf on` in the carousel; `--trace file.json` / `::perf dump` also keep
+# the individual events in Chrome trace format (chrome://tracing, Perfetto,
+# speedscope all load it).
+import os
+import json
+import time
+import threading
+from collections import deque
+from functools import wraps
+
+WINDOW = 2048 # recent samples per timer kept for percentiles
+MAX_EVENTS = 200_000 # trace events kept (oldest dropped first)
+
+_on = False
+_tracing = False
+_lock = threading.Lock()
+_stats = {}
+_counters = {}
+_events = deque(maxlen=MAX_EVENTS)
+_threads = {}
+_t0 = time.perf_counter()
+_clock = time.perf_counter
+
+class Stat:
+    __slots__ = ("n", "total", "max", "recent")
+
+    def __init__(self):
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=WINDOW)
+
+def enable(trace=False):
+    global _on, _tracing
+    _on = True
+    _tracing = _tracing or trace
+
+def disable():
+    global _on, _tracing
+    _on = _tracing = False
+
+def enabled() -> bool:
+    return _on
+
+def tracing() -> bool:
+    return _tracing
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _counters.clear()
+        _events.clear()
+
+def observe(name, seconds, start=None):
+    # record one timing; start (perf_counter) places it on the trace timeline
+    if not _on:
+        return
+    with _lock:
+        st = _stats.get(name)
+        if st is None:
+            st = _stats[name] = Stat()
+        st.n += 1
+        st.total += seconds
+        if seconds > st.max:
+            st.max = seconds
+        st.recent.append(seconds)
+        if _tracing:
+            tid = threading.get_ident()
+            if tid not in _threads:
+                _threads[tid] = threading.current_thread().name
+            begin = (start if start is not None else _clock() - seconds) - _t0
+            _events.append({"name": name, "ph": "X", "ts": begin * 1e6, "dur": seconds * 1e6, "pid": os.getpid(), "tid": tid})
+
+def count(name, n=1):
+    if not _on:
+        return
+    with _lock:
+        value = _counters[name] = _counters.get(name, 0) + n
+        if _tracing:
+            _events.append({"name": name, "ph": "C", "ts": (_clock() - _t0) * 1e6, "pid": os.getpid(), "args": {"value": value}})
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = _clock()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, _clock() - self.start, self.start)
+        return False
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL = _NullSpan()
+
+def span(name):
+    # with perf.span("extract.ocr"): ...
+    return _Span(name) if _on else _NULL
+
+def timed(name):
+    # decorator form of span; keeps __name__ (the extraction cache keys on it)
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _on:
+                return fn(*args, **kwargs)
+            start = _clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(name, _clock() - start, start)
+        return wrapper
+    return deco
+
+def _pct(sorted_samples, p):
+    return sorted_samples[min(len(sorted_samples) - 1, int(p * len(sorted_samples)))]
+
+def stats():
+    # -> {name: {n, p50_ms, p95_ms, p99_ms, max_ms, total_s}}, plus counters under "counters"
+    with _lock:
+        snap = {name: (st.n, st.total, st.max, sorted(st.recent)) for name, st in _stats.items()}
+        counters = dict(_counters)
+    out = {}
+    for name, (n, total, mx, s) in snap.items():
+        out[name] = {"n": n, "p50_ms": _pct(s, 0.50) * 1000, "p95_ms": _pct(s, 0.95) * 1000,
+                     "p99_ms": _pct(s, 0.99) * 1000, "max_ms": mx * 1000, "total_s": total}
+    return out, counters
+
+def report_lines():
+    timers, counters = stats()
+    lines = [f"{'timer':24} {'n':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'total':>8}"]
+    for name, s in sorted(timers.items(), key=lambda kv: -kv[1]["total_s"]):
+        lines.append(f"{name:24} {s['n']:>7} {s['p50_ms']:>7.2f}ms {s['p95_ms']:>7.2f}ms "
+                     f"{s['p99_ms']:>7.2f}ms {s['max_ms']:>7.2f}ms {s['total_s']:>7.2f}s")
+    if counters:
+        lines.append("")
+        lines += [f"{name:24} {value:>7}" for name, value in sorted(counters.items())]
+    return lines
+
+def dump(path):
+    # Chrome trace event format (JSON object form)
+    with _lock:
+        events = list(_events)
+        threads = dict(_threads)
+    pid = os.getpid()
+    meta = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}} for tid, name in threads.items()]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": meta + events, "displayTimeUnit": "ms"}, f)
+    return len(events)
+
+if os.environ.get("ZEET_PERF"):
+    enable(trace=os.environ.get("ZEET_PERF") == "trace")
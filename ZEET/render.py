@@ -1,15 +1,19 @@
 from __future__ import annotations  # for forward type references
+import time
+import asyncio
+from collections import deque
 from prompt_toolkit import Application
-from prompt_toolkit.layout import Layout, HSplit, VSplit, Window
+from prompt_toolkit.filters import Condition, has_focus
+from prompt_toolkit.layout import Layout, HSplit, VSplit, Window, DynamicContainer, ConditionalContainer
 from prompt_toolkit.layout.controls import FormattedTextControl
 from prompt_toolkit.widgets import TextArea, Frame
-from prompt_toolkit.key_binding import KeyBindings
-from prompt_toolkit.styles import Style
-from prompt_toolkit.shortcuts import input_dialog, message_dialog
+from prompt_toolkit.key_binding import KeyBindings, DynamicKeyBindings
+from prompt_toolkit.styles import Style, DynamicStyle, merge_styles
 
-from rich.console import Console
-from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn
+import perf
 import soundsfn
+import hive
+from grading import auto_grade, grade_many # grading lives on its own so headless tools don't pull in the UI
 
 def menu_render(menu, selected):
     lines = []
@@ -22,42 +26,280 @@ def menu_render(menu, selected):
     lines.append(("", "\n  Use ↑ ↓ and Enter. Toggle sound with 's'."))
     return lines
 
+# ---------- Shell: one long-lived Application, views swapped in place ----------
+BASE_STYLE = Style.from_dict({"notice": "bg:#33ff33 #000000 bold"})
+NOTICE_SECONDS = 2.5
+
+class View:
+    # one screen inside the Shell: a container, its key bindings, a style and what gets focus
+    container = None
+    focus = None
+    style = None
+
+    def __init__(self, shell):
+        self.shell = shell
+        self.kb = KeyBindings()
+
+    def enter(self, **kw):
+        pass
+
+class Shell:
+    """
+    Single prompt_toolkit Application for the whole run. Menu, carousel,
+    prompts and lists are Views swapped into one DynamicContainer, so changing
+    screens is a redraw instead of tearing down the terminal. Messages go to an
+    inline notice bar instead of modal dialogs.
+    Also counts redraws and times key press -> next paint (and, with perf on,
+    each frame).
+    """
+    def __init__(self, **app_kwargs):
+        self.views = {}
+        self.view = None
+        self._notice = None # (text, expires_at)
+        self.redraws = 0
+        self.latencies = deque(maxlen=1024) # seconds from a key press to the paint after it
+        self._key_t = None
+        self._frame_t = None
+        notice_win = ConditionalContainer(
+            Window(FormattedTextControl(lambda: [("class:notice", f" {self._notice[0]} ")]), height=1),
+            filter=Condition(self._notice_active))
+        root = HSplit([DynamicContainer(lambda: self.view.container if self.view else Window()), notice_win])
+        self.app = Application(
+            layout=Layout(root),
+            key_bindings=DynamicKeyBindings(lambda: self.view.kb if self.view else None),
+            style=DynamicStyle(lambda: merge_styles([BASE_STYLE, self.view.style]) if self.view and self.view.style else BASE_STYLE),
+            full_screen=True,
+            **app_kwargs)
+        self.app.before_render += self._before_render
+        self.app.after_render += self._after_render
+        self.app.key_processor.before_key_press += self._before_key
+
+    def add(self, name, view):
+        self.views[name] = view
+        return view
+
+    def show(self, name, **kw):
+        view = self.views[name]
+        view.enter(**kw)
+        self.view = view
+        if view.focus is not None:
+            self.app.layout.focus(view.focus)
+        self.app.invalidate()
+
+    def notify(self, text, seconds=NOTICE_SECONDS):
+        self._notice = (text, time.monotonic() + seconds)
+        self.app.invalidate()
+        try:
+            # repaint once more when it expires so the bar goes away
+            asyncio.get_running_loop().call_later(seconds + 0.05, self.app.invalidate)
+        except RuntimeError:
+            pass
+
+    def _notice_active(self):
+        return self._notice is not None and time.monotonic() < self._notice[1]
+
+    def _before_key(self, _):
+        if self._key_t is None:
+            self._key_t = time.perf_counter()
+
+    def _before_render(self, _):
+        if perf.enabled():
+            self._frame_t = time.perf_counter()
+
+    def _after_render(self, _):
+        self.redraws += 1
+        now = time.perf_counter()
+        if self._frame_t is not None:
+            perf.observe("render.frame", now - self._frame_t, self._frame_t)
+            self._frame_t = None
+        if self._key_t is not None:
+            self.latencies.append(now - self._key_t)
+            perf.observe("render.input_to_paint", now - self._key_t, self._key_t)
+            self._key_t = None
+
+    def stats(self):
+        lat = sorted(self.latencies)
+        def pct(p):
+            return lat[min(len(lat) - 1, int(p * len(lat)))] * 1000 if lat else 0.0
+        return {"redraws": self.redraws, "samples": len(lat),
+                "p50_ms": pct(0.50), "p95_ms": pct(0.95), "max_ms": lat[-1] * 1000 if lat else 0.0}
+
+    def stats_text(self):
+        s = self.stats()
+        return f"redraws {s['redraws']}  |  input→paint p50 {s['p50_ms']:.1f}ms  p95 {s['p95_ms']:.1f}ms  max {s['max_ms']:.1f}ms"
+
+    def run(self, start, **kw):
+        self.show(start, **kw)
+        return self.app.run()
+
+    def exit(self, result=None):
+        self.app.exit(result=result)
+
+# ---------- Menu ----------
+class MenuView(View):
+    def __init__(self, shell, menu, style, SETTINGS, toggle_sound, on_select):
+        super().__init__(shell)
+        self.menu = menu
+        self.style = style
+        self.selected = 0
+        menu_window = Window(FormattedTextControl(lambda: menu_render(menu, self.selected), focusable=True), height=10)
+        body = TextArea(text="Press Enter to choose, 's' toggles sound.", height=6, read_only=True, focusable=False)
+        status = FormattedTextControl(lambda: [("class:cmd", f" sound: {'ON' if SETTINGS['sound'] else 'OFF'}  |  Commands: ::quit ::mark ::explain ::<n> ::ui ::perf ")])
+        status_win = Window(status, height=1)
+        self.container = HSplit([Frame(menu_window), Frame(body), status_win])
+        self.focus = menu_window
+
+        kb = self.kb
+
+        @kb.add("up")
+        def _up(event):
+            self.selected = (self.selected - 1) % len(menu)
+            soundsfn.play("SWITCH")
+
+        @kb.add("down")
+        def _down(event):
+            self.selected = (self.selected + 1) % len(menu)
+            soundsfn.play("SWITCH")
+
+        @kb.add("s")
+        def _s(event):
+            toggle_sound()
+
+        @kb.add("enter")
+        def _enter(event):
+            soundsfn.play("BUTTON")
+            on_select(menu[self.selected])
 
 def start_menu(menu, styleMenu, SETTINGS, toggle_sound, selected_ref):
-    # selected_ref should be a one-element list, e.g. [0]
-    menu_control = FormattedTextControl(lambda: menu_render(menu, selected_ref[0]))
-    menu_window = Window(menu_control, height=10)
-    body = TextArea(text="Press Enter to choose, 's' toggles sound.", height=6)
-    status = FormattedTextControl(lambda: [("class:cmd", f" sound: {'ON' if SETTINGS['sound'] else 'OFF'}  |  Commands: ::quit ::mark ::explain ::<n> ")])
-    status_win = Window(status, height=1)
-
-    kb = KeyBindings()
-
-    @kb.add("up")
-    def _up(event):
-        selected_ref[0] = (selected_ref[0] - 1) % len(menu)
-        soundsfn.play("SWITCH")
-        event.app.invalidate()
-
-    @kb.add("down")
-    def _down(event):
-        selected_ref[0] = (selected_ref[0] + 1) % len(menu)
-        soundsfn.play("SWITCH")
-        event.app.invalidate()
-
-    @kb.add("s")
-    def _s(event):
-        toggle_sound()
-        event.app.invalidate()
-
-    @kb.add("enter")
-    def _enter(event):
-        soundsfn.play("BUTTON")
-        event.app.exit(result=menu[selected_ref[0]])
+    # standalone menu (own Shell); selected_ref should be a one-element list, e.g. [0]
+    shell = Shell()
+    view = shell.add("menu", MenuView(shell, menu, styleMenu, SETTINGS, toggle_sound, on_select=shell.exit))
+    view.selected = selected_ref[0]
+    result = shell.run("menu")
+    selected_ref[0] = view.selected
+    return result
+
+# ---------- Inline prompt (replaces input_dialog) ----------
+class PromptView(View):
+    def __init__(self, shell, style=None):
+        super().__init__(shell)
+        self.style = style
+        self.title = ""
+        self.text = ""
+        self.on_submit = None
+        self.input = TextArea(height=1, multiline=False, prompt="> ")
+        self.input.accept_handler = self._accept
+        self.container = Frame(HSplit([Window(FormattedTextControl(lambda: self.text), wrap_lines=True), self.input]),
+                               title=lambda: self.title, style="class:dialog.body")
+        self.focus = self.input
+
+        @self.kb.add("escape")
+        def _esc(event):
+            self.on_submit(None)
+
+    def enter(self, title="", text="", on_submit=None, default=""):
+        self.title = title
+        self.text = text
+        self.on_submit = on_submit
+        self.input.text = default
+
+    def _accept(self, buff):
+        self.on_submit(self.input.text)
+        return False
+
+# ---------- Paged, searchable list (resume / settings) ----------
+class ListView(View):
+    def __init__(self, shell, style=None):
+        super().__init__(shell)
+        self.style = style
+        self.title = ""
+        self.provider = None # (query, page, per_page) -> ([(label, value)], total)
+        self.on_pick = None
+        self.on_cancel = None
+        self.per_page = 10
+        self.query = ""
+        self.page = 0
+        self.selected = 0
+        self.rows, self.total = [], 0
+        list_window = Window(FormattedTextControl(self._render, focusable=True))
+        self.search = TextArea(height=1, multiline=False, prompt="/ ")
+        self.search.accept_handler = self._search
+        self.container = Frame(HSplit([list_window, self.search]), title=lambda: self.title, style="class:dialog.body")
+        self.focus = list_window
+
+        kb = self.kb
+        in_list = Condition(lambda: self.shell.app.layout.current_window is list_window)
+
+        @kb.add("up", filter=in_list)
+        def _up(event):
+            if self.rows:
+                self.selected = (self.selected - 1) % len(self.rows)
+
+        @kb.add("down", filter=in_list)
+        def _down(event):
+            if self.rows:
+                self.selected = (self.selected + 1) % len(self.rows)
+
+        @kb.add("pagedown", filter=in_list)
+        @kb.add("n", filter=in_list)
+        def _next(event):
+            self._goto(self.page + 1)
+
+        @kb.add("pageup", filter=in_list)
+        @kb.add("p", filter=in_list)
+        def _prev(event):
+            self._goto(self.page - 1)
+
+        @kb.add("/", filter=in_list)
+        def _slash(event):
+            event.app.layout.focus(self.search)
+
+        @kb.add("enter", filter=in_list)
+        def _enter(event):
+            if self.rows:
+                soundsfn.play("BUTTON")
+                self.on_pick(self.rows[self.selected][1])
+
+        @kb.add("escape")
+        def _esc(event):
+            self.on_cancel()
 
-    root = HSplit([Frame(menu_window), Frame(body), status_win])
-    app = Application(layout=Layout(root), key_bindings=kb, style=styleMenu, full_screen=True)
-    return app.run()
+    def pages(self):
+        return max(1, -(-self.total // self.per_page))
+
+    def refresh(self):
+        self.rows, self.total = self.provider(self.query, self.page, self.per_page)
+        self.selected = min(self.selected, max(0, len(self.rows) - 1))
+
+    def _goto(self, page):
+        page = max(0, min(page, self.pages() - 1))
+        if page != self.page:
+            self.page = page
+            self.selected = 0
+            self.refresh()
+
+    def _search(self, buff):
+        self.query, self.page, self.selected = self.search.text, 0, 0
+        self.refresh()
+        self.shell.app.layout.focus(self.focus)
+        return True
+
+    def enter(self, title="", provider=None, on_pick=None, on_cancel=None, per_page=10):
+        self.title, self.provider, self.on_pick, self.on_cancel = title, provider, on_pick, on_cancel
+        self.per_page = per_page
+        self.query, self.page, self.selected = "", 0, 0
+        self.search.text = ""
+        self.refresh()
+
+    def _render(self):
+        head = f"{self.total} item(s)" + (f" matching '{self.query}'" if self.query else "") + f"  —  page {self.page + 1}/{self.pages()}\n\n"
+        lines = [("", head)]
+        for i, (label, _) in enumerate(self.rows):
+            lines.append(("reverse" if i == self.selected else "", f" {label}\n"))
+        if not self.rows:
+            lines.append(("", " (nothing here)\n"))
+        lines.append(("", "\n ↑↓ Enter pick  n/p page  / search  Esc back"))
+        return lines
 
 # ---------- Carousel interactive mode ----------
 def progress_text(sess): #the sess should be equivalent to Session
@@ -77,106 +319,255 @@ def render_question_text(q): #q should be equivalent to QuestionState
         out.append(f"\nYour answer: {q.user_response}\n")
     return "".join(out)
 
-def auto_grade(q) -> float:
-    if q.type == "mcq":
-        try:
-            if q.user_response is None:
-                return 0.0
-            return float(q.points) if str(q.user_response) == str(q.answer) else 0.0
-        except Exception:
-            return 0.0
-    elif q.type in ("short", "essay"):
-        if not q.user_response or not q.answer:
-            return 0.0
-        ans_tokens = set(str(q.answer).lower().split())
-        usr = set(str(q.user_response).lower().split())
-        if not ans_tokens:
-            return 0.0
-        overlap = len(ans_tokens & usr)
-        return round(q.points * (overlap / max(1, len(ans_tokens))), 2)
-    return 0.0
+class RenderCache:
+    # rendered question text per index; reused until that question's answer or score changes
+    def __init__(self, render=render_question_text):
+        self.render = render
+        self._cache = {}
+        self.hits = 0
+        self.misses = 0
 
-def interactive_carousel(sess):
-    q_area = TextArea(text="", height=15, scrollbar=True)
-    status = FormattedTextControl(lambda: [("class:cmd", progress_text(sess))])
-    status_win = Window(status, height=1)
-    cmd = TextArea(prompt=":: ", height=1, multiline=False)
+    def get(self, idx, q):
+        stamp = (q.user_response, q.score)
+        hit = self._cache.get(idx)
+        if hit is not None and hit[0] == stamp:
+            self.hits += 1
+            return hit[1]
+        self.misses += 1
+        text = self.render(q)
+        self._cache[idx] = (stamp, text)
+        return text
+
+    def invalidate(self, idx=None):
+        if idx is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(idx, None)
+
+NAV_WIDTH = 14
+
+class QuestionNavigator:
+    # side panel listing questions with answered/graded status; only the rows that fit get built
+    def __init__(self, sess, width=NAV_WIDTH):
+        self.sess = sess
+        self.window = Window(FormattedTextControl(self.render), width=width)
+
+    def height(self):
+        info = self.window.render_info
+        return info.window_height if info is not None else 20
+
+    def render(self):
+        qs = self.sess.questions
+        n = len(qs)
+        h = max(1, self.height())
+        cur = self.sess.current_index
+        top = min(max(0, cur - h // 2), max(0, n - h)) # keep the current question centred
+        lines = []
+        for i in range(top, min(n, top + h)):
+            q = qs[i]
+            mark = "✓" if q.score is not None else ("•" if q.user_response else "·")
+            style = "class:nav.current" if i == cur else "class:nav"
+            lines.append((style, f"{'→' if i == cur else ' '}{mark} Q{i + 1}\n"))
+        return lines
+
+CAROUSEL_STYLE = Style.from_dict({
+    "title": "#00ffff bold",
+    "cmd": "bg:#222222 #cccccc",
+    "nav": "#aaaaaa",
+    "nav.current": "reverse bold",
+})
+
+EXPLAIN_CITATIONS = 3
+PERF_REFRESH = 1.0 # seconds between ::perf table refreshes
+COMMANDS = ("mark", "explain", "ui", "perf") # ::<n> and ::quit are always available
+PERF_TRACE = "perf_trace.json"
+
+class CarouselView(View):
+    def __init__(self, shell, on_quit, commands=COMMANDS):
+        super().__init__(shell)
+        self.style = CAROUSEL_STYLE
+        self.on_quit = on_quit # called with the saved path on ::quit
+        self.commands = frozenset(commands) # which :: commands this carousel accepts (the exam hall allows none)
+        self.sess = None
+        self.cache = RenderCache()
+        self.q_area = TextArea(text="", height=15, scrollbar=True)
+        status = FormattedTextControl(lambda: [("class:cmd", progress_text(self.sess) + "  |  · open  • answered  ✓ graded  PgUp/PgDn Home/End")])
+        status_win = Window(status, height=1)
+        self.cmd = TextArea(prompt=":: ", height=1, multiline=False)
+        self.cmd.accept_handler = self.handle_cmd
+        self.nav = QuestionNavigator(None)
+        self._perf_live = False # ::perf table showing in q_area
+        self.container = HSplit([Frame(Window(FormattedTextControl(lambda: [("class:title", f"  Interactive — {self.sess.title}")]), height=1)),
+                                 VSplit([Frame(self.q_area, title="Question"), Frame(self.nav.window, title="Qs")]),
+                                 status_win,
+                                 self.cmd])
+        self.focus = self.q_area
+
+        kb = self.kb
+
+        @kb.add("left")
+        def _left(event):
+            self.jump(self.sess.current_index - 1)
+
+        @kb.add("right")
+        def _right(event):
+            self.jump(self.sess.current_index + 1)
 
-    def show_q():
-        q_area.text = render_question_text(sess.questions[sess.current_index])
+        @kb.add("pageup")
+        def _pgup(event):
+            self.jump(self.sess.current_index - self.nav.height())
 
-    def handle_cmd(buff):
-        text = cmd.text.strip()
-        cmd.text = ""
+        @kb.add("pagedown")
+        def _pgdn(event):
+            self.jump(self.sess.current_index + self.nav.height())
+
+        @kb.add("home")
+        def _home(event):
+            self.jump(0)
+
+        @kb.add("end")
+        def _end(event):
+            self.jump(len(self.sess.questions) - 1)
+
+        @kb.add("enter", filter=~has_focus(self.cmd)) # in the command box Enter submits instead
+        def _enter(event):
+            # focus command box for typing answer
+            event.app.layout.focus(self.cmd)
+            soundsfn.play("BUTTON")
+
+    def enter(self, sess=None):
+        self.sess = sess
+        self.nav.sess = sess
+        self.cache.invalidate()
+        self.cmd.text = ""
+        self.show_q()
+
+    def show_q(self):
+        self._perf_live = False
+        self.q_area.text = self.cache.get(self.sess.current_index, self.sess.questions[self.sess.current_index])
+
+    def jump(self, idx):
+        sess = self.sess
+        idx = max(0, min(idx, len(sess.questions) - 1))
+        if idx != sess.current_index:
+            sess.goto(idx)
+            soundsfn.play("SWITCH")
+            self.show_q()
+
+    def handle_cmd(self, buff):
+        sess, notify = self.sess, self.shell.notify
+        text = self.cmd.text.strip()
+        self.cmd.text = ""
         if not text:
             return
         if text == "::quit":
             path = sess.save()
+            sess.close()
             soundsfn.play("GRADE")
-            message_dialog(title="Saved", text=f"Session saved to {path}").run()
-            raise SystemExit("Quitting (saved).")
+            self.on_quit(path)
+            return
         if text.startswith("::"):
             tkn = text[2:].split()
             head = tkn[0] if tkn else ""
             if head.isdigit():
                 idx = int(head) - 1
                 if 0 <= idx < len(sess.questions):
-                    sess.current_index = idx
-                    show_q()
+                    self.jump(idx)
+            elif head not in self.commands:
+                notify(f"Unknown command: {text}")
             elif head == "mark":
                 if "-a" in tkn:
-                    for qq in sess.questions:
-                        qq.score = auto_grade(qq)
+                    # batched: questions sharing an answer key are scored together
+                    sess.record_many((i, {"score": score}) for i, score in enumerate(grade_many(sess.questions)))
                     soundsfn.play("GRADE")
-                    message_dialog(title="Marked", text="All questions auto-graded").run()
+                    notify("All questions auto-graded")
                 else:
                     q = sess.questions[sess.current_index]
-                    q.score = auto_grade(q)
+                    sess.record(sess.current_index, score=auto_grade(q))
                     soundsfn.play("GRADE")
-                    message_dialog(title="Marked", text=f"Q{q.id} -> {q.score}/{q.points}").run()
+                    notify(f"Marked Q{q.id} -> {q.score}/{q.points}")
+                self.show_q()
             elif head == "explain":
-                q = sess.questions[sess.current_index]
-                message_dialog(title=f"Explain Q{q.id}", text=f"Answer: {q.answer}\n\n(Placeholder explanation; hook LLM here)").run()
+                self.explain(sess.questions[sess.current_index])
+            elif head == "ui":
+                notify(self.shell.stats_text(), seconds=5)
+            elif head == "perf":
+                self.perf(tkn[1:])
             else:
-                message_dialog(title="Unknown", text=f"Unknown command: {text}").run()
+                notify(f"Unknown command: {text}")
             return
         # otherwise treat as answer
         q = sess.questions[sess.current_index]
-        q.user_response = text
-        message_dialog(title="Saved answer", text=f"Recorded for Q{q.id}").run()
-        show_q()
+        sess.record(sess.current_index, user_response=text) # journaled, compacted in the background
+        notify(f"Recorded answer for Q{q.id}")
+        self.show_q()
 
-    cmd.accept_handler = lambda buff: handle_cmd(buff)
-
-    kb = KeyBindings()
+    def explain(self, q):
+        # supporting excerpts from the local HIVE index, shown under the question
+        index = hive.get_index()
+        if index is None:
+            self.shell.notify("No HIVE index yet — run: python hive.py sync documents/", seconds=5)
+            return
+        options = " ".join(q.options or []) if q.type == "mcq" else ""
+        cites = index.search(f"{q.stem} {options} {q.answer or ''}", k=EXPLAIN_CITATIONS)
+        if not cites:
+            self.shell.notify(f"Explain Q{q.id}: no supporting excerpts found")
+            return
+        lines = [self.cache.get(self.sess.current_index, q).rstrip("\n"), "\n\n— Sources —\n"]
+        for c in cites:
+            lines.append(f"[{c['source_id']}] {c['excerpt']}\n")
+        self._perf_live = False
+        self.q_area.text = "".join(lines) # next navigation/answer redraws the plain question
+        soundsfn.play("BUTTON")
 
-    @kb.add("left")
-    def _left(event):
-        if sess.current_index > 0:
-            sess.current_index -= 1
-            soundsfn.play("SWITCH")
-            show_q()
+    def perf(self, args):
+        # ::perf [on|off|reset|dump [file]] — bare ::perf shows the live table until you navigate away
+        notify = self.shell.notify
+        sub = args[0] if args else ""
+        if sub == "on":
+            perf.enable()
+            notify("perf: recording")
+        elif sub == "off":
+            perf.disable()
+            notify("perf: off")
+        elif sub == "reset":
+            perf.reset()
+            notify("perf: counters cleared")
+        elif sub == "dump":
+            path = args[1] if len(args) > 1 else PERF_TRACE
+            if not perf.tracing():
+                perf.enable(trace=True) # nothing was kept yet; start now so the next dump has events
+                notify(f"perf: tracing started — run ::perf dump again to write {path}", seconds=4)
+                return
+            n = perf.dump(path)
+            notify(f"perf: {n} events -> {path} (chrome://tracing / Perfetto)", seconds=4)
+        elif sub:
+            notify(f"Unknown command: ::perf {' '.join(args)}")
+        else:
+            if not perf.enabled():
+                perf.enable()
+                notify("perf: recording (was off)")
+            self.q_area.text = self._perf_text()
+            if not self._perf_live:
+                self._perf_live = True
+                self.shell.app.create_background_task(self._perf_refresh())
 
-    @kb.add("right")
-    def _right(event):
-        if sess.current_index < len(sess.questions) - 1:
-            sess.current_index += 1
-            soundsfn.play("SWITCH")
-            show_q()
+    def _perf_text(self):
+        return "— perf (live until you navigate away) —\n" + "\n".join(perf.report_lines()) + "\n"
 
-    @kb.add("enter")
-    def _enter(event):
-        # focus command box for typing answer
-        event.app.layout.focus(cmd)
-        soundsfn.play("BUTTON")
+    async def _perf_refresh(self):
+        while True:
+            await asyncio.sleep(PERF_REFRESH)
+            if not self._perf_live or self.shell.view is not self:
+                self._perf_live = False
+                return
+            self.q_area.text = self._perf_text()
+            self.shell.app.invalidate()
 
-    root = HSplit([Frame(Window(FormattedTextControl(lambda: [("class:title", f"  Interactive — {sess.title}")]), height=1)),
-                   Frame(q_area, title="Question"),
-                   status_win,
-                   cmd])
-    app = Application(layout=Layout(root), key_bindings=kb, full_screen=True, style=Style.from_dict({
-        "title": "#00ffff bold",
-        "cmd": "bg:#222222 #cccccc",
-    }))
-    show_q()
-    app.run()
\ No newline at end of file
+def interactive_carousel(sess):
+    # standalone carousel (own Shell), kept for callers outside zeet.main
+    shell = Shell()
+    shell.add("carousel", CarouselView(shell, on_quit=shell.exit))
+    path = shell.run("carousel", sess=sess)
+    if path is not None:
+        raise SystemExit(f"Quitting (saved to {path}).")
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+ZEET exam hall — many candidates, one asyncio process
+
+Each telnet (or, with asyncssh installed, SSH) connection gets its own Shell
+with the carousel, running on the shared event loop. The question bank is
+read once into memory and shared read-only; a candidate's Session holds only
+their own draw of questions, answers and scores. Answers are journaled
+without a per-answer fsync and one background task syncs every dirty journal
+per SYNC_INTERVAL (group commit), so 200 candidates typing don't queue behind
+200 fsyncs on the event loop.
+
+Usage:
+  python server.py --bank bank.db --subject CCNA --port 2323
+  telnet lab-server 2323                     # candidate enters their ID, exam starts (answers, ::<n>, ::quit)
+  python server.py --ssh 8022 --host-key ssh_host_key   # needs asyncssh
+  python bench_server.py --clients 200       # load test
+"""
+
+import gc
+import re
+import sys
+import asyncio
+import random
+import argparse
+from pathlib import Path
+
+from prompt_toolkit.contrib.telnet.server import TelnetServer
+
+import render
+import soundsfn
+from bank import QuestionBank
+from structures import QuestionState, Session
+
+ROOT = Path.cwd()
+SESSIONS_DIR = ROOT / "sessions"
+BANK_PATH = ROOT / "bank.db"
+
+EXAM_SIZE = 50 # questions per candidate
+SYNC_INTERVAL = 1.0 # seconds between journal group commits
+BACKLOG = 512 # pending connections; a hall logs in all at once
+GC_THRESHOLD = 20_000 # gen0 allocations between collections; every repaint allocates a whole screen
+_CANDIDATE = re.compile(r"^[A-Za-z0-9_.-]{1,32}$")
+
+class HallError(Exception):
+    pass
+
+class ExamHall:
+    """
+    Shared state for every connection: the question pool (loaded once,
+    never mutated) and the sessions that are currently open.
+    """
+    def __init__(self, pool, title, sessions_dir: Path = SESSIONS_DIR, n=EXAM_SIZE):
+        self.pool = pool # [QuestionState] templates; per-candidate copies share their strings
+        self.title = title
+        self.sessions_dir = Path(sessions_dir)
+        self.n = min(n, len(pool))
+        self.active = {} # candidate -> Session
+        self.sessions_dir.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_bank(cls, bank_path: Path, subject=None, **kw):
+        bank = QuestionBank(bank_path)
+        try:
+            pool = [QuestionState(r["id"], r["type"], r["stem"], r["options"], r["answer"], points=r["points"])
+                    for r in bank.iter_questions(subject=subject)]
+        finally:
+            bank.close()
+        if not pool:
+            raise HallError(f"no questions in {bank_path}" + (f" for subject {subject!r}" if subject else ""))
+        return cls(pool, title=subject or "exam", **kw)
+
+    def draw(self, candidate):
+        # each candidate gets their own (reproducible) selection and order
+        rng = random.Random(f"{self.title}:{candidate}")
+        picks = rng.sample(range(len(self.pool)), self.n)
+        return [QuestionState(i + 1, t.type, t.stem, t.options, t.answer, points=t.points)
+                for i, t in enumerate(self.pool[j] for j in picks)]
+
+    def open(self, candidate):
+        # -> the candidate's Session, resumed if they've been here before (reconnects keep their answers)
+        if not _CANDIDATE.match(candidate):
+            raise HallError("Candidate ID: letters, digits, . _ - only (max 32)")
+        if candidate in self.active:
+            raise HallError(f"{candidate} is already signed in on another terminal")
+        title = f"{self.title}_{candidate}"
+        path = self.sessions_dir / f"{title.replace(' ', '_')}.json"
+        if path.exists():
+            sess = Session.load(path)
+            sess.attach(fsync=False)
+        else:
+            sess = Session(title=title, questions=self.draw(candidate), metadata={"candidate": candidate})
+            sess.attach(self.sessions_dir, fsync=False)
+        self.active[candidate] = sess
+        return sess
+
+    async def release(self, candidate):
+        # final compaction off the loop; no-op if ::quit already closed it
+        sess = self.active.pop(candidate, None)
+        if sess is not None:
+            await asyncio.to_thread(sess.close)
+
+    async def sync_forever(self, interval=SYNC_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            sessions = list(self.active.values())
+            if sessions:
+                await asyncio.to_thread(lambda: [s.sync() for s in sessions])
+
+    async def interact(self, connection=None):
+        # one candidate terminal: sign in, then the carousel until ::quit or disconnect
+        shell = render.Shell()
+        # answers, ::<n> and ::quit only: no marking (scores would let a candidate search for the key),
+        # no ::explain (it searches with the answer), no ::perf (process-wide state, server-side file paths)
+        shell.add("carousel", render.CarouselView(shell, on_quit=shell.exit, commands=()))
+        shell.add("prompt", render.PromptView(shell))
+        signed_in = []
+
+        def sign_in(candidate):
+            if candidate is None:
+                shell.exit(None)
+                return
+            try:
+                sess = self.open(candidate.strip())
+            except HallError as e:
+                shell.notify(str(e), seconds=4)
+                return
+            signed_in.append(candidate.strip())
+            shell.show("carousel", sess=sess)
+
+        shell.show("prompt", title=f"ZEET exam hall — {self.title}", text="Candidate ID:", on_submit=sign_in)
+        try:
+            await shell.app.run_async()
+        finally:
+            for candidate in signed_in:
+                await self.release(candidate)
+
+class HallTelnetServer(TelnetServer):
+    @classmethod
+    def _create_socket(cls, host, port):
+        # prompt_toolkit listens with a backlog of 4, too small for a room signing in at once
+        s = super()._create_socket(host, port)
+        s.listen(BACKLOG)
+        return s
+
+async def _run_ssh(hall, host, port, host_key):
+    try:
+        import asyncssh
+        from prompt_toolkit.contrib.ssh import PromptToolkitSSHServer
+    except ImportError:
+        raise HallError("--ssh needs asyncssh (pip install asyncssh)")
+    await asyncssh.create_server(lambda: PromptToolkitSSHServer(hall.interact), host, port,
+                                 server_host_keys=[host_key])
+
+async def serve(hall, host="127.0.0.1", port=2323, ssh_port=None, host_key=None, ready=None):
+    telnet = HallTelnetServer(host=host, port=port, interact=hall.interact, enable_cpr=False)
+    syncer = asyncio.create_task(hall.sync_forever())
+    if ssh_port:
+        await _run_ssh(hall, host, ssh_port, host_key)
+    try:
+        await telnet.run(ready_cb=ready)
+    finally:
+        syncer.cancel()
+        for candidate in list(hall.active):
+            await hall.release(candidate)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Serve ZEET exams to many terminals from one process.")
+    ap.add_argument("--bank", default=str(BANK_PATH))
+    ap.add_argument("--subject", default=None, help="only questions of this subject (also names the exam)")
+    ap.add_argument("--questions", type=int, default=EXAM_SIZE, help="questions per candidate")
+    ap.add_argument("--sessions", default=str(SESSIONS_DIR), help="where candidate sessions are saved")
+    ap.add_argument("--host", default="127.0.0.1", help="bind address (0.0.0.0 for the whole lab)")
+    ap.add_argument("--port", type=int, default=2323, help="telnet port")
+    ap.add_argument("--ssh", type=int, default=None, metavar="PORT", help="also serve over SSH (asyncssh)")
+    ap.add_argument("--host-key", default="ssh_host_key", help="SSH host key file")
+    args = ap.parse_args(argv)
+
+    soundsfn.set_enabled(False) # the mixer would be on the server, not in front of the candidate
+    try:
+        hall = ExamHall.from_bank(Path(args.bank), subject=args.subject, sessions_dir=Path(args.sessions), n=args.questions)
+    except HallError as e:
+        print(e, file=sys.stderr)
+        return 2
+    # the pool and everything imported so far live for the whole exam: keep them out of every collection,
+    # and collect less often — with hundreds of apps resident, the default gen0 threshold runs GC per repaint
+    gc.freeze()
+    gc.set_threshold(GC_THRESHOLD, 20, 20)
+    ready = lambda: print(f"exam hall {hall.title!r}: {len(hall.pool)} questions, {hall.n} per candidate, "
+                          f"telnet {args.host}:{args.port}", file=sys.stderr, flush=True)
+    try:
+        asyncio.run(serve(hall, args.host, args.port, args.ssh, args.host_key, ready=ready))
+    except HallError as e:
+        print(e, file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
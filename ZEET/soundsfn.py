@@ -1,8 +1,15 @@
-import pygame
-import threading
+import os
 import sys
+import time
+import queue
+import threading
 from pathlib import Path
 
+import perf
+
+# pygame is imported on the audio thread (see SoundPlayer._run) so importing this module is free
+pygame = None
+
 # Directory for sounds
 ROOT = Path.cwd()
 SOUNDS_DIR = ROOT / "sounds"
@@ -15,57 +22,162 @@ SOUND_KEYS = {
     "GRADE": SOUNDS_DIR / "grade.mp3",
 }
 
-# Sound player class
+QUEUE_SIZE = 16 # pending commands before new events get dropped
+MIN_INTERVAL = 0.035 # same event again within this window is coalesced into the previous one
+
+# Sound player: one long-lived audio thread fed by a bounded queue
 class SoundPlayer:
-    def __init__(self, enabled=True):
+    def __init__(self, enabled=True, queue_size=QUEUE_SIZE, min_interval=MIN_INTERVAL):
         self.enabled = enabled
-        self.cache = {}
-        self.lock = threading.Lock()
-        if self.enabled:
-            try:
-                pygame.mixer.init()
-            except Exception:
-                self.enabled = False
-                print("Warning: pygame mixer init failed; sound disabled.", file=sys.stderr)
-
-    def load(self, path: Path):
-        if not self.enabled or not path.exists():
-            return None
-        if str(path) in self.cache:
-            return self.cache[str(path)]
+        self.available = False # mixer is up
+        self.ready = threading.Event() # set once init finished, whether or not it worked
+        self.min_interval = min_interval
+        self.cache = {} # key -> decoded pygame Sound, filled before the first play
+        self.q = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock() # guards the counters/pending state below, never held during playback
+        self._pending = set() # keys already queued, a second press just merges in
+        self._last = {} # key -> time of last accepted event
+        self._thread = None
+        self.counters = {"played": 0, "coalesced": 0, "dropped": 0, "failed": 0}
+
+    # ---- audio thread ----
+    def _init_mixer(self):
+        global pygame
         try:
-            snd = pygame.mixer.Sound(str(path))
-            self.cache[str(path)] = snd
-            return snd
+            os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+            import pygame as _pygame
+            _pygame.mixer.init()
+            pygame = _pygame
+            self.available = True
         except Exception:
-            return None
+            self.available = False
+            print("Warning: pygame mixer init failed; sound disabled.", file=sys.stderr)
 
-    def play(self, path: Path):
-        if not self.enabled:
+    def _decode(self, key, path: Path):
+        if not path.exists():
             return
-        s = self.load(path)
-        if s is None:
+        try:
+            self.cache[key] = pygame.mixer.Sound(str(path))
+        except Exception:
+            self.cache.pop(key, None)
+
+    def _run(self):
+        self._init_mixer()
+        if self.available:
+            # predecode everything up front so the first key press doesn't stall on mp3 decoding
+            for key, path in list(SOUND_KEYS.items()):
+                self._decode(key, path)
+        self.ready.set()
+        while True:
+            cmd, key, arg = self.q.get()
+            if cmd == "stop":
+                return
+            if cmd == "load":
+                if self.available:
+                    self._decode(key, arg)
+                continue
+            with self.lock:
+                self._pending.discard(key)
+            snd = self.cache.get(key)
+            if snd is None:
+                continue
+            try:
+                snd.play() # non-blocking, pygame mixes on its own channels
+                self.counters["played"] += 1
+                perf.count("sound.played")
+            except Exception:
+                self.counters["failed"] += 1
+
+    def init_async(self):
+        with self.lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="zeet-audio", daemon=True)
+        self._thread.start()
+
+    def init(self):
+        # blocking variant: start the thread and wait for the mixer + predecode
+        self.init_async()
+        self.ready.wait()
+
+    # ---- producer side (UI thread) ----
+    @perf.timed("sound.dispatch")
+    def play(self, key: str):
+        if not self.enabled:
             return
-        def _p():
+        if self._thread is None:
+            self.init_async()
+        if not self.ready.is_set() or not self.available:
             with self.lock:
-                s.play()
-        threading.Thread(target=_p, daemon=True).start()
+                self.counters["dropped"] += 1
+            perf.count("sound.dropped")
+            return
+        now = time.monotonic()
+        with self.lock:
+            if key in self._pending or now - self._last.get(key, -1e9) < self.min_interval:
+                # key repeat / held arrow: one sound for the burst
+                self.counters["coalesced"] += 1
+                perf.count("sound.coalesced")
+                return
+            try:
+                self.q.put_nowait(("play", key, None))
+            except queue.Full:
+                self.counters["dropped"] += 1
+                perf.count("sound.dropped")
+                return
+            self._pending.add(key)
+            self._last[key] = now
+
+    def load(self, key: str, path: Path):
+        if self._thread is None:
+            return # picked up by the predecode pass when the thread starts
+        try:
+            self.q.put_nowait(("load", key, path))
+        except queue.Full:
+            pass
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, queued=self.q.qsize())
+
+    def shutdown(self, timeout=1.0):
+        if self._thread is None:
+            return
+        try:
+            self.q.put(("stop", None, None), timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
 
     def set_enabled(self, flag: bool):
         self.enabled = flag
 
 
-# single global instance
+# single global instance (audio thread starts on first init_async/play, not at import)
 _player = SoundPlayer(enabled=True)
 
 # simple API for other modules
 def set_enabled(flag: bool):
     _player.set_enabled(flag)
 
+def init_async():
+    _player.init_async()
+
+def wait_ready(timeout=None) -> bool:
+    return _player.ready.wait(timeout)
+
+def available() -> bool:
+    return _player.available
+
+def stats():
+    # played / coalesced / dropped / failed counters + current queue depth
+    return _player.stats()
+
 def play(name: str):
-    path = SOUND_KEYS.get(name.upper())
-    if path:
-        _player.play(path)
+    key = name.upper()
+    if key in SOUND_KEYS:
+        _player.play(key)
 
 def register(name: str, path: Path):
     SOUND_KEYS[name.upper()] = path
+    _player.load(name.upper(), path)
@@ -1,6 +1,12 @@
 
 # Standard‑library imports
+import os
+import sys
 import json                     # for saving / loading JSON files
+import time
+import tempfile
+import threading
+from array import array
 from pathlib import Path        # Path objects used in `save` / `load`
 
 # Dataclass utilities
@@ -9,6 +15,15 @@ from dataclasses import dataclass, field
 # Type‑hints for the data structures
 from typing import List, Optional, Dict
 
+import perf
+from manifest import SessionManifest
+
+# default place for snapshots, same as SESSIONS_DIR in zeet.py
+SESSIONS_DIR = Path.cwd() / "sessions"
+
+AUTOSAVE_DELAY = 2.0 # seconds of quiet before the journal gets folded into the snapshot
+AUTOSAVE_MAX_DELAY = 30.0 # ...but never let it grow longer than this under constant typing
+
 
 # Essential question Data structures
 @dataclass
@@ -22,27 +37,384 @@ class QuestionState:
     score: Optional[float] = None
     points: float = 1.0 # flexible non-integer points system
 
+
+# Compact columnar store for big banks: no per-question object or __dict__,
+# numbers live in typed arrays and all text in one utf-8 buffer
+_NONE = float("nan") # score column sentinel for "not graded"
+
+class QuestionColumns:
+    def __init__(self):
+        self.ids = array("q")
+        self.type_codes = array("H")
+        self.type_names: List[str] = [] # interned, usually just mcq/short/essay
+        self._type_index: Dict[str, int] = {}
+        self.points = array("d")
+        self.scores = array("d")
+        self.user_responses: List[Optional[str]] = [] # the only per-question python objects, mostly None
+        self.text = bytearray() # stems, options and answers back to back
+        self.stem_at = array("Q") # [start, end) pairs into text
+        self.answer_at = array("q") # [start, end) pairs, (-1, -1) for None
+        self.opt_range = array("Q") # per question [first, last) index into opt_at
+        self.opt_at = array("Q") # [start, end) pairs per option
+
+    def _put(self, s: str):
+        a = len(self.text)
+        self.text += s.encode("utf-8")
+        return a, len(self.text)
+
+    def _get(self, a, b):
+        return self.text[a:b].decode("utf-8")
+
+    def append(self, q):
+        d = q if isinstance(q, dict) else question_dict(q)
+        t = d["type"]
+        code = self._type_index.get(t)
+        if code is None:
+            code = self._type_index[t] = len(self.type_names)
+            self.type_names.append(sys.intern(t))
+        self.ids.append(int(d["id"]))
+        self.type_codes.append(code)
+        self.points.append(float(d.get("points", 1.0)))
+        score = d.get("score")
+        self.scores.append(_NONE if score is None else float(score))
+        self.user_responses.append(d.get("user_response"))
+        self.stem_at.extend(self._put(d["stem"]))
+        ans = d.get("answer")
+        self.answer_at.extend((-1, -1) if ans is None else self._put(str(ans)))
+        first = len(self.opt_at) // 2
+        for o in d.get("options") or ():
+            self.opt_at.extend(self._put(str(o)))
+        self.opt_range.extend((first, len(self.opt_at) // 2))
+
+    @classmethod
+    def from_dicts(cls, rows):
+        cols = cls()
+        for r in rows:
+            cols.append(r)
+        return cols
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [QuestionView(self, j) for j in range(*i.indices(len(self)))]
+        n = len(self.ids)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("question index out of range")
+        return QuestionView(self, i)
+
+    def __iter__(self):
+        for i in range(len(self.ids)):
+            yield QuestionView(self, i)
+
+class QuestionView:
+    # QuestionState-compatible handle onto one row of a QuestionColumns
+    __slots__ = ("_c", "_i")
+
+    def __init__(self, cols: QuestionColumns, i: int):
+        self._c = cols
+        self._i = i
+
+    @property
+    def id(self):
+        return self._c.ids[self._i]
+
+    @property
+    def type(self):
+        return self._c.type_names[self._c.type_codes[self._i]]
+
+    @property
+    def stem(self):
+        c, i = self._c, self._i
+        return c._get(c.stem_at[2 * i], c.stem_at[2 * i + 1])
+
+    @property
+    def options(self):
+        c, i = self._c, self._i
+        return [c._get(c.opt_at[2 * k], c.opt_at[2 * k + 1]) for k in range(c.opt_range[2 * i], c.opt_range[2 * i + 1])]
+
+    @property
+    def answer(self):
+        c, i = self._c, self._i
+        a = c.answer_at[2 * i]
+        return None if a < 0 else c._get(a, c.answer_at[2 * i + 1])
+
+    @property
+    def user_response(self):
+        return self._c.user_responses[self._i]
+
+    @user_response.setter
+    def user_response(self, v):
+        self._c.user_responses[self._i] = v
+
+    @property
+    def score(self):
+        v = self._c.scores[self._i]
+        return None if v != v else v # nan check
+
+    @score.setter
+    def score(self, v):
+        self._c.scores[self._i] = _NONE if v is None else float(v)
+
+    @property
+    def points(self):
+        # the column is all doubles; whole points go back out as ints like they came in
+        v = self._c.points[self._i]
+        return int(v) if v.is_integer() else v
+
+    @points.setter
+    def points(self, v):
+        self._c.points[self._i] = float(v)
+
+    def to_dict(self):
+        return {
+            "id": self.id, "type": self.type, "stem": self.stem, "options": self.options,
+            "answer": self.answer, "user_response": self.user_response,
+            "score": self.score, "points": self.points,
+        }
+
+    def __repr__(self):
+        return f"QuestionView(id={self.id}, type={self.type!r})"
+
+def question_dict(q) -> Dict:
+    # plain dict for json, whichever representation q is
+    return q.to_dict() if isinstance(q, QuestionView) else q.__dict__
+
+
+def _atomic_write(path: Path, text: str):
+    # write next to the target then rename, so a crash never leaves half a snapshot
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+# Write-ahead journal: one small json line per change, folded into the snapshot later
+class SessionJournal:
+    def __init__(self, path: Path, compact, delay=AUTOSAVE_DELAY, max_delay=AUTOSAVE_MAX_DELAY, fsync=True):
+        self.path = path
+        self.compact = compact # callback that writes the full snapshot
+        self.delay = delay
+        self.max_delay = max_delay
+        self.fsync = fsync # False: appends reach the OS right away, whoever owns us calls sync() (group commit)
+        self.lock = threading.RLock()
+        self._f = open(path, "a", encoding="utf-8")
+        self._timer = None
+        self._first_pending = None
+        self._dirty = False
+
+    def append(self, record: Dict):
+        self.append_many([record])
+
+    @perf.timed("session.journal_append")
+    def append_many(self, records):
+        # one write + one fsync however many records (::mark -a journals a score per question)
+        lines = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        if not lines:
+            return
+        with self.lock:
+            self._f.write(lines)
+            self._f.flush()
+            if self.fsync:
+                os.fsync(self._f.fileno())
+            else:
+                self._dirty = True
+            self._schedule()
+
+    def sync(self):
+        # make unsynced appends durable; the fsync itself runs outside the lock so appends don't wait on it
+        with self.lock:
+            if not self._dirty or self._f.closed:
+                return False
+            self._dirty = False
+            fd = self._f.fileno()
+        try:
+            os.fsync(fd)
+        except OSError:
+            return False # closed (and compacted) in the meantime
+        return True
+
+    def _schedule(self):
+        # debounce: restart the timer on every change unless we've been waiting too long
+        now = time.monotonic()
+        if self._first_pending is None:
+            self._first_pending = now
+        elif self._timer is not None and now - self._first_pending >= self.max_delay:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.delay, self._fire)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def kick(self):
+        # schedule a compaction now, even with nothing journaled yet
+        with self.lock:
+            self._schedule()
+
+    def _fire(self):
+        try:
+            self.compact()
+        except Exception:
+            # journal is still on disk; next compaction or load picks it up. Drop the spent timer so
+            # the next append schedules a fresh compaction instead of waiting on this one forever
+            with self.lock:
+                if self._timer is threading.current_thread():
+                    self._timer = None
+                    self._first_pending = None
+
+    def truncate(self):
+        # caller holds self.lock and has just written a snapshot covering every record
+        self._f.seek(0)
+        self._f.truncate()
+        self._f.flush()
+        self._first_pending = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def close(self):
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._f.close()
+
+    @staticmethod
+    def replay(path: Path, sess):
+        # records hold absolute values, so replaying one that the snapshot already has is harmless
+        if not path.exists():
+            return 0
+        n = 0
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    break # torn last line from a crash mid-write
+                if "q" in rec:
+                    q = sess.questions[rec["q"]]
+                    for k in ("user_response", "score"):
+                        if k in rec:
+                            setattr(q, k, rec[k])
+                if "current_index" in rec:
+                    sess.current_index = rec["current_index"]
+                n += 1
+        return n
+
 #
 @dataclass
 class Session:
     title: str
-    questions: List[QuestionState]
+    questions: List[QuestionState] # or a QuestionColumns for loaded/large banks
     current_index: int = 0
     metadata: Dict = field(default_factory=dict) #default_factory is goofy but necessary
+    _path: Optional[Path] = field(default=None, init=False, repr=False, compare=False)
+    _journal: Optional[SessionJournal] = field(default=None, init=False, repr=False, compare=False)
+
+    def snapshot_path(self, session=SESSIONS_DIR):
+        return Path(session) / f"{self.title.replace(' ', '_')}.json"
 
-    def save(self, session): # note to self: don't forget to pass in session parameter. SESSIONS_DIR FOR zeet.py
-        fn = session / f"{self.title.replace(' ', '_')}.json"
+    @perf.timed("session.save")
+    def save(self, session=None): # session = SESSIONS_DIR from zeet.py; defaults to the file we were loaded from / attached to
+        fn = self.snapshot_path(session) if session is not None else (self._path or self.snapshot_path())
+        fn.parent.mkdir(parents=True, exist_ok=True)
+        journal = self._journal
+        if journal is None or journal.path != fn.with_suffix(".journal"):
+            # not journaling, or saving a copy somewhere else
+            self._write_snapshot(fn)
+            return fn
+        with journal.lock:
+            self._write_snapshot(fn)
+            journal.truncate()
+        return fn
+
+    def _write_snapshot(self, fn: Path):
+        qs = self.questions
+        if hasattr(qs, "snapshot"):
+            qs = qs.snapshot() # bank-backed: unvisited pages are read for the file, not kept in memory
         data = {
             "title": self.title,
             "current_index": self.current_index,
             "metadata": self.metadata,
-            "questions": [q.__dict__ for q in self.questions],
+            "questions": [question_dict(q) for q in qs],
         }
-        fn.write_text(json.dumps(data, indent=2, ensure_ascii=False))
-        return fn
+        _atomic_write(fn, json.dumps(data, indent=2, ensure_ascii=False))
+        SessionManifest(fn.parent).update(fn, self, qs) # keeps the Resume listing current without reparsing
+
+    # ---- journaled updates (cheap per answer, independent of exam size) ----
+    def attach(self, session=None, delay=AUTOSAVE_DELAY, fsync=True, defer=False):
+        # start journaling next to the snapshot; new sessions get their first snapshot now.
+        # fsync=False leaves durability to periodic sync() calls (server.py batches them)
+        # defer=True writes that first snapshot from the autosave thread instead (a bank-backed
+        # exam has to read every question for it; the carousel shouldn't wait on that)
+        if self._journal is not None:
+            return
+        first = session is not None or self._path is None
+        if first:
+            self._path = self.snapshot_path(session if session is not None else SESSIONS_DIR)
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            if not defer:
+                self._write_snapshot(self._path)
+            self._path.with_suffix(".journal").unlink(missing_ok=True)
+        self._journal = SessionJournal(self._path.with_suffix(".journal"), self.save, delay=delay, fsync=fsync)
+        if first and defer:
+            self._journal.kick()
+
+    def record(self, index: int, **changes):
+        # changes: user_response= and/or score=
+        q = self.questions[index]
+        for k, v in changes.items():
+            setattr(q, k, v)
+        if self._journal is not None:
+            self._journal.append({"q": index, **changes})
+
+    def record_many(self, updates):
+        # updates: iterable of (index, {user_response=/score=}); journaled with a single fsync
+        records = []
+        for index, changes in updates:
+            q = self.questions[index]
+            for k, v in changes.items():
+                setattr(q, k, v)
+            records.append({"q": index, **changes})
+        if self._journal is not None:
+            self._journal.append_many(records)
+
+    def goto(self, index: int):
+        self.current_index = index
+        if self._journal is not None:
+            self._journal.append({"current_index": index})
+
+    def sync(self):
+        return self._journal.sync() if self._journal is not None else False
+
+    def close(self):
+        # final compaction; leaves just the snapshot on disk
+        if self._journal is None:
+            return
+        self.save()
+        self._journal.close()
+        self._journal.path.unlink(missing_ok=True)
+        self._journal = None
 
     @staticmethod # methods can be called outside of class instance
+    @perf.timed("session.load")
     def load(path: Path):
         data = json.loads(path.read_text(encoding="utf-8"))
-        qs = [QuestionState(**q) for q in data["questions"]]
-        return Session(title=data["title"], questions=qs, current_index=data.get("current_index", 0), metadata=data.get("metadata", {}))
+        qs = QuestionColumns.from_dicts(data["questions"]) # compact store, views behave like QuestionState
+        sess = Session(title=data["title"], questions=qs, current_index=data.get("current_index", 0), metadata=data.get("metadata", {}))
+        sess._path = path
+        SessionJournal.replay(path.with_suffix(".journal"), sess)
+        return sess
@@ -7,43 +7,43 @@ Requirements:
 
 Usage:
   - create ./sounds and drop optional switch.mp3 button.mp3 grade.mp3
-  - python zeet.py
+  - python zeet.py            # boot animation + splash
+  - python zeet.py --fast     # straight to the menu, sound comes up in the background
+  - python zeet.py --headless # initialise everything, report startup time and exit
+  - python zeet.py --trace t.json # record hot-path timers, write a Chrome trace on exit
 """
 
+import time
+_T0 = time.perf_counter() # startup clock for --headless / bench_startup.py
+
 import os
 import sys
-import time
 import json
-import threading
+import atexit
+import argparse
 from pathlib import Path
-from dataclasses import dataclass, field
-from typing import List, Optional, Dict
 
 # UI libs
-from prompt_toolkit import Application
-from prompt_toolkit.layout import Layout, HSplit, VSplit, Window
-from prompt_toolkit.layout.controls import FormattedTextControl
-from prompt_toolkit.widgets import TextArea, Frame
-from prompt_toolkit.key_binding import KeyBindings
 from prompt_toolkit.styles import Style
-from prompt_toolkit.shortcuts import input_dialog, message_dialog
-
-# import rich
-from rich.console import Console
-from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn
 
 # essential data structures
 from structures import QuestionState, Session
+from bank import QuestionBank # sqlite question bank
+from manifest import SessionManifest # resume listing index
 
 #import functions
-import soundsfn # pygame sound functions
-from animate import boot_sequence, splash_screen # animations
-from render import start_menu, interactive_carousel # UI rendering and interaction
+import perf # opt-in timers/counters, ::perf in the carousel
+import soundsfn # pygame sound functions (pygame itself is imported on a background thread)
+# render (menu/carousel shell) and animate are imported lazily during boot, see init_steps()
+render = None
 
 # directories
 ROOT = Path.cwd() # current working directory typeshit
 SESSIONS_DIR = ROOT / "sessions"
 SESSIONS_DIR.mkdir(exist_ok=True)
+BANK_PATH = ROOT / "bank.db"
+EXAM_SIZE = 50 # questions drawn from the bank per new session
+RESUME_PAGE = 10 # sessions per page on the Resume screen
 
 # process config file #import styles, users, assign to variables
 with open("config.json", "r") as f:
@@ -58,7 +58,15 @@ except :
     user = "@student"
 
 selected = 0 #global selected for menu
-console = Console() #initialize rich console
+_console = None
+
+def console():
+    # rich is only needed for a handful of prints; don't pay for it at import
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
 
 # Global settings
 SETTINGS = {
@@ -67,14 +75,6 @@ SETTINGS = {
 }
 soundsfn.set_enabled(SETTINGS["sound"])
 
-# test if pygame ragequit
-try: 
-    PYGAME = True
-    import pygame
-except Exception:
-    PYGAME = False
-    print("Warning: pygame not available; sound disabled.", file=sys.stderr)
-
 # ---------- Demo/sample questions (replace with generator later) ----------
 SAMPLE = [
     QuestionState(1, "mcq", "What is the default HTTP port?", ["20", "21", "80", "443"], answer="2", points=1),
@@ -88,80 +88,183 @@ SAMPLE = [
 menu_items = ["New Session", "Resume Session", "Settings", "Quit"]
 
 # ---------- Settings UI ----------
-def settings_menu():
-    ans = input_dialog(title="Settings", text=f"Sound is {'ON' if SETTINGS['sound'] else 'OFF'}\nToggle sound? (y/n)").run()
-    if ans and ans.lower().startswith("y"):
-        SETTINGS["sound"] = not SETTINGS["sound"]
-        soundsfn.set_enabled(SETTINGS["sound"])
-        message_dialog(title="Settings", text=f"Sound is now {'ON' if SETTINGS['sound'] else 'OFF'}").run()
+def settings_rows(query, page, per_page):
+    rows = [(f"Sound: {'ON' if SETTINGS['sound'] else 'OFF'}  (Enter toggles)", "sound"), ("Back", "back")]
+    return rows, len(rows)
 
 def toggle_sound():
     SETTINGS["sound"] = not SETTINGS["sound"]
     soundsfn.set_enabled(SETTINGS["sound"])
 
+# ---------- Resume UI ----------
+def resume_rows(query, page, per_page):
+    # reads only the manifest (stat-checked), never every session file
+    rows, total = SessionManifest(SESSIONS_DIR).page(query, page, per_page)
+    out = []
+    for r in rows:
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(r["mtime"]))
+        out.append((f"{r['title']}  [{r['answered']}/{r['questions']} answered, {r['score']:g}/{r['points']:g}]  {when}", r["file"]))
+    return out, total
+
+# ---------- Startup ----------
+def _load_ui():
+    global render
+    import render # UI rendering and interaction
+
+def init_steps(wait_for_sound=True):
+    # real startup work, in order; boot_sequence advances its bar as each one finishes
+    steps = [
+        ("Starting audio", lambda: soundsfn.init_async() if SETTINGS["sound"] else None),
+        ("Loading interface", _load_ui),
+        ("Indexing sessions", lambda: SessionManifest(SESSIONS_DIR).entries()),
+    ]
+    if wait_for_sound and SETTINGS["sound"]:
+        steps.append(("Waiting for mixer", lambda: soundsfn.wait_ready(timeout=1.5)))
+    return steps
+
 # ---------- Main ----------
-def choose_resume():
-    files = sorted(SESSIONS_DIR.glob("*.json"))
-    if not files:
-        message_dialog(title="Resume", text="No saved sessions found.").run()
-        return None
-    choices = "\n".join([f"{i+1}. {p.name}" for i, p in enumerate(files)])
-    sel = input_dialog(title="Resume", text=f"Saved sessions:\n{choices}\n\nEnter number to resume:").run()
+def build_shell():
+    # one Application for the whole run; every screen below is a view swapped into it
+    shell = render.Shell()
+    shell.add("menu", render.MenuView(shell, menu_items, styleMenu, SETTINGS, toggle_sound, on_select=lambda c: on_menu(shell, c)))
+    shell.add("carousel", render.CarouselView(shell, on_quit=shell.exit))
+    shell.add("prompt", render.PromptView(shell, style=styleDialogue))
+    shell.add("list", render.ListView(shell, style=styleDialogue))
+    return shell
+
+def start_session(shell, sess):
+    sess.attach() # journal answers as they happen so a crash loses nothing
+    shell.show("carousel", sess=sess)
+
+_bank = None
+
+def open_bank():
+    # one connection for the whole run; bank-backed sessions page their questions through it
+    global _bank
+    if _bank is None:
+        _bank = QuestionBank(BANK_PATH)
+        atexit.register(_bank.close)
+    return _bank
+
+def _fresh_title(title):
+    # attach() overwrites <title>.json and drops <title>.journal, so a second exam on
+    # the same subject gets a timestamped title instead of replacing the saved one
+    def taken(name):
+        stem = name.replace(" ", "_")
+        return any((SESSIONS_DIR / f"{stem}{ext}").exists() for ext in (".json", ".journal"))
+    if not taken(title):
+        return title
+    stamp = int(time.time())
+    while taken(f"{title}_{stamp}"):
+        stamp += 1
+    return f"{title}_{stamp}"
+
+def new_session(shell, subj):
+    if subj is None:
+        shell.show("menu")
+        return
+    subj = subj.strip() or f"session_{int(time.time())}"
+    title = _fresh_title(subj)
+    # TODO: ask for files / counts
+    bank = open_bank()
+    if bank.has(subject=subj):
+        # indexed sampling; stems are paged in lazily as the carousel reaches them,
+        # and the first snapshot is written by the autosave thread
+        sess = bank.build_session(title, n=EXAM_SIZE, subject=subj)
+        sess.attach(SESSIONS_DIR, defer=True)
+    else:
+        sess = Session(title=title, questions=[QuestionState(**q.__dict__) for q in SAMPLE])
+        sess.attach(SESSIONS_DIR)
+    shell.show("carousel", sess=sess)
+
+def resume_session(shell, name):
     try:
-        idx = int(sel) - 1
-        return Session.load(files[idx])
-    except Exception:
-        message_dialog(title="Resume", text="Invalid selection.").run()
-        return None
+        sess = Session.load(SESSIONS_DIR / name)
+    except Exception as e:
+        shell.notify(f"Could not load {name}: {e}")
+        return
+    start_session(shell, sess)
+
+def on_menu(shell, choice):
+    back = lambda *_: shell.show("menu")
+    if choice == "New Session":
+        # load files in documents
+        docs = [f.name for f in Path.cwd().glob("documents/*")]
+        # summon the menu to choose which file to extract (could we use start menu)
+        # run the extractor on the chosen file(given the right file type) to get the block file and create payload
+        # extractor.iter_blocks(path) streams blocks as pages finish, so payload building can start on page 1
+        # (whole folders: `python ingest.py` extracts documents/ on a process pool into blocks/*.json)
+        # group.group_blocks(blocks) then folds reused slides and cuts topic chunks (chunk_id, block_ids, topics)
+        # call ai to generate questions from the payload (gen.Generator streams QuestionStates per chunk), generate json sesh file
+        found = f"\n\nFound documents: {', '.join(docs)}\n(python ingest.py extracts them all into blocks/)" if docs else ""
+        shell.show("prompt", title="New Session", text=f"Subject name (or press Enter for demo):{found}",
+                   on_submit=lambda subj: new_session(shell, subj))
+    elif choice == "Resume Session":
+        if not SessionManifest(SESSIONS_DIR).page("", 0, 1)[1]:
+            shell.notify("No saved sessions found.")
+            return
+        shell.show("list", title="Resume", provider=resume_rows, per_page=RESUME_PAGE,
+                   on_pick=lambda name: resume_session(shell, name), on_cancel=back)
+    elif choice == "Settings":
+        def pick(value):
+            if value == "sound":
+                toggle_sound()
+                shell.views["list"].refresh()
+                shell.notify(f"Sound is now {'ON' if SETTINGS['sound'] else 'OFF'}")
+            else:
+                back()
+        shell.show("list", title="Settings", provider=settings_rows, on_pick=pick, on_cancel=back)
+    elif choice == "Quit":
+        shell.exit(None)
 
 #the code runs here lol
-def main(): 
-
-    # boot_sequence expects (duration, user)
-    boot_sequence(3, user)
-
-    # splash_screen expects the type_text as the first argument
-    splash_screen(".ZEET//Efficient Exam Terminal")
-    
-    while True:
-        selected_ref = [0]
-        choice = start_menu(menu_items, styleMenu, SETTINGS, toggle_sound, selected_ref)
-        if choice == "New Session":
-            # load files in documents
-            for file in Path.cwd().glob("documents/*"):
-                console.print(f"Found document: {file.name}")
-                # append to menu list for found documents
-                # summon the menu to choose which file to extract (could we use start menu)
-                # then break from the loop
-            # run the extractor on the chosen file(given the right file type) to get the block file and create payload
-            # call ai to generate questions from the payload, generate json sesh file
-
-
-            subj = input_dialog(title="New Session", text="Subject name (or press Enter for demo):", style = styleDialogue).run() or f"session_{int(time.time())}"
-            # TODO: ask for files / counts; for now use SAMPLE
-            sess = Session(title=subj, questions=[QuestionState(**q.__dict__) for q in SAMPLE])
-            interactive_carousel(sess)
-        elif choice == "Resume Session":
-            sess = choose_resume()
-            if sess:
-                interactive_carousel(sess)
-        elif choice == "Settings":
-            settings_menu()
-        elif choice == "Quit":
-            console.print("ZEET shutting down. glfyt ✨")
-            break
-        else:
-            break
+def main(fast=False):
+
+    if fast:
+        for _, step in init_steps(wait_for_sound=False):
+            step()
+    else:
+        from animate import boot_sequence, splash_screen # animations
+        # boot_sequence expects (steps, user)
+        boot_sequence(init_steps(), user)
+
+        # splash_screen expects the type_text as the first argument
+        splash_screen(".ZEET//Efficient Exam Terminal")
+
+    shell = build_shell()
+    saved = shell.run("menu")
+    if saved is not None:
+        console().print(f"Session saved to {saved}")
+        raise SystemExit("Quitting (saved).")
+    console().print("ZEET shutting down. glfyt ✨")
+
+def headless():
+    # everything main() does before drawing the menu, then report and exit (used by bench_startup.py)
+    for _, step in init_steps(wait_for_sound=False):
+        step()
+    print(f"startup_ms={(time.perf_counter() - _T0) * 1000:.1f}")
 
 if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="ZEET — Efficient Exam Terminal")
+    ap.add_argument("--fast", action="store_true", help="skip boot/splash animations")
+    ap.add_argument("--headless", action="store_true", help="initialise, print startup time and exit")
+    ap.add_argument("--no-sound", action="store_true", help="never start the audio mixer")
+    ap.add_argument("--perf", action="store_true", help="record hot-path timers (see ::perf in the carousel)")
+    ap.add_argument("--trace", metavar="FILE", default=None, help="also keep trace events and write them to FILE on exit")
+    args = ap.parse_args()
+    if args.perf or args.trace:
+        perf.enable(trace=bool(args.trace))
+    if args.trace:
+        atexit.register(perf.dump, args.trace)
+    if args.no_sound or args.headless:
+        SETTINGS["sound"] = False
+        soundsfn.set_enabled(False)
+    if args.headless:
+        headless()
+        sys.exit(0)
     try:
-        # final sanity: if pygame isn't available, keep sound disabled
-        if not PYGAME:
-            SETTINGS["sound"] = False
-        else:
-            soundsfn.set_enabled(SETTINGS["sound"])
-        main()
+        main(fast=args.fast)
     except KeyboardInterrupt:
-        console.print("\nInterrupted. Bye.")
+        console().print("\nInterrupted. Bye.")
     except SystemExit as e:
-        console.print(str(e))
+        console().print(str(e))